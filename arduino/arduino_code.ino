@@ -4,11 +4,93 @@
 
 const int stepsPerRevolution = 4096; // 28BYJ-48 em meio passo
 
+// Identificação enviada no setup; o host grava junto com cada varredura
+const char FIRMWARE_VERSAO[] = "1.3";
+
 // Motores usando a ordem correta dos pinos
 Stepper motorELEV(stepsPerRevolution, 4, 6, 5, 7);
 Stepper motorBASE(stepsPerRevolution, 10, 12, 11, 13);
 VL53L0X sensor;
 
+// Movimento por eixo: velocidade máxima (passos/s) e aceleração (passos/s², 0 = sem rampa).
+// O padrão equivale ao antigo setSpeed(5): 5 rpm x 4096 passos / 60 s = 341 passos/s.
+struct Movimento {
+  float velocidade;
+  float aceleracao;
+};
+Movimento movBASE = {341, 0};
+Movimento movELEV = {341, 0};
+
+// Gira com perfil trapezoidal: acelera, segue na velocidade máxima e freia
+// de forma simétrica (triangular quando os passos não bastam para chegar à máxima).
+// O ritmo é dado aqui; o Stepper fica com velocidade alta e só aciona as bobinas.
+void mover(Stepper &motor, Movimento &mov, long passos) {
+  int sentido = passos >= 0 ? 1 : -1;
+  long n = labs(passos);
+  unsigned long anterior = micros();
+  for (long i = 0; i < n; i++) {
+    float v = mov.velocidade;
+    if (mov.aceleracao > 0) {
+      long restante = min(i, n - 1 - i);  // passos desde a partida ou até a parada
+      v = min(v, (float) sqrt(2.0 * mov.aceleracao * (restante + 0.5)));
+    }
+    unsigned long intervalo = 1000000.0 / v;
+    while (micros() - anterior < intervalo) {}
+    anterior = micros();
+    motor.step(sentido);
+  }
+}
+
+void responderMovimento(const char *eixo, Movimento &mov) {
+  Serial.print("MOV:");
+  Serial.print(eixo);
+  Serial.print(",");
+  Serial.print((long) mov.velocidade);
+  Serial.print(",");
+  Serial.println((long) mov.aceleracao);
+}
+
+// Perfil de medição do sensor (exemplos da biblioteca VL53L0X da Pololu):
+//   RAPIDO  20 ms por leitura, mais ruído
+//   PADRAO  33 ms, configuração de fábrica
+//   PRECISO 200 ms, menos ruído
+//   LONGO   33 ms, limite de sinal menor e pulsos VCSEL mais longos (alcança ~2 m, mais ruído)
+//   PERSONALIZADO  orçamento definido por ORCAMENTO: (sobre o último perfil aplicado)
+String perfilSensor = "PADRAO";
+const long ORCAMENTO_MIN_US = 20000;   // limites aceitos por ORCAMENTO:
+const long ORCAMENTO_MAX_US = 200000;
+
+void responderSensor() {
+  Serial.print("SENSOR:");
+  Serial.print(perfilSensor);
+  Serial.print(",");
+  Serial.println(sensor.getMeasurementTimingBudget());
+}
+
+// O timeout de leitura acompanha o orçamento (2x + 100 ms de folga)
+void ajustarTimeout() {
+  sensor.setTimeout(2 * sensor.getMeasurementTimingBudget() / 1000 + 100);
+}
+
+bool aplicarPerfil(String nome) {
+  bool longo = nome == "LONGO";
+  uint32_t orcamento;
+  if (nome == "RAPIDO") orcamento = 20000;
+  else if (nome == "PADRAO" || longo) orcamento = 33000;
+  else if (nome == "PRECISO") orcamento = 200000;
+  else return false;
+
+  sensor.stopContinuous();
+  sensor.setSignalRateLimit(longo ? 0.1 : 0.25);
+  sensor.setVcselPulsePeriod(VL53L0X::VcselPeriodPreRange, longo ? 18 : 14);
+  sensor.setVcselPulsePeriod(VL53L0X::VcselPeriodFinalRange, longo ? 14 : 10);
+  bool ok = sensor.setMeasurementTimingBudget(orcamento);
+  ajustarTimeout();
+  sensor.startContinuous();
+  if (ok) perfilSensor = nome;
+  return ok;
+}
+
 void setup() {
   Serial.begin(115200);
   Wire.begin();
@@ -20,10 +102,12 @@ void setup() {
   sensor.setTimeout(1000);
   sensor.startContinuous();
 
-  // Define velocidade (RPM)
-  motorBASE.setSpeed(5);
-  motorELEV.setSpeed(5);
+  // Velocidade do Stepper acima da máxima de mover(), que controla o ritmo de cada passo
+  motorBASE.setSpeed(1000);
+  motorELEV.setSpeed(1000);
 
+  Serial.print("FIRMWARE:");
+  Serial.println(FIRMWARE_VERSAO);
   Serial.println("Arduino setup DONE");
 }
 
@@ -34,7 +118,7 @@ void processarComando(String cmd) {
     long passos = cmd.substring(5).toInt();
     Serial.print("Executando BASE: ");
     Serial.println(passos);
-    motorBASE.step(passos);
+    mover(motorBASE, movBASE, passos);
     Serial.println("BASE DONE");
   }
 
@@ -42,9 +126,73 @@ void processarComando(String cmd) {
     long passos = cmd.substring(5).toInt();
     Serial.print("Executando ELEV: ");
     Serial.println(passos);
-    motorELEV.step(passos);
+    mover(motorELEV, movELEV, passos);
     Serial.println("ELEV DONE");
   }
+  else if (cmd.startsWith("VEL:")) {
+    // VEL:<BASE|ELEV>,<passos/s>,<passos/s²> -> MOV:<eixo>,<velocidade>,<aceleração>
+    int v1 = cmd.indexOf(',');
+    int v2 = cmd.indexOf(',', v1 + 1);
+    String eixo = cmd.substring(4, v1);
+    eixo.toUpperCase();
+    long velocidade = cmd.substring(v1 + 1, v2).toInt();
+    long aceleracao = v2 > 0 ? cmd.substring(v2 + 1).toInt() : 0;
+    Movimento *mov = eixo == "BASE" ? &movBASE : eixo == "ELEV" ? &movELEV : NULL;
+    if (v1 < 0 || mov == NULL || velocidade < 1 || velocidade > 2000 || aceleracao < 0 || aceleracao > 20000) {
+      Serial.print("ERRO: movimento invalido ");
+      Serial.println(cmd.substring(4));
+    }
+    else {
+      mov->velocidade = velocidade;
+      mov->aceleracao = aceleracao;
+      responderMovimento(eixo.c_str(), *mov);
+    }
+  }
+  else if (cmd.startsWith("PERFIL:")) {
+    // PERFIL:<RAPIDO|PADRAO|PRECISO|LONGO> -> SENSOR:<perfil>,<orçamento em us>
+    String nome = cmd.substring(7);
+    nome.toUpperCase();
+    if (aplicarPerfil(nome)) responderSensor();
+    else {
+      Serial.print("ERRO: perfil invalido ");
+      Serial.println(nome);
+    }
+  }
+  else if (cmd.startsWith("ORCAMENTO:")) {
+    // ORCAMENTO:<us> -> orçamento de tempo por leitura (20000 a 200000 us); perfil PERSONALIZADO
+    // (a faixa é conferida antes: toInt de um valor negativo viraria um uint32_t enorme)
+    long us = cmd.substring(10).toInt();
+    bool ok = us >= ORCAMENTO_MIN_US && us <= ORCAMENTO_MAX_US;
+    if (ok) {
+      sensor.stopContinuous();
+      ok = sensor.setMeasurementTimingBudget(us);
+      ajustarTimeout();
+      sensor.startContinuous();
+    }
+    if (ok) {
+      perfilSensor = "PERSONALIZADO";
+      responderSensor();
+    }
+    else {
+      Serial.print("ERRO: orcamento invalido ");
+      Serial.println(us);
+    }
+  }
+  else if (cmd.startsWith("SENSOR?")) {
+    responderSensor();
+  }
+  else if (cmd.startsWith("SENS:")) {
+    // SENS:k -> k leituras seguidas numa linha: DIST:d1,d2,...,dk
+    int k = constrain(cmd.substring(5).toInt(), 1, 32);
+    Serial.print("DIST:");
+    for (int i = 0; i < k; i++) {
+      uint16_t d = sensor.readRangeContinuousMillimeters();
+      if (i > 0) Serial.print(",");
+      if (sensor.timeoutOccurred()) Serial.print("TIMEOUT");
+      else Serial.print(d);
+    }
+    Serial.println();
+  }
   else if (cmd.startsWith("SENS")) {
     uint16_t d = sensor.readRangeContinuousMillimeters();
     Serial.print("DIST:");
@@ -0,0 +1,224 @@
+"""
+Amostragem angular adaptativa.
+
+Em vez de parar a base em todos os `pts_por_camada` ângulos, cada camada
+mede só um subconjunto da mesma grade (Ponto = índice na grade, então o
+CSV continua com Angulo_rad = 2*pi*Ponto/pts_por_camada):
+
+1. O perfil de distâncias da camada anterior serve de previsão. Ele é
+   atualizado com o deslocamento mediano das leituras esparsas (mais os
+   desvios acima de `limiar_mm`, que são mudança de forma e não ruído),
+   para não perder os detalhes da última camada completa.
+2. Começa com paradas uniformes a cada `salto_max` posições, mais os cantos
+   do perfil previsto (segunda diferença acima de `curvatura_mm`) e as
+   posições vizinhas, e vai dividindo, por um heap, o intervalo cujo perfil
+   previsto (suavizado, para o ruído não contar como forma) mais se afasta
+   da corda entre as extremidades, até o erro de corda ficar abaixo de
+   `tolerancia_mm` ou o orçamento (`fracao` da grade) acabar.
+3. Durante a volta, se uma leitura diverge da previsão em mais de
+   `limiar_mm` (descontado o deslocamento mediano da camada, para que
+   cones e perfis inclinados não disparem), a base passa a parar em todas
+   as posições até voltar a concordar: a forma mudou em relação à camada
+   anterior.
+
+A primeira camada, e uma a cada `camadas_densas`, é medida completa para
+renovar a previsão. A base só gira para frente, como na varredura uniforme.
+"""
+import heapq
+import numpy as np
+
+
+def interpolar_periodico(indices, valores, n):
+    """Interpola (linear, circular) leituras esparsas na grade 0..n-1; NaNs são ignorados."""
+    indices = np.asarray(indices)
+    valores = np.asarray(valores, dtype=float)
+    validos = np.isfinite(valores)
+    if not validos.any(): return np.full(n, np.nan)
+    return np.interp(np.arange(n), indices[validos], valores[validos], period=n)
+
+
+def cantos(perfil, curvatura_mm, vizinhas=1):
+    """Posições com segunda diferença acima de `curvatura_mm`, mais `vizinhas` de cada lado."""
+    n = len(perfil)
+    curvatura = np.abs(np.roll(perfil, 1) - 2 * perfil + np.roll(perfil, -1))
+    centro = np.flatnonzero(curvatura > curvatura_mm)
+    return np.unique((centro[:, None] + np.arange(-vizinhas, vizinhas + 1)) % n)
+
+
+def _erro_corda(perfil, a, b):
+    """Maior desvio do perfil entre as paradas a e b (b pode passar de n) em relação à corda."""
+    n = len(perfil)
+    j = np.arange(a, b + 1)
+    trecho = perfil[j % n]
+    corda = trecho[0] + (trecho[-1] - trecho[0]) * (j - a) / (b - a)
+    desvio = np.abs(trecho - corda)
+    k = int(np.argmax(desvio[1:-1])) + 1
+    return desvio[k], a + k
+
+
+def suavizar_periodico(perfil, janela=3):
+    """Média móvel circular de `janela` posições."""
+    if janela <= 1: return np.asarray(perfil, dtype=float)
+    estendido = np.concatenate((perfil[-janela:], perfil, perfil[:janela]))
+    return np.convolve(estendido, np.ones(janela) / janela, "same")[janela:janela + len(perfil)]
+
+
+def planejar_camada(perfil, orcamento, tolerancia_mm=0.5, salto_max=8, curvatura_mm=1.5):
+    """
+    Escolhe as paradas de uma camada a partir do perfil previsto.
+
+    O perfil é suavizado (3 posições) antes: o ruído do sensor que veio na
+    previsão não deve gastar o orçamento como se fosse forma. Os cantos
+    (segunda diferença acima de `curvatura_mm`) e as posições vizinhas são
+    sempre medidos, além das paradas a cada `salto_max`.
+
+    Args:
+        perfil (np.ndarray): Distância prevista (mm) em cada posição da grade.
+        orcamento (int): Máximo de paradas na camada (além dos cantos).
+        tolerancia_mm (float): Erro de corda a partir do qual um intervalo é dividido.
+        salto_max (int): Maior intervalo permitido entre paradas (posições da grade).
+        curvatura_mm (float): Segunda diferença (mm) que marca um canto; None desliga.
+
+    Returns:
+        np.ndarray: índices da grade, ordenados, onde medir.
+    """
+    n = len(perfil)
+    paradas = set(range(0, n, max(1, salto_max)))
+    if not np.isfinite(perfil).all():
+        return np.arange(n)
+    perfil = suavizar_periodico(perfil)
+    if curvatura_mm is not None:
+        paradas.update(cantos(perfil, curvatura_mm).tolist())
+
+    base = sorted(paradas)
+    heap = []
+    for a, b in zip(base, base[1:] + [n]):
+        if b - a > 1:
+            erro, k = _erro_corda(perfil, a, b)
+            heapq.heappush(heap, (-erro, a, b, k))
+
+    while heap and len(paradas) < orcamento:
+        erro, a, b, k = heapq.heappop(heap)
+        if -erro <= tolerancia_mm: break
+        paradas.add(k)
+        for x, y in ((a, k), (k, b)):
+            if y - x > 1:
+                e, kk = _erro_corda(perfil, x, y)
+                heapq.heappush(heap, (-e, x, y, kk))
+    return np.array(sorted(paradas))
+
+
+def tempo_camada(paradas, pts_por_camada, passos_por_volta, velocidade, aceleracao=0, orcamento_us=33000):
+    """
+    Tempo estimado (s) de uma camada que para em `paradas` (índices da grade):
+    os giros da base entre paradas consecutivas e o que completa a volta, no
+    perfil de movimento do firmware (tempo_movimento), mais uma leitura do
+    sensor (`orcamento_us`) por parada.
+    """
+    from scanner import tempo_movimento
+
+    passos_por_ponto = passos_por_volta // pts_por_camada
+    saltos = np.diff(np.r_[0, np.asarray(paradas), pts_por_camada])
+    giros = sum(tempo_movimento(int(s) * passos_por_ponto, velocidade, aceleracao) for s in saltos)
+    return giros + len(paradas) * orcamento_us / 1e6
+
+
+class AmostragemAdaptativa:
+    """
+    Estado da amostragem adaptativa durante uma varredura.
+
+    Uso em executar_varredura:
+        amostragem.iniciar_camada(camada)
+        for passo in range(n):
+            if not amostragem.medir_aqui(passo): continue
+            ... medir ...
+            amostragem.registrar(passo, distancia)
+    """
+    def __init__(self, pts_por_camada, fracao=0.5, tolerancia_mm=0.5, salto_max=8,
+                 limiar_mm=3.0, camadas_densas=10, curvatura_mm=1.5):
+        self.n = pts_por_camada
+        self.orcamento = max(1, int(round(fracao * pts_por_camada)))
+        self.tolerancia_mm = tolerancia_mm
+        self.salto_max = salto_max
+        self.curvatura_mm = curvatura_mm
+        self.limiar_mm = limiar_mm
+        self.camadas_densas = camadas_densas
+        self.perfil = None          # previsão para a camada atual
+        self.plano = None           # máscara das paradas planejadas
+        self._lidos = ([], [])      # (índices, distâncias) da camada atual
+        self._desvios = []          # leitura - previsão na camada atual
+        self._denso = False
+        self.paradas_por_camada = []
+
+    def iniciar_camada(self, camada):
+        if self._lidos[0]:
+            idx, dist = self._lidos
+            if self.perfil is None or not np.isfinite(self.perfil).all():
+                self.perfil = interpolar_periodico(idx, dist, self.n)
+            else:
+                residuo = np.asarray(dist, dtype=float) - self.perfil[idx]
+                deslocamento = np.nanmedian(residuo)
+                residuo = np.where(np.abs(residuo - deslocamento) > self.limiar_mm, residuo, deslocamento)
+                self.perfil = self.perfil + interpolar_periodico(idx, residuo, self.n)
+        self._lidos = ([], [])
+        self._desvios = []
+        self._denso = False
+        self.paradas_por_camada.append(0)
+
+        denso = (self.perfil is None or not np.isfinite(self.perfil).all()
+                 or (self.camadas_densas and (camada - 1) % self.camadas_densas == 0))
+        self.plano = np.ones(self.n, dtype=bool)
+        if not denso:
+            self.plano[:] = False
+            self.plano[planejar_camada(self.perfil, self.orcamento, self.tolerancia_mm, self.salto_max,
+                                       self.curvatura_mm)] = True
+
+    def medir_aqui(self, passo):
+        return bool(self.plano[passo]) or self._denso
+
+    def registrar(self, passo, distancia):
+        self._lidos[0].append(passo)
+        self._lidos[1].append(np.nan if distancia is None else distancia)
+        self.paradas_por_camada[-1] += 1
+        if self.perfil is not None and distancia is not None:
+            desvio = distancia - self.perfil[passo]
+            self._desvios.append(desvio)
+            self._denso = abs(desvio - np.median(self._desvios)) > self.limiar_mm
+
+
+if __name__ == "__main__":
+    # Comparação em sólidos sintéticos com ruído de sensor: paradas por camada,
+    # erro do perfil interpolado em relação à forma real e tempo por camada
+    # (sensor no perfil padrão), sem rampa (firmware padrão) e com rampa.
+    from gerador_sintetico import SOLIDOS, gerar_varredura
+    from parametros import parametros_padrao
+    from scanner import MOVIMENTO_PADRAO, PERFIS_SENSOR
+
+    pts = 128
+    passos_por_volta = parametros_padrao["passos_por_volta"]
+    movimentos = {"sem rampa": MOVIMENTO_PADRAO["BASE"], "600 passos/s, rampa 1000": (600, 1000)}
+    for nome, construtor in SOLIDOS.items():
+        verdade = gerar_varredura(construtor(), pts, altura_camada=5.0, inteiro=False)
+        lido = gerar_varredura(construtor(), pts, altura_camada=5.0, ruido_mm=0.5, semente=0)
+        verdade = verdade["Distancia_mm"].to_numpy(dtype=float).reshape(-1, pts)
+        lido = lido["Distancia_mm"].to_numpy(dtype=float).reshape(-1, pts)
+
+        amostragem = AmostragemAdaptativa(pts)
+        erros = []
+        tempos = dict.fromkeys(movimentos, 0.0)
+        for camada in range(1, len(lido) + 1):
+            amostragem.iniciar_camada(camada)
+            for passo in range(pts):
+                if amostragem.medir_aqui(passo):
+                    amostragem.registrar(passo, lido[camada - 1, passo])
+            idx, dist = amostragem._lidos
+            erros.append(interpolar_periodico(idx, dist, pts) - verdade[camada - 1])
+            for rotulo, movimento in movimentos.items():
+                tempos[rotulo] += tempo_camada(idx, pts, passos_por_volta, *movimento, PERFIS_SENSOR["padrao"])
+        paradas = np.mean(amostragem.paradas_por_camada)
+        print(f"{nome:<10} {paradas:6.1f}/{pts} paradas por camada ({paradas / pts:5.1%}), "
+              f"RMS {np.sqrt(np.mean(np.square(erros))):.2f} mm "
+              f"(uniforme {np.sqrt(np.mean(np.square(lido - verdade))):.2f} mm)")
+        for rotulo, movimento in movimentos.items():
+            uniforme = tempo_camada(np.arange(pts), pts, passos_por_volta, *movimento, PERFIS_SENSOR["padrao"])
+            print(f"{'':<10} {rotulo}: {tempos[rotulo] / len(lido):5.2f} s por camada (uniforme {uniforme:5.2f} s)")
@@ -0,0 +1,145 @@
+"""
+Buffer circular de leituras em memória compartilhada (multiprocessing.shared_memory),
+para um produtor e um consumidor em processos diferentes.
+
+Layout do bloco:
+    [0:8]     escritos (uint64) - só o produtor escreve
+    [64:72]   lidos (uint64)    - só o consumidor escreve
+    [128:136] estado (int64)    - 0 em andamento, 1 concluída, 2 interrompida, 3 erro
+    [192:...] registros (REGISTRO) x capacidade
+
+Os contadores só crescem; a posição no anel é contador % capacidade, e cada
+um fica na sua linha de cache. O produtor grava o registro e só depois
+publica `escritos`; o consumidor copia os registros e só depois publica
+`lidos`. Os registros são copiados sem trava, mas os contadores e o estado
+só são lidos e escritos sob uma multiprocessing.Lock: as escritas do NumPy
+não têm barreira de memória, e num processador de ordem fraca (ARM64) o
+outro lado poderia ver o contador novo antes do registro (ou o produtor
+sobrescrever uma posição antes de o consumidor terminar de copiá-la).
+Tomar e soltar a trava ordena os acessos em qualquer arquitetura; é uma
+aquisição por leitura gravada e duas por lote lido.
+"""
+import time
+import multiprocessing as mp
+import numpy as np
+from multiprocessing import shared_memory
+
+REGISTRO = np.dtype([
+    ("camada", np.int32),
+    ("ponto", np.int32),
+    ("angulo", np.float64),
+    ("distancia", np.float64),   # NaN nas leituras que deram TIMEOUT
+    ("instante", np.float64),    # time.perf_counter() do produtor (monotônico entre processos)
+])
+
+EM_ANDAMENTO, CONCLUIDA, INTERROMPIDA, ERRO = 0, 1, 2, 3
+_CABECALHO = 192
+
+
+class AnelCompartilhado:
+    """
+    Use `AnelCompartilhado.criar(capacidade)` no processo dono e
+    `AnelCompartilhado(nome, trava)` nos demais, com a `trava` do anel
+    criado (passada nos argumentos do processo). Um único produtor
+    (escrever) e um único consumidor (ler).
+    """
+    def __init__(self, nome, trava, _criar=False, capacidade=0):
+        if _criar:
+            tamanho = _CABECALHO + capacidade * REGISTRO.itemsize
+            self.shm = shared_memory.SharedMemory(create=True, size=tamanho)
+            self.shm.buf[:_CABECALHO] = bytes(_CABECALHO)
+        else:
+            # processos filhos criados por spawn usam o resource_tracker do pai:
+            # o bloco continua registrado uma vez só e é removido pelo dono
+            self.shm = shared_memory.SharedMemory(name=nome)
+        self.dono = _criar
+        self.trava = trava
+        buf = self.shm.buf
+        self._escritos = np.ndarray((1,), np.uint64, buf, 0)
+        self._lidos = np.ndarray((1,), np.uint64, buf, 64)
+        self._estado = np.ndarray((1,), np.int64, buf, 128)
+        self.capacidade = (self.shm.size - _CABECALHO) // REGISTRO.itemsize
+        self.registros = np.ndarray((self.capacidade,), REGISTRO, buf, _CABECALHO)
+        self.esperas = 0  # vezes em que o produtor encontrou o anel cheio
+
+    @classmethod
+    def criar(cls, capacidade=1 << 16, contexto=None):
+        """`contexto`: o de multiprocessing dos processos que vão abrir o anel (padrão: spawn)."""
+        contexto = contexto or mp.get_context("spawn")
+        return cls(None, contexto.Lock(), _criar=True, capacidade=capacidade)
+
+    @property
+    def nome(self):
+        return self.shm.name
+
+    def _contadores(self):
+        with self.trava:
+            return int(self._escritos[0]), int(self._lidos[0])
+
+    def __len__(self):
+        """Registros escritos e ainda não lidos."""
+        escritos, lidos = self._contadores()
+        return escritos - lidos
+
+    # ----- produtor -----
+    def escrever(self, camada, ponto, angulo, distancia, timeout=5.0):
+        """
+        Acrescenta uma leitura (distancia None vira NaN). Se o anel estiver
+        cheio, espera o consumidor por até `timeout` s.
+        """
+        escritos, lidos = self._contadores()
+        if escritos - lidos >= self.capacidade:
+            self.esperas += 1
+            limite = time.perf_counter() + timeout
+            while escritos - lidos >= self.capacidade:
+                if time.perf_counter() > limite:
+                    raise TimeoutError("Anel de leituras cheio: o processamento parou de consumir")
+                time.sleep(0.001)
+                escritos, lidos = self._contadores()
+        self.registros[escritos % self.capacidade] = (
+            camada, ponto, angulo, np.nan if distancia is None else distancia, time.perf_counter())
+        with self.trava:
+            self._escritos[0] = escritos + 1
+
+    def encerrar(self, estado):
+        """Marca o fim da produção (CONCLUIDA, INTERROMPIDA ou ERRO)."""
+        with self.trava:
+            self._estado[0] = estado
+
+    # ----- consumidor -----
+    def ler(self, maximo=None):
+        """
+        Copia os registros disponíveis (até `maximo`) e libera o espaço.
+
+        Returns:
+            np.ndarray: registros (dtype REGISTRO), em ordem de escrita.
+        """
+        escritos, lidos = self._contadores()
+        n = escritos - lidos
+        if maximo is not None: n = min(n, maximo)
+        if n <= 0: return np.empty(0, dtype=REGISTRO)
+        inicio = lidos % self.capacidade
+        fim = inicio + n
+        if fim <= self.capacidade:
+            saida = self.registros[inicio:fim].copy()
+        else:
+            saida = np.concatenate((self.registros[inicio:], self.registros[:fim - self.capacidade]))
+        with self.trava:
+            self._lidos[0] = lidos + n
+        return saida
+
+    @property
+    def estado(self):
+        with self.trava:
+            return int(self._estado[0])
+
+    def terminado(self):
+        """True quando a produção acabou e tudo já foi lido."""
+        return self.estado != EM_ANDAMENTO and len(self) == 0
+
+    def fechar(self):
+        # os arrays apontam para o buffer: soltá-los antes de fechar o mapeamento
+        self._escritos = self._lidos = self._estado = self.registros = None
+        self.shm.close()
+        if self.dono:
+            self.shm.unlink()
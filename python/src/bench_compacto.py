@@ -0,0 +1,111 @@
+"""
+Modo compacto da reconstrução (float32 + distâncias uint16 + tabela de
+cos/sin) contra o modo padrão (float64), em varreduras sintéticas:
+
+    memória      bytes das leituras lidas e dos pontos reconstruídos
+    pico_mb      pico de memória de reconstruir_dataframe (tracemalloc)
+    tempo        melhor de `--repeticoes` (leitura do CSV e reconstrução)
+    erro_max_mm  maior diferença em X/Y/Z entre os dois modos
+
+Também confere que a tabela de cos/sin não muda nada no modo padrão
+(resultado idêntico ao cálculo ponto a ponto). Termina com código 1 se o
+erro do modo compacto passar de `--tolerancia` (padrão: meio milímetro,
+metade da resolução do VL53L0X) ou se o modo padrão mudar.
+
+Uso (a partir da raiz do repositório):
+    python python/src/bench_compacto.py [--tamanhos 1e5 1e6] [--tolerancia 0.5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from gerador_sintetico import SOLIDOS, gerar_varredura
+from reconstrucao import ler_leituras, reconstruir_dataframe, polar_para_cartesiano
+
+PARAMETROS = (0.0, 0.5, 157.0, 5.0, 1.1)  # altura_inicial, altura_camada, dist_sensor, alin_horizontal, escala
+
+
+def _melhor_tempo(func, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def _pico_mb(func):
+    tracemalloc.start()
+    func()
+    pico = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return pico
+
+
+def comparar(arquivo, repeticoes):
+    """Mede os dois modos num CSV bruto. Returns: dict com as métricas e os erros."""
+    r = {}
+    for modo, compacto in (("padrao", False), ("compacto", True)):
+        t_leitura, df = _melhor_tempo(lambda: ler_leituras(arquivo, compacto), repeticoes)
+        reconstruir = lambda: reconstruir_dataframe(df, *PARAMETROS, compacto=compacto)
+        t_reconst, pontos = _melhor_tempo(reconstruir, repeticoes)
+        r[modo] = {"leitura_s": t_leitura, "reconstrucao_s": t_reconst, "pico_mb": _pico_mb(reconstruir),
+                   "leituras_mb": df.memory_usage().sum() / 2**20,
+                   "pontos_mb": pontos.memory_usage().sum() / 2**20, "pontos": pontos}
+
+    xyz = ['X_mm', 'Y_mm', 'Z_mm']
+    padrao, compacto = r["padrao"].pop("pontos"), r["compacto"].pop("pontos")
+    r["erro_max_mm"] = float(np.abs(compacto[xyz].to_numpy(dtype=float) - padrao[xyz].to_numpy()).max())
+
+    # referência ponto a ponto (cos/sin de cada leitura), como antes da tabela
+    df = ler_leituras(arquivo)
+    df = df.sort_values(by=['Camada', 'Ponto'], kind='stable')
+    df = df[df['Distancia_mm'].notna()]
+    direto = polar_para_cartesiano(df['Camada'].to_numpy(), df['Angulo_rad'].to_numpy(dtype=float),
+                                   df['Distancia_mm'].to_numpy(dtype=float), *PARAMETROS)
+    r["padrao_identico"] = all(np.array_equal(a, padrao[c].to_numpy()) for a, c in zip(direto, xyz))
+    return r
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=float, nargs="+", default=[1e5, 1e6])
+    parser.add_argument("--solido", choices=sorted(SOLIDOS), default="ampulheta")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--tolerancia", type=float, default=0.5, help="erro máximo aceito no modo compacto (mm)")
+    args = parser.parse_args()
+
+    falhou = False
+    with tempfile.TemporaryDirectory() as pasta:
+        for n in sorted(int(t) for t in args.tamanhos):
+            pts = 512
+            camadas = max(2, -(-n // pts))
+            solido = SOLIDOS[args.solido]()
+            df = gerar_varredura(solido, pts, camadas, solido["altura"] / (camadas - 1),
+                                 ruido_mm=0.5, taxa_falhas=0.01, semente=0)
+            arquivo = os.path.join(pasta, f"scan_{n}.csv")
+            df.to_csv(arquivo, index=False)
+
+            r = comparar(arquivo, args.repeticoes)
+            print(f"\n{len(df):>10} amostras ({pts} pts x {camadas} camadas)")
+            for modo in ("padrao", "compacto"):
+                m = r[modo]
+                print(f"  {modo:<9} leitura {m['leitura_s'] * 1000:8.1f} ms  reconstrução {m['reconstrucao_s'] * 1000:7.1f} ms"
+                      f"  pico {m['pico_mb']:7.1f} MB  leituras {m['leituras_mb']:6.1f} MB  pontos {m['pontos_mb']:6.1f} MB")
+            p, c = r["padrao"], r["compacto"]
+            print(f"  razão compacto/padrão: pico x{c['pico_mb'] / p['pico_mb']:.2f}, "
+                  f"pontos x{c['pontos_mb'] / p['pontos_mb']:.2f}, reconstrução x{c['reconstrucao_s'] / p['reconstrucao_s']:.2f}")
+            print(f"  erro máximo {r['erro_max_mm']:.2e} mm; modo padrão idêntico ao ponto a ponto: {r['padrao_identico']}")
+            if r["erro_max_mm"] > args.tolerancia or not r["padrao_identico"]:
+                print(f"  [FALHA] tolerância {args.tolerancia} mm")
+                falhou = True
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
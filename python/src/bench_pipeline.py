@@ -0,0 +1,147 @@
+"""
+Benchmark do pipeline (reconstruir_pontos, suavizar_pontos, dataframe_para_stl)
+com varreduras sintéticas de 1k a 10M amostras.
+
+Para cada tamanho mede o melhor tempo de `--repeticoes` execuções e o pico
+de memória (tracemalloc, numa execução separada). Etapas cuja extrapolação
+linear passaria de `--limite-s` são puladas nos tamanhos seguintes.
+Os resultados vão para tests/benchmarks/pipeline_<data>.json; com
+`--comparar` imprime a razão em relação a uma execução anterior.
+
+Uso (a partir da raiz do repositório):
+    python python/src/bench_pipeline.py [--tamanhos 1e3 1e4 1e5] [--comparar base.json]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from gerador_sintetico import SOLIDOS, gerar_varredura
+from reconstrucao import reconstruir_pontos, suavizar_pontos
+from exportar_stl import dataframe_para_stl
+
+TAMANHOS_PADRAO = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+ETAPAS = ("reconstruir_pontos", "suavizar_pontos", "dataframe_para_stl")
+
+
+def geometria(amostras):
+    """(pts_por_camada, camadas) para aproximadamente `amostras` leituras."""
+    pts = int(np.clip(2 ** round(math.log2(math.sqrt(amostras))), 64, 2048))
+    return pts, max(2, math.ceil(amostras / pts))
+
+
+def _medir(func, repeticoes, memoria):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - inicio)
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        func()
+        pico = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return min(tempos), pico, resultado
+
+
+def executar(tamanhos, solido, repeticoes=3, limite_s=60.0, memoria=True):
+    import scipy.ndimage  # aquecimento: suavizar_pontos importa o scipy no primeiro uso
+
+    resultados = []
+    pulados = set()
+    with tempfile.TemporaryDirectory() as pasta:
+        for n in tamanhos:
+            pts, camadas = geometria(n)
+            altura_camada = SOLIDOS[solido]()["altura"] / (camadas - 1)
+            df = gerar_varredura(SOLIDOS[solido](), pts, camadas, altura_camada, ruido_mm=0.5, semente=0)
+            arquivo = os.path.join(pasta, f"scan_{n}.csv")
+            df.to_csv(arquivo, index=False)
+            print(f"\n{len(df):>10} amostras ({pts} pts x {camadas} camadas)")
+
+            estado = {}
+            etapas = {
+                "reconstruir_pontos": lambda: reconstruir_pontos(arquivo, 0, altura_camada, 157, 5, 1.0),
+                "suavizar_pontos": lambda: suavizar_pontos(estado["reconstruir_pontos"], 3),
+                "dataframe_para_stl": lambda: dataframe_para_stl(estado["suavizar_pontos"],
+                                                                 os.path.join(pasta, "saida.stl")),
+            }
+            for etapa in ETAPAS:
+                if etapa in pulados:
+                    print(f"  {etapa:<20} pulado (estimativa > {limite_s:.0f} s)")
+                    continue
+                t, pico, estado[etapa] = _medir(etapas[etapa], repeticoes, memoria)
+                resultados.append({"etapa": etapa, "amostras": len(df), "tempo_s": t,
+                                   "pico_mb": pico, "amostras_por_s": len(df) / t})
+                texto_mem = f"{pico:8.1f} MB" if pico is not None else ""
+                print(f"  {etapa:<20} {t*1000:10.1f} ms  {len(df)/t/1e6:8.2f} M amostras/s  {texto_mem}")
+                proximo = tamanhos[tamanhos.index(n) + 1] if n != tamanhos[-1] else None
+                if proximo and t * proximo / n * (repeticoes + memoria) > limite_s:
+                    pulados.add(etapa)
+                    if etapa == "suavizar_pontos": pulados.add("dataframe_para_stl")
+    return resultados
+
+
+def _versao_git():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def comparar(resultados, caminho_base):
+    with open(caminho_base, encoding="utf-8") as f:
+        base = {(r["etapa"], r["amostras"]): r for r in json.load(f)["resultados"]}
+    print(f"\nComparação com {caminho_base} (razão atual/base, <1 = mais rápido)")
+    for r in resultados:
+        b = base.get((r["etapa"], r["amostras"]))
+        if b is None: continue
+        print(f"  {r['etapa']:<20} {r['amostras']:>10}  tempo x{r['tempo_s']/b['tempo_s']:.2f}", end="")
+        if r["pico_mb"] and b.get("pico_mb"):
+            print(f"  memória x{r['pico_mb']/b['pico_mb']:.2f}", end="")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=float, nargs="+", default=TAMANHOS_PADRAO)
+    parser.add_argument("--solido", choices=sorted(SOLIDOS), default="ampulheta")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--limite-s", type=float, default=60.0)
+    parser.add_argument("--sem-memoria", action="store_true", help="não mede o pico de memória")
+    parser.add_argument("--comparar", metavar="JSON")
+    parser.add_argument("--pasta", default="tests/benchmarks")
+    args = parser.parse_args()
+
+    tamanhos = sorted(int(t) for t in args.tamanhos)
+    resultados = executar(tamanhos, args.solido, args.repeticoes, args.limite_s, not args.sem_memoria)
+
+    os.makedirs(args.pasta, exist_ok=True)
+    caminho = os.path.join(args.pasta, f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({
+            "data": datetime.now().isoformat(),
+            "git": _versao_git(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "maquina": platform.platform(),
+            "solido": args.solido,
+            "resultados": resultados,
+        }, f, indent=2)
+    print(f"\nResultados salvos em {caminho}")
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
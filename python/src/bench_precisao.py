@@ -0,0 +1,215 @@
+"""
+Precisão x velocidade: varre sólidos sintéticos com geometria conhecida pelo
+pipeline completo (distâncias brutas -> reconstruir_pontos -> suavizar_pontos
+-> dataframe_para_stl) e mede, para cada configuração, o tempo de cada etapa
+junto com o erro dimensional:
+
+    rms_radial_mm   RMS do erro radial dos pontos suavizados (r medido - r real)
+    hausdorff_mm    Hausdorff entre a malha (vértices + centróides) e a superfície
+                    analítica, nos dois sentidos (pega também buracos na malha)
+    erro_volume_pct volume das seções empilhadas (fórmula do laço) vs. volume real
+
+Com `--base` compara com uma execução anterior e termina com código 1 se
+alguma configuração piorou além da tolerância, para que uma otimização de
+velocidade não reduza a precisão sem ninguém ver.
+
+Uso (a partir da raiz do repositório):
+    python python/src/bench_precisao.py [--solidos cilindro estrela] [--pts 64 128]
+        [--alturas 5 10] [--suavizacao 1 3] [--ruido 1.0] [--base precisao_xxx.json]
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from gerador_sintetico import (SOLIDOS, gerar_varredura, raio_verdadeiro, volume_verdadeiro,
+                               distancia_superficie, amostrar_superficie)
+from reconstrucao import reconstruir_pontos, suavizar_pontos
+from exportar_stl import dataframe_para_stl
+
+# geometria usada na simulação e na reconstrução (sem erro de calibração)
+DIST_SENSOR = 157.0
+ALIN_HORIZONTAL = 5.0
+
+METRICAS = ("rms_radial_mm", "hausdorff_mm", "erro_volume_pct")
+
+
+# ==================================================
+# MÉTRICAS
+# ==================================================
+
+def erro_radial(solido, xs, ys, zs):
+    """Erro radial com sinal (mm) de cada ponto em relação ao sólido."""
+    return np.hypot(xs, ys) - raio_verdadeiro(solido, np.arctan2(ys, xs), zs)
+
+
+def volume_camadas(camadas, xs, ys, zs):
+    """
+    Volume (mm³) das seções de cada camada empilhadas em Z.
+
+    A área de cada camada vem da fórmula do laço com os pontos ordenados por
+    ângulo, calculada para todas as camadas de uma vez; o volume é a
+    integral trapezoidal das áreas ao longo de Z.
+    """
+    ordem = np.lexsort((np.arctan2(ys, xs), camadas))
+    c, x, y, z = camadas[ordem], xs[ordem], ys[ordem], zs[ordem]
+    inicio = np.flatnonzero(np.r_[True, c[1:] != c[:-1]])
+    fim = np.r_[inicio[1:], len(c)]
+    # índice do próximo ponto dentro da mesma camada (fecha o polígono)
+    proximo = np.arange(1, len(c) + 1)
+    proximo[fim - 1] = inicio
+    area = 0.5 * np.abs(np.add.reduceat(x * y[proximo] - x[proximo] * y, inicio))
+    z_camada = z[inicio]
+    return float(np.sum((area[1:] + area[:-1]) / 2 * np.diff(z_camada)))
+
+
+def hausdorff(solido, pontos, z_min, z_max):
+    """
+    Distância de Hausdorff (mm) entre `pontos` (n, 3) e a superfície lateral
+    do sólido entre z_min e z_max.
+    """
+    from scipy.spatial import cKDTree
+
+    ida = np.abs(distancia_superficie(solido, *pontos.T)).max()
+    superficie = amostrar_superficie(solido, z_min=z_min, z_max=z_max)
+    volta = cKDTree(pontos).query(superficie)[0].max()
+    return float(max(ida, volta))
+
+
+# ==================================================
+# EXECUÇÃO
+# ==================================================
+
+def avaliar(solido, pts_por_camada, altura_camada, suavizacao, ruido_mm, taxa_falhas, pasta, semente=0):
+    """
+    Roda o pipeline numa configuração e devolve tempos e erros.
+
+    Returns:
+        dict: configuração, tempos por etapa (s) e as METRICAS
+    """
+    from stl import mesh
+
+    df = gerar_varredura(solido, pts_por_camada, None, altura_camada, DIST_SENSOR, ALIN_HORIZONTAL,
+                         ruido_mm, taxa_falhas, semente=semente)
+    arquivo = os.path.join(pasta, "varredura.csv")
+    df.to_csv(arquivo, index=False)
+
+    tempos = {}
+    inicio = time.perf_counter()
+    pontos = reconstruir_pontos(arquivo, 0.0, altura_camada, DIST_SENSOR, ALIN_HORIZONTAL, 1.0)
+    tempos["reconstruir_pontos"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    suaves = suavizar_pontos(pontos, suavizacao)
+    tempos["suavizar_pontos"] = time.perf_counter() - inicio
+
+    arquivo_stl = os.path.join(pasta, "malha.stl")
+    inicio = time.perf_counter()
+    dataframe_para_stl(suaves, arquivo_stl)
+    tempos["dataframe_para_stl"] = time.perf_counter() - inicio
+
+    camadas = suaves["Camada"].to_numpy()
+    xs, ys, zs = (suaves[c].to_numpy(dtype=float) for c in ("X_mm", "Y_mm", "Z_mm"))
+    z_min, z_max = zs.min(), zs.max()
+
+    malha = mesh.Mesh.from_file(arquivo_stl)
+    amostras_malha = np.vstack((malha.vectors.reshape(-1, 3), malha.vectors.mean(axis=1)))
+
+    return {
+        "solido": solido["nome"],
+        "pts_por_camada": pts_por_camada,
+        "altura_camada": altura_camada,
+        "suavizacao": suavizacao,
+        "ruido_mm": ruido_mm,
+        "taxa_falhas": taxa_falhas,
+        "amostras": len(df),
+        "triangulos": len(malha.vectors),
+        "tempos_s": tempos,
+        "tempo_total_s": sum(tempos.values()),
+        "rms_radial_mm": float(np.sqrt(np.nanmean(erro_radial(solido, xs, ys, zs) ** 2))),
+        "hausdorff_mm": hausdorff(solido, amostras_malha, z_min, z_max),
+        "erro_volume_pct": 100 * (volume_camadas(camadas, xs, ys, zs)
+                                  / volume_verdadeiro(solido, z_min, z_max) - 1),
+    }
+
+
+def _chave(r):
+    return (r["solido"], r["pts_por_camada"], r["altura_camada"], r["suavizacao"],
+            r["ruido_mm"], r["taxa_falhas"])
+
+
+def comparar(resultados, caminho_base, tolerancia_pct=5.0, folga_mm=0.05):
+    """
+    Compara os erros com uma execução anterior.
+
+    Uma métrica piorou se passou de base * (1 + tolerancia_pct/100) + folga
+    (folga em mm, ou em pontos percentuais para o volume).
+
+    Returns:
+        list: (configuração, métrica, base, atual) de cada piora
+    """
+    with open(caminho_base, encoding="utf-8") as f:
+        base = {_chave(r): r for r in json.load(f)["resultados"]}
+
+    pioras = []
+    print(f"\nComparação com {caminho_base} (tempo atual/base)")
+    for r in resultados:
+        b = base.get(_chave(r))
+        if b is None: continue
+        texto = [f"tempo x{r['tempo_total_s'] / b['tempo_total_s']:.2f}"]
+        for m in METRICAS:
+            atual, anterior = abs(r[m]), abs(b[m])
+            if atual > anterior * (1 + tolerancia_pct / 100) + folga_mm:
+                pioras.append((_chave(r), m, b[m], r[m]))
+                texto.append(f"{m} {b[m]:.3f} -> {r[m]:.3f} PIOROU")
+        print(f"  {str(_chave(r)):<48} " + "  ".join(texto))
+    return pioras
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--solidos", nargs="+", choices=sorted(SOLIDOS), default=sorted(SOLIDOS))
+    parser.add_argument("--pts", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--alturas", type=float, nargs="+", default=[2.5, 5.0, 10.0])
+    parser.add_argument("--suavizacao", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--ruido", type=float, default=1.0, help="desvio padrão do sensor (mm)")
+    parser.add_argument("--falhas", type=float, default=0.0, help="fração de TIMEOUTs")
+    parser.add_argument("--base", metavar="JSON", help="execução anterior para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=5.0, help="piora relativa aceita (%%)")
+    parser.add_argument("--pasta", default="tests/benchmarks")
+    args = parser.parse_args()
+
+    import scipy.ndimage  # aquecimento: não contar a importação na primeira configuração
+
+    resultados = []
+    print(f"{'configuração':<36} {'amostras':>8} {'tempo ms':>9} {'rms mm':>7} {'haus mm':>8} {'vol %':>7}")
+    with tempfile.TemporaryDirectory() as pasta:
+        for nome, pts, altura, janela in itertools.product(args.solidos, args.pts, args.alturas, args.suavizacao):
+            r = avaliar(SOLIDOS[nome](), pts, altura, janela, args.ruido, args.falhas, pasta)
+            resultados.append(r)
+            config = f"{nome} {pts}pts {altura:g}mm suav={janela}"
+            print(f"{config:<36} {r['amostras']:>8} {r['tempo_total_s']*1000:9.1f} "
+                  f"{r['rms_radial_mm']:7.3f} {r['hausdorff_mm']:8.3f} {r['erro_volume_pct']:+7.2f}")
+
+    os.makedirs(args.pasta, exist_ok=True)
+    caminho = os.path.join(args.pasta, f"precisao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({"data": datetime.now().isoformat(), "resultados": resultados}, f, indent=2)
+    print(f"\nResultados salvos em {caminho}")
+
+    if args.base:
+        pioras = comparar(resultados, args.base, args.tolerancia)
+        if pioras:
+            print(f"\n{len(pioras)} métrica(s) de precisão pioraram", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Vazão e jitter da aquisição: varredura na mesma thread/processo da interface
+x aquisição em processo separado (varredura_multiprocesso), com e sem carga
+no processo principal.
+
+O Arduino é simulado por uma transcrição sintética reproduzida em tempo real
+(SerialReplay, "replay-rt:"): cada motor responde após `--t-motor` s e o
+sensor após `--t-sensor` s, com as distâncias de um sólido sintético. A
+carga imita a interface durante a varredura: laços em Python puro e
+reconversões NumPy da nuvem inteira, disputando o GIL.
+
+Para cada modo mede, pelos instantes das leituras (intervalos dentro da
+mesma camada):
+    leituras/s, intervalo médio, jitter (desvio padrão) e p99 - mediana (ms)
+
+Uso (a partir da raiz do repositório):
+    python python/src/bench_processos.py [--pts 32] [--camadas 4] [--t-motor 0.01] [--t-sensor 0.02]
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from transcricao_serial import escrever_transcricao, ENVIADO, RECEBIDO
+from varredura_multiprocesso import VarreduraMultiprocesso, estatisticas_intervalos
+
+PARAMETROS = {"altura_inicial": 0.0, "altura_camada": 5.0, "dist_sensor": 157.0,
+              "alin_horizontal": 5.0, "escala": 1.0}
+PASSOS_POR_VOLTA = 2048
+PASSOS_POR_CAMADA = 512
+
+
+def transcricao_sintetica(caminho, pts_por_camada, camadas, t_motor, t_sensor):
+    """
+    Sessão de executar_varredura uniforme com respostas atrasadas como as de
+    um Arduino real (eco imediato, DONE após t_motor, DIST após t_sensor).
+    """
+    from gerador_sintetico import SOLIDOS, gerar_varredura
+
+    distancias = gerar_varredura(SOLIDOS["ampulheta"](), pts_por_camada, camadas, PARAMETROS["altura_camada"],
+                                 PARAMETROS["dist_sensor"], PARAMETROS["alin_horizontal"], ruido_mm=1.0,
+                                 semente=0)["Distancia_mm"].to_numpy()
+    passos_por_ponto = PASSOS_POR_VOLTA // pts_por_camada
+    registros = [(RECEBIDO, 0.0, b"Arduino setup DONE\r\n")]
+    t = 0.0
+
+    def motor(nome, passos):
+        nonlocal t
+        registros.append((ENVIADO, t, f"{nome}:{passos}\n".encode()))
+        registros.append((RECEBIDO, t, f"Executando {nome}: {passos}\r\n".encode()))
+        t += t_motor
+        registros.append((RECEBIDO, t, f"{nome} DONE\r\n".encode()))
+
+    def sensor(distancia):
+        nonlocal t
+        registros.append((ENVIADO, t, b"SENS\n"))
+        t += t_sensor
+        registros.append((RECEBIDO, t, f"DIST:{int(distancia)}\r\n".encode()))
+
+    i = 0
+    for _ in range(camadas):
+        for passo in range(pts_por_camada):
+            if passo > 0: motor("BASE", passos_por_ponto)
+            sensor(distancias[i])
+            i += 1
+        motor("BASE", passos_por_ponto)
+        motor("ELEV", PASSOS_POR_CAMADA)
+    motor("ELEV", -camadas * PASSOS_POR_CAMADA)
+    escrever_transcricao(caminho, registros, {"sintetica": True})
+
+
+class Carga:
+    """Trabalho no processo principal enquanto a varredura roda (o que a interface faria)."""
+    def __init__(self, ativa):
+        self.ativa = ativa
+        self.iteracoes = 0
+
+    def passo(self, previa=None):
+        if not self.ativa:
+            time.sleep(0.005)
+            return
+        # laço em Python puro (desenho, sinais) + reconversão NumPy de uma nuvem grande
+        sum(i * i for i in range(20000))
+        from reconstrucao import polar_para_cartesiano
+        n = 200_000
+        polar_para_cartesiano(np.repeat(np.arange(1, 101), n // 100), np.linspace(0, 2 * np.pi, n),
+                              np.full(n, 100.0), **PARAMETROS)
+        self.iteracoes += 1
+
+
+def varredura_em_thread(transcricao, pasta, pts_por_camada, camadas, carga):
+    """Arquitetura anterior: executar_varredura numa thread do processo da interface."""
+    from scanner import conectar_serial, iniciar_arduino, executar_varredura
+
+    instantes, camadas_lidas = [], []
+
+    def ao_medir(camada, ponto, angulo, distancia):
+        instantes.append(time.perf_counter())
+        camadas_lidas.append(camada)
+
+    ser = conectar_serial(f"replay-rt:{transcricao}", 115200)
+    iniciar_arduino(ser)
+    thread = threading.Thread(target=executar_varredura, daemon=True, args=(
+        ser, os.path.join(pasta, "thread.csv"), pts_por_camada, camadas, PASSOS_POR_VOLTA, PASSOS_POR_CAMADA),
+        kwargs={"ao_medir": ao_medir})
+    inicio = time.perf_counter()
+    thread.start()
+    while thread.is_alive():
+        carga.passo()
+    duracao = time.perf_counter() - inicio
+    return estatisticas_intervalos(np.array(instantes), np.array(camadas_lidas)), duracao
+
+
+def varredura_em_processos(transcricao, pasta, pts_por_camada, camadas, carga):
+    """Aquisição e processamento em processos separados; a carga fica no processo principal."""
+    varredura = VarreduraMultiprocesso(f"replay-rt:{transcricao}", 115200, os.path.join(pasta, "processos.csv"),
+                                       pts_por_camada, camadas, PASSOS_POR_VOLTA, PASSOS_POR_CAMADA, PARAMETROS)
+    varredura.iniciar()
+    inicio = time.perf_counter()
+    fim = None
+    while fim is None:
+        varredura.atualizar(PARAMETROS)
+        carga.passo()
+        fim = next((e for e in varredura.eventos() if e[0] == "fim"), None)
+    duracao = time.perf_counter() - inicio
+    varredura.encerrar()
+    if fim[2]:
+        raise RuntimeError(f"Falha na aquisição: {fim[2]}")
+    return varredura.estatisticas(), duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pts", type=int, default=32)
+    parser.add_argument("--camadas", type=int, default=4)
+    parser.add_argument("--t-motor", type=float, default=0.01, help="resposta simulada dos motores (s)")
+    parser.add_argument("--t-sensor", type=float, default=0.02, help="resposta simulada do sensor (s)")
+    parser.add_argument("--pasta", default="tests/benchmarks")
+    args = parser.parse_args()
+
+    resultados = []
+    print(f"{'modo':<22} {'leituras/s':>10} {'interv. ms':>10} {'jitter ms':>9} {'p99-med ms':>10} {'total s':>8}")
+    with tempfile.TemporaryDirectory() as pasta:
+        transcricao = os.path.join(pasta, "sintetica.scnt")
+        transcricao_sintetica(transcricao, args.pts, args.camadas, args.t_motor, args.t_sensor)
+        for nome, funcao in (("thread", varredura_em_thread), ("processos", varredura_em_processos)):
+            for com_carga in (False, True):
+                carga = Carga(com_carga)
+                estat, duracao = funcao(transcricao, pasta, args.pts, args.camadas, carga)
+                modo = f"{nome}{' + carga' if com_carga else ''}"
+                resultados.append(dict(estat, modo=modo, duracao_s=duracao, iteracoes_carga=carga.iteracoes))
+                print(f"{modo:<22} {estat['leituras_por_s']:10.1f} {estat['intervalo_medio_ms']:10.2f} "
+                      f"{estat['jitter_ms']:9.2f} {estat['p99_menos_mediana_ms']:10.2f} {duracao:8.2f}")
+
+    ideal = args.t_motor + args.t_sensor
+    print(f"\nIdeal (só o Arduino): {1 / ideal:.1f} leituras/s, intervalo {ideal * 1000:.2f} ms")
+    os.makedirs(args.pasta, exist_ok=True)
+    caminho = os.path.join(args.pasta, f"processos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({"data": datetime.now().isoformat(), "configuracao": vars(args), "resultados": resultados},
+                  f, indent=2)
+    print(f"Resultados salvos em {caminho}")
+
+
+if __name__ == "__main__":
+    main()
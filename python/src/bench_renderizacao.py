@@ -0,0 +1,83 @@
+"""
+Mede o tempo por quadro ao percorrer as camadas com o slider, em 2D e 3D,
+com uma nuvem sintética (padrão: 100k pontos = 400 camadas x 250 pts).
+
+Roda sem display (Qt "offscreen") se necessário. Meta: >= 30 FPS.
+
+Uso (a partir da raiz do repositório):
+    python python/src/bench_renderizacao.py [--camadas 400] [--pts 250] [--voltas 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pandas as pd
+from PyQt5.QtWidgets import QApplication
+
+from main import App
+from parametros import parametros_padrao
+
+
+def nuvem_sintetica(camadas, pts):
+    """Cilindro ondulado, já no formato de `pontos_reconst`."""
+    ang = np.tile(np.linspace(0, 2*np.pi, pts, endpoint=False), camadas)
+    camada = np.repeat(np.arange(1, camadas + 1), pts)
+    raio = 40 + 5*np.sin(6*ang) + 10*np.sin(camada / camadas * np.pi)
+    return pd.DataFrame({
+        "Camada": camada,
+        "X_mm": raio*np.cos(ang),
+        "Y_mm": raio*np.sin(ang),
+        "Z_mm": (camada - 1) * 0.5,
+    })
+
+
+def percorrer(janela, app, camadas, voltas):
+    for _ in range(voltas):
+        for c in range(1, camadas + 1):
+            janela.slider_camada.setValue(c)
+            app.processEvents()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--camadas", type=int, default=400)
+    parser.add_argument("--pts", type=int, default=250)
+    parser.add_argument("--voltas", type=int, default=3)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    janela = App(parametros_padrao)
+    janela.show()
+    app.processEvents()
+
+    # injeta a nuvem sem passar pela reconstrução
+    janela.pontos_reconst = nuvem_sintetica(args.camadas, args.pts)
+    janela.chave_reconst = ("sintetica", args.camadas, args.pts)
+    janela.slider_camada.setMaximum(args.camadas)
+
+    print(f"nuvem: {len(janela.pontos_reconst)} pontos, {args.camadas} camadas")
+    for modo in ("3D", "2D"):
+        if (modo == "2D") != janela.vis_2d:
+            janela.alternar_2d_3d()
+        else:
+            janela.criar_canvas_visivel()
+        render = janela.render_2D if janela.vis_2d else janela.render_3D
+        inicio = time.perf_counter()
+        janela.plotar_dados()  # redesenho completo (nuvem 3D decimada)
+        app.processEvents()
+        print(f"{modo}: redesenho completo {(time.perf_counter() - inicio)*1000:.0f} ms")
+        render.tempos_quadro.clear()
+        percorrer(janela, app, args.camadas, args.voltas)
+        est = render.estatisticas_quadros()
+        status = "ok" if est['fps'] >= 30 else "ABAIXO DE 30 FPS"
+        print(f"{modo}: {est['quadros']} quadros, média {est['media_ms']:.2f} ms, "
+              f"p95 {est['p95_ms']:.2f} ms, máx {est['max_ms']:.1f} ms -> {est['fps']:.0f} FPS [{status}]")
+
+
+if __name__ == "__main__":
+    main()
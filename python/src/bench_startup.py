@@ -0,0 +1,114 @@
+"""
+Mede o tempo de partida a frio de cada subcomando do cli.py e da GUI.
+
+Cada medida roda em um interpretador novo e importa exatamente os módulos
+que o subcomando carrega (cli.MODULOS). O custo por módulo vem de
+`python -X importtime`. Para a GUI também é medido o tempo até a primeira
+janela (`main.py --medir-partida`).
+
+Uso (a partir da raiz do repositório):
+    python python/src/bench_startup.py [--repeticoes 5]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from cli import MODULOS
+
+PASTA_SRC = os.path.dirname(os.path.abspath(__file__))
+# roda a partir da pasta atual (a GUI e o logger esperam ./tests), com src/ no path
+AMBIENTE = dict(os.environ, PYTHONPATH=PASTA_SRC)
+RE_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _codigo(modulos):
+    return "import cli; " + "; ".join(f"import {m}" for m in modulos)
+
+
+def medir_partida(modulos, repeticoes=5):
+    """
+    Tempo de parede (s) de um interpretador que importa `modulos`.
+
+    Returns:
+        list[float]: Uma medida por repetição.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, "-c", _codigo(modulos)],
+                       env=AMBIENTE, check=True, capture_output=True)
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def medir_primeira_janela(repeticoes=5):
+    """
+    Tempos (s) até a primeira janela e até o canvas pronto, informados pelo
+    próprio main.py. Sem display, usa a plataforma Qt "offscreen".
+
+    Returns:
+        tuple[list[float], list[float]]: (janela, canvas), uma medida por repetição.
+    """
+    ambiente = dict(AMBIENTE)
+    if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        ambiente.setdefault("QT_QPA_PLATFORM", "offscreen")
+    janela, canvas = [], []
+    for _ in range(repeticoes):
+        proc = subprocess.run([sys.executable, os.path.join(PASTA_SRC, "main.py"), "--medir-partida"],
+                              env=ambiente, check=True, capture_output=True, text=True)
+        m = re.search(r"primeira_janela_ms=([\d.]+) canvas_ms=([\d.]+)", proc.stdout)
+        janela.append(float(m.group(1)) / 1000)
+        canvas.append(float(m.group(2)) / 1000)
+    return janela, canvas
+
+
+def maiores_importacoes(modulos, n=5):
+    """
+    Módulos de topo com maior tempo acumulado segundo `-X importtime`.
+
+    Returns:
+        list[tuple[str, float]]: (módulo, ms acumulados), do maior para o menor.
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _codigo(modulos)],
+                          env=AMBIENTE, check=True, capture_output=True, text=True)
+    topo = []
+    for linha in proc.stderr.splitlines():
+        m = RE_IMPORTTIME.match(linha)
+        if m and len(m.group(3)) == 1:  # só importações de primeiro nível
+            topo.append((m.group(4), int(m.group(2)) / 1000))
+    return sorted(topo, key=lambda t: t[1], reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    casos = dict(MODULOS)
+    casos["gui (main)"] = ("main",)
+
+    print(f"{'subcomando':<14}{'mediana (ms)':>14}{'mín (ms)':>10}   maiores importações")
+    for nome, modulos in casos.items():
+        try:
+            tempos = medir_partida(modulos, args.repeticoes)
+        except subprocess.CalledProcessError:
+            print(f"{nome:<14}{'falhou':>14}")
+            continue
+        topo = ", ".join(f"{m} {ms:.0f}ms" for m, ms in maiores_importacoes(modulos, 3))
+        print(f"{nome:<14}{statistics.median(tempos)*1000:>14.0f}{min(tempos)*1000:>10.0f}   {topo}")
+
+    try:
+        janela, canvas = medir_primeira_janela(args.repeticoes)
+    except (subprocess.CalledProcessError, AttributeError):
+        print(f"{'gui (janela)':<14}{'falhou':>14}")
+    else:
+        print(f"{'gui (janela)':<14}{statistics.median(janela)*1000:>14.0f}{min(janela)*1000:>10.0f}   tempo até a primeira janela")
+        print(f"{'gui (canvas)':<14}{statistics.median(canvas)*1000:>14.0f}{min(canvas)*1000:>10.0f}   tempo até a visualização 3D pronta")
+
+
+if __name__ == "__main__":
+    main()
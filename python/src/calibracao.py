@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from logger_setup import logger
+
+def raio_calibrado(distancias, dist_sensor, alin_horizontal, escala):
+    """
+    Aplica o modelo de calibração de `reconstruir_pontos` a um array de distâncias.
+
+    Args:
+        distancias (np.ndarray): Distâncias brutas do sensor (mm), NaN para falhas.
+        dist_sensor (float): Distância do sensor ao eixo de rotação (mm).
+        alin_horizontal (float): Desalinhamento horizontal do sensor (mm).
+        escala (float): Fator de escala.
+
+    Returns:
+        np.ndarray: Raio de cada ponto em relação ao eixo (mm).
+    """
+    return np.sqrt((dist_sensor - distancias)**2 + alin_horizontal**2) * escala
+
+
+def erro_quadrado(parametros, angulos, distancias, alin_horizontal, tamanho):
+    """
+    Erro quadrático entre largura/altura reconstruídas e o lado do quadrado.
+
+    Args:
+        parametros (list): [dist_sensor, escala] em teste.
+        angulos (np.ndarray): Ângulos das medições (rad).
+        distancias (np.ndarray): Distâncias válidas (mm).
+        alin_horizontal (float): Desalinhamento horizontal fixo (mm).
+        tamanho (float): Lado do quadrado de calibração (mm).
+
+    Returns:
+        float: Soma dos erros quadráticos de largura e altura.
+    """
+    dist_sensor, escala = parametros
+    raio = raio_calibrado(distancias, dist_sensor, alin_horizontal, escala)
+    xs = raio * np.cos(angulos)
+    ys = raio * np.sin(angulos)
+    largura = xs.max() - xs.min()
+    altura = ys.max() - ys.min()
+    return (largura - tamanho)**2 + (altura - tamanho)**2
+
+
+def calibrar(arquivo_csv, tamanho, alin_horizontal, dist_sensor_inicial, escala_inicial):
+    """
+    Estima `dist_sensor` e `escala` a partir da varredura de um quadrado
+    de lado conhecido centrado na base.
+
+    Args:
+        arquivo_csv (str): CSV bruto (Camada, Ponto, Angulo_rad, Distancia_mm).
+        tamanho (float): Lado do quadrado de calibração (mm).
+        alin_horizontal (float): Desalinhamento horizontal, mantido fixo (mm).
+        dist_sensor_inicial (float): Estimativa inicial de dist_sensor (mm).
+        escala_inicial (float): Estimativa inicial do fator de escala.
+
+    Returns:
+        dict: {'dist_sensor', 'escala', 'alin_horizontal', 'erro', 'dimensoes'}
+    """
+    df = pd.read_csv(arquivo_csv)
+    df = df.dropna(subset=['Distancia_mm'])
+    if df.empty:
+        raise ValueError("CSV sem medições válidas")
+
+    angulos = df['Angulo_rad'].to_numpy(dtype=float)
+    distancias = df['Distancia_mm'].to_numpy(dtype=float)
+
+    resultado = minimize(
+        fun=erro_quadrado,
+        x0=[dist_sensor_inicial, escala_inicial],
+        args=(angulos, distancias, alin_horizontal, tamanho),
+        method='Nelder-Mead'
+    )
+    if not resultado.success:
+        raise RuntimeError(f"Falha na calibração: {resultado.message}")
+
+    dist_sensor, escala = resultado.x
+    raio = raio_calibrado(distancias, dist_sensor, alin_horizontal, escala)
+    xs = raio * np.cos(angulos)
+    ys = raio * np.sin(angulos)
+    dimensoes = (xs.max() - xs.min(), ys.max() - ys.min())
+
+    logger.info(f"Calibração: dist_sensor={dist_sensor:.2f} mm, escala={escala:.4f}, "
+                f"dimensões={dimensoes[0]:.1f} x {dimensoes[1]:.1f} mm")
+    return {
+        'dist_sensor': float(dist_sensor),
+        'escala': float(escala),
+        'alin_horizontal': float(alin_horizontal),
+        'erro': float(resultado.fun),
+        'dimensoes': (float(dimensoes[0]), float(dimensoes[1])),
+    }
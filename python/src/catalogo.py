@@ -0,0 +1,509 @@
+"""
+Catálogo local (SQLite) das varreduras e dos arquivos derivados.
+
+Cada varredura bruta (CSV com Distancia_mm) vira uma linha em `varreduras`,
+com projeto, data, parâmetros de aquisição, calibração, firmware, contagem
+de amostras e falhas (TIMEOUT) e o hash do arquivo; os derivados
+(<csv>_cart.csv, _passeN.csv, _link.json, _previa.stl, STLs exportados...)
+vão para `artefatos`. Os parâmetros que não dá para tirar do CSV ficam em
+<csv>_meta.json, gravado no fim da varredura (ver registrar_varredura).
+
+O catálogo é atualizado incrementalmente pela interface e pela CLI quando
+uma varredura ou artefato é gravado, e `reindexar` percorre pastas
+existentes refazendo só os arquivos cujo tamanho ou data mudaram. As
+consultas usam índices, por exemplo:
+
+    Catalogo().buscar(projeto="peca", pts_por_camada=128, falhas_min_pct=2)
+
+O arquivo fica em tests/catalogo.sqlite (ou SCANNER_CATALOGO).
+"""
+import hashlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from logger_setup import logger
+
+CAMINHO_PADRAO = os.environ.get("SCANNER_CATALOGO", "tests/catalogo.sqlite")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS varreduras (
+    id INTEGER PRIMARY KEY,
+    caminho TEXT UNIQUE NOT NULL,
+    projeto TEXT,
+    data TEXT,
+    pts_por_camada INTEGER,
+    camadas INTEGER,
+    altura_camada REAL,
+    passos_por_volta INTEGER,
+    passos_por_camada INTEGER,
+    dist_sensor REAL,
+    alin_horizontal REAL,
+    escala REAL,
+    firmware TEXT,
+    modo TEXT,
+    amostras INTEGER,
+    falhas INTEGER,
+    falhas_pct REAL,
+    concluida INTEGER,
+    hash TEXT,
+    tamanho INTEGER,
+    mtime REAL,
+    metadados TEXT,
+    indexado_em TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_varreduras_projeto ON varreduras (projeto, data);
+CREATE INDEX IF NOT EXISTS idx_varreduras_pts ON varreduras (pts_por_camada, falhas_pct);
+CREATE INDEX IF NOT EXISTS idx_varreduras_falhas ON varreduras (falhas_pct);
+
+CREATE TABLE IF NOT EXISTS artefatos (
+    id INTEGER PRIMARY KEY,
+    varredura_id INTEGER REFERENCES varreduras (id) ON DELETE CASCADE,
+    caminho TEXT UNIQUE NOT NULL,
+    tipo TEXT,
+    hash TEXT,
+    tamanho INTEGER,
+    mtime REAL,
+    indexado_em TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_artefatos_varredura ON artefatos (varredura_id);
+"""
+
+_DATA_NO_NOME = re.compile(r"(\d{8}_\d{6})")
+EXTENSOES_ARTEFATO = (".csv", ".stl", ".json", ".scnt")
+
+
+# ==================================================
+# ARQUIVOS
+# ==================================================
+
+def hash_arquivo(caminho, bloco=1 << 20):
+    """SHA-256 do arquivo (hex)."""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for pedaco in iter(lambda: f.read(bloco), b""):
+            h.update(pedaco)
+    return h.hexdigest()
+
+
+def caminho_metadados(arquivo_csv):
+    return os.path.splitext(arquivo_csv)[0] + "_meta.json"
+
+
+def salvar_metadados(arquivo_csv, metadados):
+    """Grava <csv>_meta.json com os parâmetros da aquisição."""
+    with open(caminho_metadados(arquivo_csv), "w", encoding="utf-8") as f:
+        json.dump(metadados, f, indent=2, default=str)
+
+
+def ler_metadados(arquivo_csv):
+    try:
+        with open(caminho_metadados(arquivo_csv), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def eh_varredura_bruta(caminho):
+    """CSV de medições brutas: tem Distancia_mm no cabeçalho e não é um derivado."""
+    if not caminho.lower().endswith(".csv"): return False
+    try:
+        with open(caminho, encoding="utf-8", errors="ignore") as f:
+            cabecalho = f.readline()
+    except OSError:
+        return False
+    return "Distancia_mm" in cabecalho and "X_mm" not in cabecalho and not re.search(r"_passe\d+\.csv$", caminho)
+
+
+def estatisticas_csv(arquivo_csv):
+    """
+    Amostras, falhas (leituras vazias/TIMEOUT), camadas e pontos por camada de um CSV bruto.
+
+    Returns:
+        dict: amostras, falhas, falhas_pct, camadas, pts_por_camada
+    """
+    import pandas as pd
+
+    df = pd.read_csv(arquivo_csv, usecols=lambda c: c in ("Camada", "Ponto", "Passo", "Distancia_mm"))
+    distancias = pd.to_numeric(df["Distancia_mm"], errors="coerce")
+    amostras = len(df)
+    falhas = int(distancias.isna().sum())
+    if amostras == 0:
+        pts_por_camada = None
+    elif "Ponto" in df.columns or "Passo" in df.columns:  # CSVs antigos chamam a coluna de Passo
+        pts_por_camada = int(df["Ponto" if "Ponto" in df.columns else "Passo"].max()) + 1
+    else:
+        pts_por_camada = int(df["Camada"].value_counts().max())
+    return {
+        "amostras": amostras,
+        "falhas": falhas,
+        "falhas_pct": 100.0 * falhas / amostras if amostras else 0.0,
+        "camadas": int(df["Camada"].nunique()),
+        "pts_por_camada": pts_por_camada,
+    }
+
+
+def tipo_artefato(caminho):
+    """Tipo do derivado a partir do nome: cart, passe, link, meta, previa, desvio, stl, transcricao..."""
+    nome = os.path.basename(caminho).lower()
+    for sufixo, tipo in (("_cart.csv", "cart"), ("_link.json", "link"), ("_meta.json", "meta"),
+                         ("_previa.stl", "previa"), ("_registro.csv", "registro"),
+                         ("_desvio.csv", "desvio"), ("_metricas.csv", "metricas")):
+        if nome.endswith(sufixo): return tipo
+    if re.search(r"_passe\d+\.(csv|stl)$", nome): return "passe"
+    return {".stl": "stl", ".scnt": "transcricao", ".json": "json", ".csv": "csv"}.get(os.path.splitext(nome)[1])
+
+
+def _escapar_like(texto):
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _data_varredura(caminho, metadados):
+    if metadados.get("data"): return metadados["data"]
+    achado = _DATA_NO_NOME.search(os.path.basename(caminho))
+    if achado:
+        try:
+            return datetime.strptime(achado.group(1), "%Y%m%d_%H%M%S").isoformat()
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(os.path.getmtime(caminho)).isoformat()
+
+
+# ==================================================
+# CATÁLOGO
+# ==================================================
+
+class Catalogo:
+    """
+    Conexão com o catálogo. Cada thread deve usar a sua instância
+    (o ReindexadorSegundoPlano abre a dele).
+    """
+    def __init__(self, caminho=None):
+        caminho = caminho or CAMINHO_PADRAO
+        pasta = os.path.dirname(caminho)
+        if pasta: os.makedirs(pasta, exist_ok=True)
+        self.caminho = caminho
+        self.con = sqlite3.connect(caminho, timeout=10)
+        self.con.row_factory = sqlite3.Row
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute("PRAGMA foreign_keys=ON")
+        self.con.executescript(ESQUEMA)
+
+    def fechar(self):
+        self.con.close()
+
+    @staticmethod
+    def _chave(caminho):
+        return os.path.normpath(os.path.abspath(caminho))
+
+    def registrar_varredura(self, arquivo_csv, metadados=None):
+        """
+        Indexa (ou atualiza) uma varredura bruta. Com `metadados`, grava
+        também o <csv>_meta.json ao lado, para que reindexações futuras
+        recuperem os parâmetros.
+
+        Args:
+            metadados (dict): projeto, pts_por_camada, altura_camada, passos_por_volta,
+                passos_por_camada, dist_sensor, alin_horizontal, escala, firmware,
+                modo, concluida... (o que não couber em colunas fica no JSON)
+
+        Returns:
+            int: id da varredura
+        """
+        if metadados:
+            salvar_metadados(arquivo_csv, metadados)
+        meta = ler_metadados(arquivo_csv)
+        estat = estatisticas_csv(arquivo_csv)
+        projeto = meta.get("projeto") or os.path.basename(os.path.dirname(os.path.abspath(arquivo_csv)))
+        stat = os.stat(arquivo_csv)
+        linha = {
+            "caminho": self._chave(arquivo_csv),
+            "projeto": projeto,
+            "data": _data_varredura(arquivo_csv, meta),
+            "pts_por_camada": meta.get("pts_por_camada") or estat["pts_por_camada"],
+            "camadas": estat["camadas"],
+            "altura_camada": meta.get("altura_camada"),
+            "passos_por_volta": meta.get("passos_por_volta"),
+            "passos_por_camada": meta.get("passos_por_camada"),
+            "dist_sensor": meta.get("dist_sensor"),
+            "alin_horizontal": meta.get("alin_horizontal"),
+            "escala": meta.get("escala"),
+            "firmware": meta.get("firmware"),
+            "modo": meta.get("modo"),
+            "amostras": estat["amostras"],
+            "falhas": estat["falhas"],
+            "falhas_pct": estat["falhas_pct"],
+            "concluida": None if meta.get("concluida") is None else int(bool(meta["concluida"])),
+            "hash": hash_arquivo(arquivo_csv),
+            "tamanho": stat.st_size,
+            "mtime": stat.st_mtime,
+            "metadados": json.dumps(meta, default=str),
+            "indexado_em": datetime.now().isoformat(),
+        }
+        colunas = ", ".join(linha)
+        valores = ", ".join(f":{c}" for c in linha)
+        atualizar = ", ".join(f"{c}=excluded.{c}" for c in linha if c != "caminho")
+        with self.con:
+            self.con.execute(f"INSERT INTO varreduras ({colunas}) VALUES ({valores}) "
+                             f"ON CONFLICT(caminho) DO UPDATE SET {atualizar}", linha)
+            id_varredura = self.con.execute("SELECT id FROM varreduras WHERE caminho = ?",
+                                            (linha["caminho"],)).fetchone()[0]
+            # derivados gravados antes da varredura entrar no catálogo (<csv>_*.* e <csv>.stl etc.),
+            # ou ligados a uma varredura de nome mais curto que também é prefixo (scan_1 x scan_1_2)
+            raiz = _escapar_like(os.path.splitext(linha["caminho"])[0])
+            self.con.execute("UPDATE artefatos SET varredura_id = ? WHERE (varredura_id IS NULL OR varredura_id IN "
+                             "(SELECT id FROM varreduras WHERE length(caminho) < ?)) "
+                             "AND (caminho LIKE ? ESCAPE '\\' OR caminho LIKE ? ESCAPE '\\')",
+                             (id_varredura, len(linha["caminho"]), raiz + "\\_%", raiz + ".%"))
+        return id_varredura
+
+    def _origem(self, caminho):
+        """
+        Varredura da mesma pasta cujo nome é prefixo do derivado (<csv>_sufixo.ext
+        ou <csv>.ext); entre várias (scan_1 e scan_1_2), a de nome mais longo.
+        """
+        base = self._chave(caminho)
+        pasta = os.path.dirname(base)
+        id_varredura, maior = None, -1
+        for linha in self.con.execute("SELECT id, caminho FROM varreduras WHERE caminho LIKE ? ESCAPE '\\'",
+                                      (_escapar_like(pasta + os.sep) + "%",)):
+            raiz = os.path.splitext(linha["caminho"])[0]
+            if (base.startswith(raiz + "_") or os.path.splitext(base)[0] == raiz) and len(raiz) > maior:
+                id_varredura, maior = linha["id"], len(raiz)
+        return id_varredura
+
+    def registrar_artefato(self, caminho, origem=None, tipo=None):
+        """
+        Indexa um arquivo derivado.
+
+        Args:
+            origem (str): CSV bruto de onde veio (indexado antes, se ainda não
+                estiver no catálogo); sem ele, é procurado pelo nome.
+
+        Returns:
+            int: id do artefato
+        """
+        id_varredura = None
+        if origem is not None:
+            achado = self.con.execute("SELECT id FROM varreduras WHERE caminho = ?", (self._chave(origem),)).fetchone()
+            if achado:
+                id_varredura = achado[0]
+            elif os.path.isfile(origem):
+                try:
+                    id_varredura = self.registrar_varredura(origem)
+                except Exception as e:
+                    logger.warning(f"Catálogo: não foi possível indexar a origem {origem}: {e}")
+        if id_varredura is None:
+            id_varredura = self._origem(caminho)
+        stat = os.stat(caminho)
+        linha = (id_varredura, self._chave(caminho), tipo or tipo_artefato(caminho), hash_arquivo(caminho),
+                 stat.st_size, stat.st_mtime, datetime.now().isoformat())
+        with self.con:
+            self.con.execute(
+                "INSERT INTO artefatos (varredura_id, caminho, tipo, hash, tamanho, mtime, indexado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(caminho) DO UPDATE SET "
+                "varredura_id=COALESCE(excluded.varredura_id, varredura_id), tipo=excluded.tipo, "
+                "hash=excluded.hash, tamanho=excluded.tamanho, mtime=excluded.mtime, "
+                "indexado_em=excluded.indexado_em", linha)
+            return self.con.execute("SELECT id FROM artefatos WHERE caminho = ?", (linha[1],)).fetchone()[0]
+
+    def buscar(self, projeto=None, pts_por_camada=None, falhas_min_pct=None, falhas_max_pct=None,
+               desde=None, ate=None, firmware=None, hash=None, limite=None):
+        """
+        Varreduras que atendem a todos os filtros dados, da mais recente para a mais antiga.
+
+        Args:
+            desde, ate (str): Datas ISO (ex.: "2025-08-01"); `ate` inclui o dia inteiro.
+
+        Returns:
+            list: dicts com as colunas de `varreduras`
+        """
+        filtros, valores = [], []
+        for condicao, valor in (("projeto = ?", projeto), ("pts_por_camada = ?", pts_por_camada),
+                                ("falhas_pct > ?", falhas_min_pct), ("falhas_pct <= ?", falhas_max_pct),
+                                ("data >= ?", desde), ("data < ?", None if ate is None else ate + "\uffff"),
+                                ("firmware = ?", firmware),
+                                ("hash = ?", hash)):
+            if valor is not None:
+                filtros.append(condicao)
+                valores.append(valor)
+        sql = "SELECT * FROM varreduras"
+        if filtros: sql += " WHERE " + " AND ".join(filtros)
+        sql += " ORDER BY data DESC"
+        if limite: sql += f" LIMIT {int(limite)}"
+        return [dict(linha) for linha in self.con.execute(sql, valores)]
+
+    def artefatos(self, id_varredura):
+        return [dict(linha) for linha in
+                self.con.execute("SELECT * FROM artefatos WHERE varredura_id = ? ORDER BY caminho", (id_varredura,))]
+
+    def reindexar(self, pasta="tests", parar=None):
+        """
+        Percorre `pasta` e atualiza o catálogo: arquivos novos ou alterados
+        (tamanho/data) são indexados, os que sumiram são removidos.
+
+        Args:
+            parar (threading.Event): Opcional; interrompe entre arquivos.
+
+        Returns:
+            dict: novos, atualizados, removidos, inalterados
+        """
+        conhecidos = {}
+        for tabela in ("varreduras", "artefatos"):
+            for linha in self.con.execute(f"SELECT caminho, tamanho, mtime FROM {tabela}"):
+                conhecidos[linha["caminho"]] = (tabela, linha["tamanho"], linha["mtime"])
+
+        varreduras, artefatos = [], []
+        for raiz, _, arquivos in os.walk(pasta):
+            for nome in arquivos:
+                if nome.lower().endswith(EXTENSOES_ARTEFATO):
+                    caminho = os.path.join(raiz, nome)
+                    (varreduras if eh_varredura_bruta(caminho) else artefatos).append(caminho)
+
+        contagem = {"novos": 0, "atualizados": 0, "removidos": 0, "inalterados": 0}
+        vistos = set()
+        # varreduras primeiro, para os artefatos acharem a origem
+        for caminho, registrar in [(c, self.registrar_varredura) for c in varreduras] + \
+                                  [(c, self.registrar_artefato) for c in artefatos]:
+            if parar is not None and parar.is_set(): return contagem
+            chave = self._chave(caminho)
+            vistos.add(chave)
+            try:
+                stat = os.stat(caminho)
+                anterior = conhecidos.get(chave)
+                if anterior and anterior[1] == stat.st_size and anterior[2] == stat.st_mtime:
+                    contagem["inalterados"] += 1
+                    continue
+                registrar(caminho)
+                contagem["atualizados" if anterior else "novos"] += 1
+            except Exception as e:
+                logger.warning(f"Catálogo: não foi possível indexar {caminho}: {e}")
+
+        raiz = self._chave(pasta)
+        sumidos = [c for c in conhecidos if c.startswith(raiz + os.sep) and c not in vistos]
+        with self.con:
+            for caminho in sumidos:
+                tabela = conhecidos[caminho][0]
+                self.con.execute(f"DELETE FROM {tabela} WHERE caminho = ?", (caminho,))
+        contagem["removidos"] = len(sumidos)
+        return contagem
+
+
+class ReindexadorSegundoPlano(threading.Thread):
+    """
+    Thread com a própria conexão: reindexa `pastas` ao iniciar e a cada
+    `intervalo_s`, e grava os registros enfileirados pela interface
+    (varredura(...) e artefato(...)) sem bloquear a thread da UI.
+    """
+    def __init__(self, pastas=("tests",), caminho=CAMINHO_PADRAO, intervalo_s=300.0):
+        super().__init__(name="catalogo", daemon=True)
+        self.pastas = pastas
+        self.caminho = caminho
+        self.intervalo_s = intervalo_s
+        self.fila = queue.Queue()
+        self.evento_parar = threading.Event()
+
+    def varredura(self, arquivo_csv, metadados=None):
+        self.fila.put(("registrar_varredura", arquivo_csv, metadados))
+
+    def artefato(self, caminho, origem=None):
+        self.fila.put(("registrar_artefato", caminho, origem))
+
+    def parar(self):
+        self.evento_parar.set()
+        self.fila.put(None)
+
+    def run(self):
+        catalogo = Catalogo(self.caminho)
+        proxima = 0.0
+        try:
+            while not self.evento_parar.is_set():
+                if time.monotonic() >= proxima:
+                    inicio = time.perf_counter()
+                    for pasta in self.pastas:
+                        if os.path.isdir(pasta):
+                            contagem = catalogo.reindexar(pasta, self.evento_parar)
+                            logger.debug("Catálogo: %s em %s (%.2f s)", contagem, pasta,
+                                         time.perf_counter() - inicio)
+                    proxima = time.monotonic() + self.intervalo_s
+                try:
+                    tarefa = self.fila.get(timeout=max(0.0, proxima - time.monotonic()))
+                except queue.Empty:
+                    continue
+                if tarefa is None: break
+                metodo, *args = tarefa
+                try:
+                    getattr(catalogo, metodo)(*args)
+                except Exception as e:
+                    logger.warning(f"Catálogo: falha em {metodo}{tuple(args[:1])}: {e}")
+        finally:
+            catalogo.fechar()
+
+
+if __name__ == "__main__":
+    # Catálogo de pastas reais geradas: CSV bruto, _meta.json e derivados de cada varredura,
+    # indexados por reindexar (leitura do CSV, hash, stat), e depois só os que mudaram
+    import random
+    import tempfile
+
+    n_varreduras = 1000
+    with tempfile.TemporaryDirectory() as pasta:
+        random.seed(0)
+        inicio = time.perf_counter()
+        for i in range(n_varreduras):
+            pts = random.choice((64, 128, 256))
+            projeto = os.path.join(pasta, f"projeto{i % 50}")
+            os.makedirs(projeto, exist_ok=True)
+            csv = os.path.join(projeto, f"scan_2025{1 + i % 12:02d}{1 + i % 28:02d}_{i:06d}.csv")
+            with open(csv, "w", encoding="utf-8") as f:
+                f.write("Camada,Ponto,Angulo_rad,Distancia_mm\n")
+                taxa = random.random() * 0.05
+                for camada in range(30):
+                    for ponto in range(pts):
+                        d = "" if random.random() < taxa else f"{60 + random.random():.2f}"
+                        f.write(f"{camada + 1},{ponto},{6.283185 * ponto / pts:.6f},{d}\n")
+            salvar_metadados(csv, {"pts_por_camada": pts, "altura_camada": 2.0, "firmware": "1.2", "concluida": True})
+            with open(csv[:-4] + "_cart.csv", "w") as f:
+                f.write("Camada,X_mm,Y_mm,Z_mm\n1,0,0,0\n")
+            with open(csv[:-4] + "_previa.stl", "wb") as f:
+                f.write(os.urandom(84 + 50 * 64))
+        print(f"{n_varreduras} varreduras ({4 * n_varreduras} arquivos) geradas em {time.perf_counter() - inicio:.1f} s")
+
+        catalogo = Catalogo(os.path.join(pasta, "catalogo.sqlite"))
+        for rotulo in ("indexação completa", "sem mudanças"):
+            inicio = time.perf_counter()
+            contagem = catalogo.reindexar(pasta)
+            print(f"reindexar ({rotulo}): {contagem} em {time.perf_counter() - inicio:.2f} s")
+        for csv in random.sample([v["caminho"] for v in catalogo.buscar()], n_varreduras // 100):
+            with open(csv, "a", encoding="utf-8") as f:
+                f.write("31,0,0.0,60.00\n")
+        inicio = time.perf_counter()
+        contagem = catalogo.reindexar(pasta)
+        print(f"reindexar (1% alterado): {contagem} em {time.perf_counter() - inicio:.2f} s")
+
+        inicio = time.perf_counter()
+        achadas = catalogo.buscar(projeto="projeto7", pts_por_camada=128, falhas_min_pct=2)
+        print(f"projeto7, 128 pts, > 2% de falhas: {len(achadas)} varreduras em "
+              f"{(time.perf_counter() - inicio) * 1000:.2f} ms")
+
+        # derivado de uma origem ainda não indexada, com outra varredura cujo nome é prefixo do dela
+        projeto = os.path.join(pasta, "prefixos")
+        os.makedirs(projeto)
+        curta, longa = os.path.join(projeto, "scan_1.csv"), os.path.join(projeto, "scan_1_2.csv")
+        for csv in (curta, longa):
+            with open(csv, "w", encoding="utf-8") as f:
+                f.write("Camada,Ponto,Angulo_rad,Distancia_mm\n1,0,0.0,60.00\n")
+        id_curta = catalogo.registrar_varredura(curta)
+        derivado = os.path.join(projeto, "scan_1_2_cart.csv")
+        with open(derivado, "w") as f:
+            f.write("Camada,X_mm,Y_mm,Z_mm\n1,0,0,0\n")
+        id_artefato = catalogo.registrar_artefato(derivado, origem=longa)
+        id_longa = catalogo.registrar_varredura(longa)
+        ligado = catalogo.con.execute("SELECT varredura_id FROM artefatos WHERE id = ?", (id_artefato,)).fetchone()[0]
+        print(f"scan_1_2_cart.csv ligado a scan_1_2: {ligado == id_longa} (scan_1: {ligado == id_curta})")
+        catalogo.fechar()
@@ -0,0 +1,484 @@
+"""
+Interface de linha de comando do scanner (sem Qt/matplotlib).
+
+Cada subcomando importa apenas os módulos de que precisa, para que
+rotinas em lote no servidor não paguem o custo de importação da GUI.
+
+Uso:
+    python cli.py scan --porta COM7 --projeto peca
+    python cli.py scan --porta COM7 --projeto peca --sigma-alvo 1.0
+    python cli.py scan --porta COM7 --projeto peca --vel-base 600 --aceleracao 1000
+    python cli.py tune --porta COM7 --eixo BASE --aceleracao 1000
+    python cli.py reconstruct tests/peca/20250828_162943.csv
+    python cli.py reconstruct tests/peca/20250828_162943.csv --registrar
+    python cli.py export tests/peca/20250828_162943.csv -o peca.stl
+    python cli.py calibrate tests/calibracao/quadrado.csv --tamanho 80
+    python cli.py qc tests/peca/20250828_162943.csv peca_nominal.stl --tolerancia 0.5
+    python cli.py metrics tests/peca/20250828_162943.csv --z 12.5 --z 40
+    python cli.py metrics peca_nominal.stl --z 12.5
+    python cli.py catalog index tests
+    python cli.py catalog find --projeto peca --pts 128 --falhas-min 2
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from parametros import parametros_padrao
+
+# Módulos carregados por cada subcomando (usado também pelo bench_startup)
+MODULOS = {
+    "scan": ("scanner",),
+    "tune": ("scanner",),
+    "reconstruct": ("reconstrucao",),
+    "export": ("reconstrucao", "exportar_stl"),
+    "calibrate": ("calibracao",),
+    "catalog": ("catalogo",),
+    "qc": ("reconstrucao", "controle_qualidade"),
+    "metrics": ("reconstrucao", "metricas"),
+}
+
+
+def _args_movimento(parser):
+    parser.add_argument("--vel-base", type=int, default=parametros_padrao["vel_base"], help="passos/s")
+    parser.add_argument("--vel-elev", type=int, default=parametros_padrao["vel_elev"], help="passos/s")
+    parser.add_argument("--aceleracao", type=int, default=parametros_padrao["aceleracao"],
+                        help="passos/s² da rampa dos motores (0 = sem rampa; firmware >= 1.3)")
+
+
+def _movimento(args):
+    return {"BASE": (args.vel_base, args.aceleracao), "ELEV": (args.vel_elev, args.aceleracao)}
+
+
+def _args_calibracao(parser):
+    parser.add_argument("--altura-inicial", type=float, default=0)
+    parser.add_argument("--altura-camada", type=float, default=parametros_padrao["altura_camada"])
+    parser.add_argument("--dist-sensor", type=float, default=parametros_padrao["dist_sensor"])
+    parser.add_argument("--alin-hor", type=float, default=parametros_padrao["alin_hor"])
+    parser.add_argument("--escala", type=float, default=parametros_padrao["escala"])
+    parser.add_argument("--suavizacao", type=int, default=parametros_padrao["suavizacao"])
+    parser.add_argument("--registrar", action="store_true",
+                        help="corrige rotação/deslocamento entre camadas (folga e truncamento de passos)")
+    parser.add_argument("--passos-por-volta", type=int, default=parametros_padrao["passos_por_volta"],
+                        help="passos por volta da base na aquisição (deriva de truncamento)")
+    parser.add_argument("--compacto", action="store_true",
+                        help="leituras em uint16/32 bits e pontos em float32 (metade da memória)")
+
+
+def _reconstruir(args):
+    from reconstrucao import reconstruir_pontos, suavizar_pontos
+
+    pontos = reconstruir_pontos(
+        arquivo_csv=args.csv,
+        altura_inicial=args.altura_inicial,
+        altura_camada=args.altura_camada,
+        dist_sensor=args.dist_sensor,
+        alin_horizontal=args.alin_hor,
+        escala=args.escala,
+        compacto=args.compacto
+    )
+    if args.registrar:
+        from registro_camadas import registrar_camadas, passos_para_deriva
+        pontos, transformacoes = registrar_camadas(
+            pontos, passos_por_volta=passos_para_deriva(args.csv, args.passos_por_volta))
+        saida = args.csv.replace(".csv", "_registro.csv")
+        transformacoes.to_csv(saida, index=False)
+        _catalogar("registrar_artefato", saida, args.csv)
+    return suavizar_pontos(pontos, args.suavizacao)
+
+
+def _malha_previa(arquivo_csv, indice, salto_camada, salto_ponto, altura_camada):
+    """STL de prévia com as leituras da subgrade de um passe já concluído."""
+    import pandas as pd
+    from reconstrucao import reconstruir_dataframe, filtrar_grade
+    from exportar_stl import dataframe_para_stl
+
+    df = filtrar_grade(pd.read_csv(arquivo_csv), salto_camada, salto_ponto)
+    pontos = reconstruir_dataframe(df, 0, altura_camada, parametros_padrao["dist_sensor"],
+                                   parametros_padrao["alin_hor"], parametros_padrao["escala"])
+    saida = arquivo_csv.replace(".csv", f"_passe{indice}.stl")
+    dataframe_para_stl(pontos, saida)
+    print(saida, flush=True)
+
+
+def _catalogar(metodo, *args, **kwargs):
+    """Atualiza o catálogo de varreduras; uma falha nele não derruba o comando."""
+    try:
+        from catalogo import Catalogo
+        catalogo = Catalogo()
+        try:
+            getattr(catalogo, metodo)(*args, **kwargs)
+        finally:
+            catalogo.fechar()
+    except Exception as e:
+        print(f"[AVISO] Catálogo não atualizado: {e}", file=sys.stderr)
+
+
+def cmd_scan(args):
+    from scanner import conectar_serial, iniciar_arduino, executar_varredura, preparar_movimento, preparar_sensor
+
+    camadas = -(-args.altura_max // args.altura_camada)  # teto inteiro
+    passos_por_camada = int(args.passos_por_volta * (args.altura_camada / args.altura_volta))
+
+    pasta_destino = os.path.join(args.pasta, args.projeto)
+    os.makedirs(pasta_destino, exist_ok=True)
+    arquivo_csv = os.path.join(pasta_destino, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    if args.continuar:
+        arquivo_csv = args.continuar  # a varredura multirresolução pula o que já foi medido
+
+    amostragem = None
+    if args.adaptativo:
+        from amostragem_adaptativa import AmostragemAdaptativa
+        amostragem = AmostragemAdaptativa(args.pts, fracao=args.fracao, tolerancia_mm=args.tolerancia)
+
+    medicao = None
+    if args.leituras:
+        from medicao_robusta import MedicaoRobusta
+        medicao = MedicaoRobusta(args.leituras[0], args.leituras[1], args.erro_alvo, metodo=args.agregacao)
+
+    ser = conectar_serial(args.porta, args.baudrate, gravar=args.gravar)
+    if ser is None:
+        return 1
+    modo = "multirresolucao" if args.multirresolucao else "adaptativa" if args.adaptativo else "uniforme"
+    try:
+        firmware = iniciar_arduino(ser)
+        movimento = preparar_movimento(ser, _movimento(args), firmware)
+        sensor = preparar_sensor(ser, args.perfil_sensor, args.orcamento_us, args.sigma_alvo)
+        if args.multirresolucao:
+            from scanner import executar_varredura_multirresolucao, passes_multirresolucao
+
+            passes = passes_multirresolucao(round(args.grosso_altura / args.altura_camada),
+                                            args.pts // (args.grosso_pts or max(1, args.pts // 4)))
+            concluida = executar_varredura_multirresolucao(
+                ser, arquivo_csv, args.pts, camadas, args.passos_por_volta, passos_por_camada, passes,
+                ao_concluir_passe=lambda i, sc, sp: _malha_previa(arquivo_csv, i, sc, sp, args.altura_camada),
+                medicao=medicao)
+        else:
+            concluida = executar_varredura(ser, arquivo_csv, args.pts, camadas,
+                               args.passos_por_volta, passos_por_camada,
+                               amostragem=amostragem, medicao=medicao)
+    finally:
+        ser.close()
+
+    _catalogar("registrar_varredura", arquivo_csv, {
+        "projeto": args.projeto, "data": datetime.now().isoformat(), "pts_por_camada": args.pts,
+        "camadas": camadas, "altura_camada": args.altura_camada, "passos_por_volta": args.passos_por_volta,
+        "passos_por_camada": passos_por_camada, "dist_sensor": parametros_padrao["dist_sensor"],
+        "alin_horizontal": parametros_padrao["alin_hor"], "escala": parametros_padrao["escala"],
+        "firmware": firmware, "modo": modo, "concluida": concluida, "porta": args.porta,
+        "leituras": args.leituras, "sensor": sensor, "movimento": movimento,
+    })
+    link = arquivo_csv.replace(".csv", "_link.json")
+    if os.path.exists(link):
+        _catalogar("registrar_artefato", link, arquivo_csv)
+    print(arquivo_csv)
+    return 0
+
+
+def _validar_scan(parser, args):
+    """Recusa combinações de opções que a varredura ignoraria ou que perderiam dados."""
+    if args.continuar and not args.multirresolucao:
+        parser.error("--continuar só retoma varreduras --multirresolucao (a uniforme regravaria o CSV)")
+    if args.multirresolucao and args.adaptativo:
+        parser.error("--adaptativo não se combina com --multirresolucao (a grade dos passes é fixa)")
+    if args.pts < 1:
+        parser.error("--pts deve ser ao menos 1")
+    if args.grosso_pts is not None and not 1 <= args.grosso_pts <= args.pts:
+        parser.error(f"--grosso-pts deve estar entre 1 e --pts ({args.pts})")
+    if args.leituras and not 1 <= args.leituras[0] <= args.leituras[1]:
+        parser.error("--leituras MIN MAX exige 1 <= MIN <= MAX")
+    if args.erro_alvo <= 0:
+        parser.error("--erro-alvo deve ser positivo")
+    if args.orcamento_us is not None and not 20000 <= args.orcamento_us <= 200000:
+        parser.error("--orcamento-us deve estar entre 20000 e 200000")
+
+
+def cmd_tune(args):
+    from scanner import conectar_serial, iniciar_arduino, preparar_movimento, ajustar_velocidade, VELOCIDADES_TESTE
+
+    ser = conectar_serial(args.porta, args.baudrate)
+    if ser is None:
+        return 1
+    try:
+        # o movimento de partida (--vel-base/--vel-elev) é o considerado seguro
+        preparar_movimento(ser, _movimento(args), iniciar_arduino(ser))
+        resultado = ajustar_velocidade(ser, args.eixo, velocidades=args.velocidades or VELOCIDADES_TESTE,
+                                       aceleracao=args.aceleracao_teste, excursao=args.excursao,
+                                       repeticoes=args.repeticoes, margem=args.margem, tolerancia_mm=args.tolerancia)
+    finally:
+        ser.close()
+
+    for medida in resultado["sondagem"]:
+        print(f"{medida['velocidade']:>6} passos/s  desvio {medida['desvio_mm']:.1f} mm")
+    limite = f"perdeu passos a {resultado['limite']} passos/s" if resultado["limite"] else "sem perdas"
+    print(f"{args.eixo}: {limite} (limiar {resultado['limiar_mm']:.1f} mm)")
+    print(f"--vel-{args.eixo.lower()} {resultado['velocidade']} --aceleracao {resultado['aceleracao']}")
+    return 0
+
+
+def cmd_reconstruct(args):
+    pontos = _reconstruir(args)
+    saida = args.saida or args.csv.replace(".csv", "_cart.csv")
+    pontos.to_csv(saida, index=False)
+    _catalogar("registrar_artefato", saida, args.csv)
+    print(saida)
+    return 0
+
+
+def cmd_export(args):
+    import pandas as pd
+    from exportar_stl import dataframe_para_stl
+
+    df = pd.read_csv(args.csv)
+    if {"X_mm", "Y_mm", "Z_mm"}.issubset(df.columns):
+        pontos = df  # CSV já reconstruído (_cart.csv)
+    else:
+        pontos = _reconstruir(args)
+
+    saida = args.saida or os.path.splitext(args.csv)[0] + ".stl"
+    dataframe_para_stl(pontos, saida, max_lacuna=args.max_lacuna, tampas=args.tampas,
+                       alvo_triangulos=args.alvo_triangulos, erro_max=args.erro_max)
+    _catalogar("registrar_artefato", saida, args.csv)
+    print(saida)
+    return 0
+
+
+def cmd_calibrate(args):
+    from calibracao import calibrar
+
+    resultado = calibrar(
+        args.csv,
+        tamanho=args.tamanho,
+        alin_horizontal=args.alin_hor,
+        dist_sensor_inicial=args.dist_sensor,
+        escala_inicial=args.escala
+    )
+    print(f"dist_sensor = {resultado['dist_sensor']:.3f} mm")
+    print(f"escala      = {resultado['escala']:.4f}")
+    print(f"alin_hor    = {resultado['alin_horizontal']:.3f} mm (fixo)")
+    print(f"dimensões   = {resultado['dimensoes'][0]:.1f} x {resultado['dimensoes'][1]:.1f} mm")
+    return 0
+
+
+def cmd_qc(args):
+    import pandas as pd
+    from controle_qualidade import comparar_com_referencia
+
+    df = pd.read_csv(args.csv)
+    if {"X_mm", "Y_mm", "Z_mm"}.issubset(df.columns):
+        pontos = df
+    else:
+        pontos = _reconstruir(args)
+
+    resultado = comparar_com_referencia(pontos, args.referencia, alinhar=not args.sem_alinhar,
+                                        tolerancia=args.tolerancia)
+    saida = args.saida or args.csv.replace("_cart.csv", ".csv").replace(".csv", "_desvio.csv")
+    pd.DataFrame({"Camada": pontos["Camada"].to_numpy(), "X_mm": pontos["X_mm"].to_numpy(),
+                  "Y_mm": pontos["Y_mm"].to_numpy(), "Z_mm": pontos["Z_mm"].to_numpy(),
+                  "Desvio_mm": resultado["desvios"]}).to_csv(saida, index=False)
+    _catalogar("registrar_artefato", saida, args.csv)
+    if args.perfil_camadas:
+        resultado["perfil"].to_csv(args.perfil_camadas, index=False)
+
+    for chave, valor in resultado["estatisticas"].items():
+        print(f"{chave:<16} {valor}")
+    print(saida)
+    return 0
+
+
+def cmd_metrics(args):
+    import pandas as pd
+    from metricas import (metricas_camadas, resumo_camadas, metricas_malha, fatiar_malha,
+                          ler_malha_stl)
+
+    if args.csv.lower().endswith(".stl"):
+        vertices, faces = ler_malha_stl(args.csv)
+        resumo = metricas_malha(vertices, faces)
+    else:
+        from exportar_stl import malha_cilindrica
+
+        df = pd.read_csv(args.csv)
+        pontos = df if {"X_mm", "Y_mm", "Z_mm"}.issubset(df.columns) else _reconstruir(args)
+        perfil = metricas_camadas(pontos, max_lacuna=args.max_lacuna)
+        resumo = resumo_camadas(perfil)
+        saida = args.saida or args.csv.replace("_cart.csv", ".csv").replace(".csv", "_metricas.csv")
+        perfil.to_csv(saida, index=False)
+        _catalogar("registrar_artefato", saida, args.csv)
+        print(saida)
+        if args.z:
+            vertices, faces = malha_cilindrica(pontos, max_lacuna=args.max_lacuna)
+
+    for chave, valor in resumo.items():
+        print(f"{chave:<20} {valor:.3f}" if isinstance(valor, float) else f"{chave:<20} {valor}")
+    if args.z:
+        print(fatiar_malha(vertices, faces, args.z).to_string(index=False))
+    return 0
+
+
+def cmd_catalog(args):
+    from catalogo import Catalogo
+
+    catalogo = Catalogo(args.catalogo)
+    try:
+        if args.acao == "index":
+            for pasta in args.pastas:
+                contagem = catalogo.reindexar(pasta)
+                print(f"{pasta}: " + ", ".join(f"{n} {k}" for k, n in contagem.items()))
+            return 0
+
+        achadas = catalogo.buscar(projeto=args.projeto, pts_por_camada=args.pts, falhas_min_pct=args.falhas_min,
+                                  falhas_max_pct=args.falhas_max, desde=args.desde, ate=args.ate,
+                                  firmware=args.firmware, limite=args.limite)
+        for v in achadas:
+            altura = "?" if v["altura_camada"] is None else f"{v['altura_camada']:g}"
+            print(f"{v['data'][:19]}  {v['projeto']:<20} {v['pts_por_camada'] or '?':>5} pts  {altura:>4} mm  "
+                  f"{v['amostras']:>7} amostras  {v['falhas_pct']:5.1f}% falhas  {v['caminho']}")
+            if args.artefatos:
+                for a in catalogo.artefatos(v["id"]):
+                    print(f"    {a['tipo'] or '-':<12} {a['caminho']}")
+        print(f"{len(achadas)} varredura(s)", file=sys.stderr)
+        return 0
+    finally:
+        catalogo.fechar()
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog="scanner", description="Scanner helicoidal (modo sem interface)")
+    parser.add_argument("--perfil", metavar="MODOS",
+                        help="cronometra as etapas e salva JSON em tests/perfil/; "
+                             "MODOS: tempos, cprofile, tracemalloc (separados por vírgula)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("scan", help="executa uma varredura e grava o CSV bruto")
+    p.add_argument("--porta", default=f"COM{parametros_padrao['porta_serial']}",
+                   help="porta serial, ou replay:<arquivo.scnt> / replay-rt:<arquivo.scnt>")
+    p.add_argument("--gravar", metavar="ARQUIVO", help="grava a transcrição serial (.scnt)")
+    p.add_argument("--baudrate", type=int, default=parametros_padrao["baudrate"])
+    p.add_argument("--pts", type=int, default=parametros_padrao["pts_camada"], help="pontos por camada")
+    p.add_argument("--altura-camada", type=int, default=parametros_padrao["altura_camada"], help="mm")
+    p.add_argument("--altura-max", type=int, default=parametros_padrao["altura_max"], help="mm")
+    p.add_argument("--passos-por-volta", type=int, default=parametros_padrao["passos_por_volta"])
+    p.add_argument("--altura-volta", type=float, default=parametros_padrao["altura_volta"], help="mm por volta da elevação")
+    p.add_argument("--adaptativo", action="store_true",
+                   help="amostragem angular adaptativa: mede só onde o perfil muda")
+    p.add_argument("--fracao", type=float, default=0.5, help="máximo de pontos por camada (fração de --pts)")
+    p.add_argument("--tolerancia", type=float, default=0.5, help="erro de corda aceito (mm)")
+    p.add_argument("--leituras", type=int, nargs=2, metavar=("MIN", "MAX"),
+                   help="sobreamostragem: MIN a MAX leituras por ponto, conforme o ruído")
+    p.add_argument("--erro-alvo", type=float, default=0.75,
+                   help="erro padrão desejado por ponto na sobreamostragem (mm)")
+    p.add_argument("--agregacao", choices=("mediana", "media_aparada"), default="mediana")
+    p.add_argument("--perfil-sensor", choices=("rapido", "padrao", "preciso", "longo"),
+                   help="perfil de medição do VL53L0X (firmware >= 1.2); sem opção, mantém o do firmware")
+    p.add_argument("--orcamento-us", type=int, help="tempo por leitura do sensor (us, 20000 a 200000)")
+    p.add_argument("--sigma-alvo", type=float,
+                   help="escolhe o menor orçamento cujo ruído (desvio padrão) fique abaixo deste valor (mm)")
+    p.add_argument("--multirresolucao", action="store_true",
+                   help="passe grosso rápido seguido de passes que intercalam camadas e pontos; "
+                        "grava um STL de prévia ao fim de cada passe")
+    p.add_argument("--grosso-altura", type=float, default=20, help="altura da camada no passe grosso (mm)")
+    p.add_argument("--grosso-pts", type=int, help="pontos por camada no passe grosso (padrão: --pts / 4)")
+    p.add_argument("--continuar", metavar="CSV", help="retoma uma varredura multirresolução interrompida")
+    p.add_argument("--projeto", default="projeto_sem_nome")
+    p.add_argument("--pasta", default="tests")
+    _args_movimento(p)
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("tune", help="sobe a velocidade de um eixo até perder passos e recua com margem")
+    p.add_argument("--porta", default=f"COM{parametros_padrao['porta_serial']}")
+    p.add_argument("--baudrate", type=int, default=parametros_padrao["baudrate"])
+    p.add_argument("--eixo", choices=("BASE", "ELEV"), default="BASE")
+    p.add_argument("--velocidades", type=int, nargs="+", help="passos/s testados (padrão: 400 a 1200)")
+    p.add_argument("--aceleracao-teste", type=int, default=1000, help="passos/s² usados no teste e no resultado")
+    p.add_argument("--excursao", type=int, default=parametros_padrao["passos_por_volta"],
+                   help="passos de cada ida e volta")
+    p.add_argument("--repeticoes", type=int, default=3)
+    p.add_argument("--margem", type=float, default=0.2, help="fração descontada da maior velocidade sem perdas")
+    p.add_argument("--tolerancia", type=float, default=1.0,
+                   help="desvio mínimo do perfil da feição de referência tratado como perda (mm)")
+    _args_movimento(p)
+    p.set_defaults(func=cmd_tune)
+
+    p = sub.add_parser("reconstruct", help="reconstrói e suaviza um CSV bruto")
+    p.add_argument("csv")
+    p.add_argument("-o", "--saida")
+    _args_calibracao(p)
+    p.set_defaults(func=cmd_reconstruct)
+
+    p = sub.add_parser("export", help="gera STL a partir de CSV bruto ou _cart.csv")
+    p.add_argument("csv")
+    p.add_argument("-o", "--saida")
+    _args_calibracao(p)
+    p.add_argument("--max-lacuna", type=int, default=3,
+                   help="maior sequência de ângulos perdidos preenchida por interpolação")
+    p.add_argument("--tampas", action="store_true", help="fecha a primeira e a última camada")
+    p.add_argument("--alvo-triangulos", type=int, help="simplifica a malha até este número de triângulos")
+    p.add_argument("--erro-max", type=float, help="simplifica enquanto o erro de cada colapso ficar abaixo disto (mm)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("calibrate", help="calibra dist_sensor e escala com um quadrado conhecido")
+    p.add_argument("csv")
+    p.add_argument("--tamanho", type=float, default=80.0, help="lado do quadrado (mm)")
+    p.add_argument("--dist-sensor", type=float, default=parametros_padrao["dist_sensor"])
+    p.add_argument("--alin-hor", type=float, default=parametros_padrao["alin_hor"])
+    p.add_argument("--escala", type=float, default=parametros_padrao["escala"])
+    p.set_defaults(func=cmd_calibrate)
+
+    p = sub.add_parser("qc", help="desvio da nuvem em relação a um STL de referência")
+    p.add_argument("csv", help="CSV bruto ou _cart.csv")
+    p.add_argument("referencia", help="STL nominal da peça")
+    p.add_argument("-o", "--saida", help="CSV com o desvio de cada ponto (padrão: <csv>_desvio.csv)")
+    p.add_argument("--tolerancia", type=float, help="conta os pontos dentro de ±tolerancia (mm)")
+    p.add_argument("--sem-alinhar", action="store_true",
+                   help="usa a nuvem como está (já no referencial do STL)")
+    p.add_argument("--perfil-camadas", metavar="CSV", help="grava o desvio por camada")
+    _args_calibracao(p)
+    p.set_defaults(func=cmd_qc)
+
+    p = sub.add_parser("metrics", help="volume, área e perfil por camada (CSV) ou da malha (STL)")
+    p.add_argument("csv", help="CSV bruto, _cart.csv ou STL")
+    p.add_argument("-o", "--saida", help="CSV do perfil por camada (padrão: <csv>_metricas.csv)")
+    p.add_argument("--z", type=float, action="append", help="seção da malha nesta altura (mm); repetível")
+    p.add_argument("--max-lacuna", type=int, default=3,
+                   help="maior sequência de ângulos perdidos preenchida por interpolação")
+    _args_calibracao(p)
+    p.set_defaults(func=cmd_metrics)
+
+    p = sub.add_parser("catalog", help="catálogo SQLite das varreduras: indexa pastas e consulta")
+    p.add_argument("--catalogo", default=None, help="arquivo do catálogo (padrão: tests/catalogo.sqlite)")
+    acoes = p.add_subparsers(dest="acao", required=True)
+    a = acoes.add_parser("index", help="indexa (incrementalmente) varreduras e derivados")
+    a.add_argument("pastas", nargs="*", default=["tests"])
+    a = acoes.add_parser("find", help="lista varreduras que atendem aos filtros")
+    a.add_argument("--projeto")
+    a.add_argument("--pts", type=int, help="pontos por camada")
+    a.add_argument("--falhas-min", type=float, help="mais que esta porcentagem de falhas")
+    a.add_argument("--falhas-max", type=float, help="no máximo esta porcentagem de falhas")
+    a.add_argument("--desde", help="data ISO inicial (ex.: 2025-08-01)")
+    a.add_argument("--ate", help="data ISO final")
+    a.add_argument("--firmware")
+    a.add_argument("--limite", type=int)
+    a.add_argument("--artefatos", action="store_true", help="lista também os arquivos derivados")
+    p.set_defaults(func=cmd_catalog)
+
+    return parser
+
+
+def main(argv=None):
+    parser = criar_parser()
+    args = parser.parse_args(argv)
+    if args.comando == "scan":
+        _validar_scan(parser, args)
+    if args.perfil:
+        import instrumentacao
+        instrumentacao.ativar(cprofile="cprofile" in args.perfil,
+                              tracemalloc="tracemalloc" in args.perfil)
+    try:
+        return args.func(args)
+    except Exception as e:
+        print(f"[ERRO] {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,563 @@
+"""
+Controle de qualidade: desvio da nuvem reconstruída em relação a uma malha
+de referência (STL nominal da peça).
+
+A referência vira uma cKDTree de amostras sobre os triângulos (os
+centróides das partes de uma bissecção pelo lado maior, com passo dado
+pela área total, para que nenhum ponto da superfície fique longe de uma
+amostra, nem nos triângulos longos de uma malha CAD ou decimada). Cada
+amostra cobre uma bola de raio conhecido; para cada ponto da nuvem, os triângulos
+das `vizinhos` amostras mais próximas são testados exatamente e, se a
+k-ésima amostra não estiver longe o bastante para descartar os demais
+triângulos, todos os que têm amostra a até (melhor distância + raio de
+cobertura da amostra) também são: numa consulta de até `vizinhos_limite`
+amostras e, só nos pontos com mais amostras que isso no raio, numa busca
+por raio. O resultado é o triângulo mais próximo de fato; o
+sinal vem da normal dele, ou da média das normais dos empatados quando o
+ponto mais próximo é uma aresta ou um vértice.
+
+Sinal: positivo fora da peça (material a mais), negativo dentro (falta).
+
+Se a varredura e o STL não estiverem no mesmo referencial, `alinhar` faz
+um alinhamento rígido: centróide em XY e base em Z, algumas orientações
+iniciais em torno de Z e ICP ponto-a-plano numa amostra da nuvem.
+"""
+import numpy as np
+import pandas as pd
+from logger_setup import logger
+from instrumentacao import cronometrar
+
+
+class Referencia:
+    """
+    Malha de referência com índice espacial para consultas de distância.
+
+    Args:
+        triangulos (np.ndarray): (n, 3, 3) vértices de cada triângulo (mm).
+        amostras_alvo (int): Amostras aproximadas no índice (padrão: uma por
+            triângulo, no mínimo 20 mil).
+    """
+    def __init__(self, triangulos, amostras_alvo=None):
+        from scipy.spatial import cKDTree
+
+        self.tri = np.ascontiguousarray(triangulos, dtype=float)
+        a, b, c = self.tri[:, 0], self.tri[:, 1], self.tri[:, 2]
+        normais = np.cross(b - a, c - a)
+        comprimento = np.linalg.norm(normais, axis=1, keepdims=True)
+        self.normais = np.divide(normais, comprimento, out=np.zeros_like(normais), where=comprimento > 0)
+        # orientação: volume com sinal negativo = normais para dentro
+        volume = np.einsum("ij,ij->i", a, np.cross(b, c)).sum() / 6
+        if volume < 0:
+            self.normais = -self.normais
+        self.volume = abs(volume)
+        self.area = float(comprimento.sum() / 2)
+        centroides = self.tri.mean(axis=1)
+        self.centroide = (centroides * comprimento).sum(axis=0) / max(comprimento.sum(), 1e-12)
+        self.minimo, self.maximo = self.tri.reshape(-1, 3).min(axis=0), self.tri.reshape(-1, 3).max(axis=0)
+
+        # amostras: centróides das partes de cada triângulo, bissectado pelo lado maior até todos
+        # os lados ficarem abaixo de um passo que dá ~amostras_alvo na área total (alargado se os
+        # triângulos finos estourarem 2x). Cada parte cabe na bola de raio centróide-vértice.
+        lado = np.linalg.norm(self.tri - np.roll(self.tri, 1, axis=1), axis=2).max(axis=1)
+        tipico = max(np.median(lado), 1e-9)
+        alvo = amostras_alvo or max(len(self.tri), 20_000)
+        passo = max(np.sqrt(self.area / (0.433 * alvo)), 1e-6 * max(lado.max(), 1e-3))
+        while (partes := _bisseccao(self.tri, passo, max(2 * alvo, len(self.tri)))) is None:
+            passo *= 1.25
+        amostras, self.donos, self.cobertura = partes
+        self.cobertura_max = float(self.cobertura.max())
+        self.arvore = cKDTree(amostras)
+
+        # projeção no plano e coordenadas baricêntricas (caminho rápido de mais_proximos)
+        self.e0, self.e1 = b - a, c - a
+        d00 = np.einsum("ij,ij->i", self.e0, self.e0)
+        d01 = np.einsum("ij,ij->i", self.e0, self.e1)
+        d11 = np.einsum("ij,ij->i", self.e1, self.e1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv = 1 / (d00 * d11 - d01 ** 2)  # inf nos degenerados: ficam para o caminho exato
+            # alturas relativas a cada lado (oposto a a, b e c): limite inferior fora da projeção
+            alturas = comprimento / np.column_stack((np.linalg.norm(c - b, axis=1), np.sqrt(d11), np.sqrt(d00)))
+        # tudo o que o caminho rápido lê de um triângulo numa linha só (uma leitura aleatória por candidato)
+        self.pacote = np.column_stack((a, self.normais, self.e0, self.e1, d00 * inv, d01 * inv, d11 * inv, alturas))
+        self.celula = 4 * tipico
+
+    @classmethod
+    def de_stl(cls, caminho):
+        from stl import mesh
+        return cls(mesh.Mesh.from_file(caminho).vectors)
+
+    def mais_proximos(self, pontos, vizinhos=6, vizinhos_limite=64, bloco=65536):
+        """
+        Ponto mais próximo da superfície e distância com sinal de cada ponto.
+
+        Os triângulos das `vizinhos` amostras mais próximas são testados
+        (_entre_vizinhos). Um triângulo sem amostra entre elas fica a pelo
+        menos (distância da k-ésima amostra - cobertura_max); onde isso não
+        supera a melhor distância, até `vizinhos_limite` amostras a até essa
+        distância + cobertura de cada uma são testadas (_vizinhos_no_limite),
+        e só os pontos com ainda mais amostras no raio passam por _exato_na_bola.
+
+        Returns:
+            tuple: (distâncias (n,), pontos mais próximos (n, 3), normais (n, 3));
+                quantos pontos cada etapa resolveu fica em self.etapas
+        """
+        pontos = np.asarray(pontos, dtype=float)
+        self.etapas = {"vizinhos": 0, "limite": 0, "bola": 0}
+        n = len(pontos)
+        distancias = np.empty(n)
+        proximos = np.empty((n, 3))
+        normais = np.empty((n, 3))
+        k = min(vizinhos, len(self.donos))
+        k_limite = min(max(vizinhos_limite, k), len(self.donos))
+        # consultas vizinhas em sequência aproveitam o cache da árvore (2x mais rápido que em ordem aleatória)
+        celula = np.floor((pontos - self.minimo) / self.celula).astype(np.int64)
+        ordem = np.lexsort(celula.T[::-1])
+        for inicio in range(0, n, bloco):  # em blocos: (bloco, k, 3) temporários por etapa
+            idx = ordem[inicio:inicio + bloco]
+            p = pontos[idx]
+            d_min, q_min, sinal, normal, fechado = self._entre_vizinhos(p, k)
+            aberto = np.flatnonzero(~fechado)
+            if len(aberto):
+                da, qa, sa, na, fa = self._vizinhos_no_limite(p[aberto], d_min[aberto], k_limite)
+                f = aberto[fa]
+                d_min[f], q_min[f], sinal[f], normal[f] = da[fa], qa[fa], sa[fa], na[fa]
+                aberto = aberto[~fa]
+            if len(aberto):
+                da, qa, sa, na = self._exato_na_bola(p[aberto], d_min[aberto])
+                d_min[aberto], q_min[aberto], sinal[aberto], normal[aberto] = da, qa, sa, na
+            self.etapas["bola"] += len(aberto)
+            self.etapas["limite"] += int(np.count_nonzero(~fechado)) - len(aberto)
+            self.etapas["vizinhos"] += int(np.count_nonzero(fechado))
+            distancias[idx] = np.where(sinal < 0, -d_min, d_min)
+            proximos[idx] = q_min
+            normais[idx] = normal
+        return distancias, proximos, normais
+
+    def _entre_vizinhos(self, p, k):
+        """
+        Melhor triângulo entre os donos das k amostras mais próximas de cada ponto.
+
+        Caminho rápido: se a projeção do ponto no plano de um candidato cai
+        dentro do triângulo, a distância é a do plano; como a distância ao
+        plano é um limite inferior para os demais, só os pontos em que um
+        candidato com projeção fora ainda pode vencer passam pelo cálculo
+        exato (arestas e vértices).
+
+        Returns:
+            tuple: (distâncias sem sinal, pontos mais próximos, sinais, normais,
+                fechado: nenhum triângulo fora dos candidatos pode estar mais perto)
+        """
+        from decimacao import ponto_mais_proximo_triangulo
+
+        linhas = np.arange(len(p))
+        dist_amostra, amostra = self.arvore.query(p, k=k)
+        candidatos = self.donos[amostra.reshape(len(p), k)]
+        limite = dist_amostra.reshape(len(p), k)[:, -1] - self.cobertura_max
+
+        pacote = self.pacote[candidatos]
+        plano, dentro, minimo = _projecao(p[:, None, :], pacote)
+        d = np.where(dentro, np.abs(plano), np.inf)
+        melhor = d.argmin(axis=1)
+        d_min = d[linhas, melhor]
+        plano_min = plano[linhas, melhor]
+        normal = pacote[linhas, melhor, 3:6]
+        q_min = p - plano_min[:, None] * normal
+        sinal = np.sign(plano_min)
+
+        exato = np.where(dentro, np.inf, minimo).min(axis=1) < d_min
+        if exato.any():
+            pe, ce = p[exato], candidatos[exato]
+            tri = self.tri[ce]
+            q = ponto_mais_proximo_triangulo(pe[:, None, :], tri[..., 0, :], tri[..., 1, :], tri[..., 2, :])
+            de = np.linalg.norm(pe[:, None, :] - q, axis=-1)
+            me = de.argmin(axis=1)
+            le = np.arange(len(pe))
+            de_min = de[le, me]
+            # empate (aresta/vértice compartilhado): média das normais dos triângulos empatados
+            empatados = de <= de_min[:, None] + 1e-6 * (1 + de_min[:, None])
+            media = (self.normais[ce] * empatados[..., None]).sum(axis=1)
+            d_min[exato] = de_min
+            q_min[exato] = q[le, me]
+            sinal[exato] = np.sign(np.einsum("ij,ij->i", pe - q[le, me], media))
+            normal[exato] = self.normais[ce[le, me]]
+        # com todas as amostras entre os vizinhos não sobra triângulo de fora
+        fechado = (d_min < limite) | (k >= len(self.donos))
+        return d_min, q_min, sinal, normal, fechado
+
+    def _vizinhos_no_limite(self, p, limite, k, bloco=16384):
+        """
+        Segunda etapa, numa consulta só à árvore: as k amostras mais próximas
+        a até limite + cobertura_max, testadas só as que ficam a até limite +
+        a cobertura delas mesmas. Se sobrou espaço entre as k (a k-ésima está
+        além do raio), nenhuma amostra útil ficou de fora e o ponto fecha.
+
+        Returns:
+            tuple: (distâncias sem sinal, pontos mais próximos, sinais, normais,
+                fechado; só os fechados têm resultado)
+        """
+        n = len(p)
+        d_min, q_min = np.empty(n), np.empty((n, 3))
+        sinal, normal = np.empty(n), np.empty((n, 3))
+        fechado = np.empty(n, dtype=bool)
+        limite = np.asarray(limite, dtype=float) * (1 + 1e-9) + 1e-9
+        # a consulta aceita um raio só: pontos em faixas de raio parecido, cada faixa
+        # ainda na ordem espacial de mais_proximos (cache da árvore)
+        faixa = np.floor(limite / (0.5 * self.cobertura_max + 1e-12)).astype(np.int64)
+        ordem = np.argsort(faixa, kind="stable")
+        grupos = np.split(ordem, np.flatnonzero(np.diff(faixa[ordem])) + 1)
+        for sel in (g[i:i + bloco] for g in grupos for i in range(0, len(g), bloco)):
+            pb, lim = p[sel], limite[sel]
+            dist, amostra = self.arvore.query(pb, k=k, distance_upper_bound=lim.max() + self.cobertura_max)
+            fechado[sel] = dist[:, -1] > lim + self.cobertura_max
+            linha = np.repeat(np.arange(len(pb)), k)
+            dist, amostra = dist.ravel(), amostra.ravel()
+            perto = np.isfinite(dist)
+            perto[perto] = dist[perto] <= lim[linha[perto]] + self.cobertura[amostra[perto]]
+            alvo, *melhor = self._melhor_entre_pares(pb, lim, linha[perto], self.donos[amostra[perto]])
+            alvo = sel[alvo]
+            d_min[alvo], q_min[alvo], sinal[alvo], normal[alvo] = melhor
+        return d_min, q_min, sinal, normal, fechado
+
+    def _exato_na_bola(self, p, limite, bloco=16384):
+        """
+        Teste exato contra todo triângulo que pode estar a até `limite` (a
+        melhor distância já conhecida) de cada ponto: os que têm amostra a
+        até limite + cobertura da amostra e cujo plano não fica além do
+        limite. O triângulo mais próximo (e os empatados) está sempre entre eles.
+
+        Returns:
+            tuple: (distâncias sem sinal, pontos mais próximos, sinais, normais)
+        """
+        from scipy.spatial import cKDTree
+
+        n = len(p)
+        d_min, q_min = np.empty(n), np.empty((n, 3))
+        sinal, normal = np.empty(n), np.empty((n, 3))
+        limite = np.asarray(limite, dtype=float) * (1 + 1e-9) + 1e-9
+        ordem = np.argsort(limite)  # raios parecidos no mesmo bloco: a consulta usa o maior
+        for inicio in range(0, n, bloco):
+            sel = ordem[inicio:inicio + bloco]
+            pb, lim = p[sel], limite[sel]
+            pares = cKDTree(pb).sparse_distance_matrix(self.arvore, lim.max() + self.cobertura_max,
+                                                       output_type="ndarray")
+            linha, amostra = pares["i"].astype(np.int64), pares["j"]
+            perto = pares["v"] <= lim[linha] + self.cobertura[amostra]
+            alvo, *melhor = self._melhor_entre_pares(pb, lim, linha[perto], self.donos[amostra[perto]])
+            alvo = sel[alvo]
+            d_min[alvo], q_min[alvo], sinal[alvo], normal[alvo] = melhor
+        return d_min, q_min, sinal, normal
+
+    def _melhor_entre_pares(self, p, limite, linha, tri):
+        """
+        Triângulo mais próximo de cada ponto entre os pares (ponto `linha`,
+        triângulo `tri`), descartados os cujo plano fica além do limite.
+
+        Returns:
+            tuple: (linhas com par, distâncias sem sinal, pontos mais próximos, sinais, normais)
+        """
+        from decimacao import ponto_mais_proximo_triangulo
+
+        # distância exata se a projeção cai no triângulo, limite inferior se não
+        plano, dentro, minimo = _projecao(p[linha], self.pacote[tri])
+        util = minimo <= limite[linha]
+        linha, tri, plano, dentro = linha[util], tri[util], plano[util], dentro[util]
+        q = p[linha] - plano[:, None] * self.normais[tri]
+        fora = ~dentro
+        t = self.tri[tri[fora]]
+        q[fora] = ponto_mais_proximo_triangulo(p[linha[fora]], t[:, 0], t[:, 1], t[:, 2])
+        d = np.linalg.norm(p[linha] - q, axis=1)
+
+        # por ponto: menor distância, empatados (aresta/vértice) e média das normais deles
+        ordem_pares = np.lexsort((d, linha))
+        linha, tri, q, d = linha[ordem_pares], tri[ordem_pares], q[ordem_pares], d[ordem_pares]
+        primeiro = np.r_[0, np.flatnonzero(np.diff(linha)) + 1] if len(linha) else np.zeros(0, dtype=np.int64)
+        menor = d[primeiro]
+        empatados = d <= np.repeat(menor, np.diff(np.r_[primeiro, len(d)])) * (1 + 1e-6) + 1e-6
+        media = np.add.reduceat(self.normais[tri] * empatados[:, None], primeiro) if len(linha) else np.zeros((0, 3))
+
+        alvo = linha[primeiro]
+        sinal = np.sign(np.einsum("ij,ij->i", p[alvo] - q[primeiro], media))
+        return alvo, menor, q[primeiro], sinal, self.normais[tri[primeiro]]
+
+    def distancias(self, pontos, vizinhos=6):
+        """Distância com sinal (mm) de cada ponto à superfície (positiva fora)."""
+        return self.mais_proximos(pontos, vizinhos)[0]
+
+
+def _projecao(p, pacote):
+    """
+    Projeção de cada ponto no plano do triângulo correspondente de `pacote`.
+
+    Returns:
+        tuple: (distância com sinal ao plano, projeção dentro do triângulo,
+            limite inferior da distância ao triângulo: a do plano combinada
+            com o quanto a projeção passa da reta de cada lado, coordenada
+            baricêntrica negativa vezes a altura relativa ao lado)
+    """
+    v = p - pacote[..., 0:3]
+    plano = np.einsum("...k,...k->...", v, pacote[..., 3:6])
+    d20 = np.einsum("...k,...k->...", v, pacote[..., 6:9])
+    d21 = np.einsum("...k,...k->...", v, pacote[..., 9:12])
+    with np.errstate(invalid="ignore"):
+        u = pacote[..., 14] * d20 - pacote[..., 13] * d21
+        w = pacote[..., 12] * d21 - pacote[..., 13] * d20
+        dentro = (u >= 0) & (w >= 0) & (u + w <= 1)
+        fora = np.maximum(np.maximum((u + w - 1) * pacote[..., 15], -u * pacote[..., 16]), -w * pacote[..., 17])
+        fora = np.where(fora > 0, fora, 0)  # nan nos degenerados: sem limite além do plano
+    return plano, dentro, np.hypot(plano, fora)
+
+
+def _bisseccao(tri, passo, maximo):
+    """
+    Divide cada triângulo pelo ponto médio do lado maior até todos os lados
+    ficarem <= passo (um triângulo fino vira ~lado/passo partes, não (lado/passo)²).
+
+    Returns:
+        tuple | None: (centróides (m, 3), triângulo de origem (m,), raio de
+            cobertura (m,)), ou None se passar de `maximo` partes
+    """
+    pecas, donos = tri, np.arange(len(tri))
+    prontas, prontos, total = [], [], 0
+    while len(pecas):
+        lados = np.linalg.norm(pecas - np.roll(pecas, 1, axis=1), axis=2)  # lado i: vértices i-1 e i
+        grande = lados.max(axis=1) > passo
+        prontas.append(pecas[~grande])
+        prontos.append(donos[~grande])
+        total += len(prontos[-1])
+        if total + grande.sum() > maximo: return None  # cada parte pendente ainda rende ao menos uma
+        pecas, donos, i = pecas[grande], donos[grande], lados[grande].argmax(axis=1)
+        linhas = np.arange(len(pecas))
+        anterior, vertice, oposto = pecas[linhas, i - 1], pecas[linhas, i], pecas[linhas, (i + 1) % 3]
+        meio = (anterior + vertice) / 2
+        pecas = np.concatenate((np.stack((anterior, meio, oposto), axis=1), np.stack((meio, vertice, oposto), axis=1)))
+        donos = np.r_[donos, donos]
+    pecas, donos = np.concatenate(prontas), np.concatenate(prontos)
+    centroides = pecas.mean(axis=1)
+    return centroides, donos, np.linalg.norm(pecas - centroides[:, None], axis=2).max(axis=1)
+
+
+def _rotacao(angulos):
+    """Matriz de rotação de pequenos ângulos (rx, ry, rz), ortonormalizada."""
+    rx, ry, rz = angulos
+    cx, sx, cy, sy, cz, sz = np.cos(rx), np.sin(rx), np.cos(ry), np.sin(ry), np.cos(rz), np.sin(rz)
+    return (np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]]) @
+            np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]]) @
+            np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]]))
+
+
+def _icp_ponto_plano(referencia, pontos, R, t, iteracoes):
+    """
+    Refina (R, t) tal que R·p + t encoste na referência (ponto-a-plano,
+    linearizado em 6 graus de liberdade, pares acima de 3x a mediana descartados).
+
+    Returns:
+        tuple: (R, t, RMS final em mm)
+    """
+    rms = np.inf
+    for _ in range(iteracoes):
+        p = pontos @ R.T + t
+        d, q, n = referencia.mais_proximos(p)
+        bom = np.abs(d) <= 3 * max(np.median(np.abs(d)), 1e-3)
+        p, q, n = p[bom], q[bom], n[bom]
+        A = np.column_stack((np.cross(p, n), n))
+        b = np.einsum("ij,ij->i", q - p, n)
+        x, *_ = np.linalg.lstsq(A, b, rcond=None)
+        dR = _rotacao(x[:3])
+        R, t = dR @ R, dR @ t + x[3:]
+        rms = float(np.sqrt(np.mean(b ** 2)))
+        if np.abs(x).max() < 1e-6: break
+    return R, t, rms
+
+
+@cronometrar()
+def alinhar_referencia(referencia, pontos, orientacoes=12, iteracoes=30, amostra=20000):
+    """
+    Transformação rígida (R, t) que leva a nuvem ao referencial da referência.
+
+    Início: centróide em XY e base (Z mínimo) coincidentes; `orientacoes`
+    rotações em torno de Z, cada uma com poucas iterações de ICP; a melhor
+    segue até `iteracoes`. Usa uma amostra uniforme da nuvem (e uma
+    dez vezes menor na busca de orientação, em que os pontos ainda estão
+    longe da superfície e cada consulta à árvore custa mais).
+    """
+    pontos = np.asarray(pontos, dtype=float)
+    sub = pontos[::max(1, len(pontos) // amostra)]
+    busca = sub[::10]
+    centro = np.r_[sub[:, :2].mean(axis=0), sub[:, 2].min()]
+    destino = np.r_[referencia.centroide[:2], referencia.minimo[2]]
+
+    melhor = None
+    for giro in np.arange(orientacoes) * 2 * np.pi / orientacoes:
+        R = _rotacao((0.0, 0.0, giro))
+        t = destino - R @ centro
+        R, t, rms = _icp_ponto_plano(referencia, busca, R, t, 4)
+        if melhor is None or rms < melhor[2]:
+            melhor = (R, t, rms)
+    R, t, rms = _icp_ponto_plano(referencia, sub, melhor[0], melhor[1], iteracoes)
+    logger.info(f"Alinhamento com a referência: RMS {rms:.3f} mm")
+    return R, t
+
+
+def estatisticas_desvio(desvios, tolerancia=None):
+    """Resumo dos desvios com sinal (mm)."""
+    d = np.asarray(desvios, dtype=float)
+    d = d[np.isfinite(d)]
+    p = np.percentile(d, (5, 50, 95)) if len(d) else (np.nan,) * 3
+    estat = {
+        "pontos": int(len(d)),
+        "media_mm": float(d.mean()) if len(d) else np.nan,
+        "desvio_padrao_mm": float(d.std()) if len(d) else np.nan,
+        "rms_mm": float(np.sqrt(np.mean(d ** 2))) if len(d) else np.nan,
+        "min_mm": float(d.min()) if len(d) else np.nan,
+        "max_mm": float(d.max()) if len(d) else np.nan,
+        "p05_mm": float(p[0]), "mediana_mm": float(p[1]), "p95_mm": float(p[2]),
+        "p95_abs_mm": float(np.percentile(np.abs(d), 95)) if len(d) else np.nan,
+    }
+    if tolerancia is not None:
+        estat["tolerancia_mm"] = tolerancia
+        estat["dentro_pct"] = float(100 * np.mean(np.abs(d) <= tolerancia)) if len(d) else np.nan
+    return estat
+
+
+def perfil_por_camada(camadas, zs, desvios, tolerancia=None):
+    """
+    Desvio por camada (vetorizado com bincount).
+
+    Returns:
+        pd.DataFrame: Camada, Z_mm, Pontos, Media_mm, Rms_mm, Min_mm, Max_mm (e Fora_pct)
+    """
+    unicas, linha = np.unique(camadas, return_inverse=True)
+    n = len(unicas)
+    contagem = np.bincount(linha, minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        perfil = pd.DataFrame({
+            "Camada": unicas,
+            "Z_mm": np.bincount(linha, zs, minlength=n) / contagem,
+            "Pontos": contagem,
+            "Media_mm": np.bincount(linha, desvios, minlength=n) / contagem,
+            "Rms_mm": np.sqrt(np.bincount(linha, desvios ** 2, minlength=n) / contagem),
+        })
+    minimo = np.full(n, np.inf)
+    maximo = np.full(n, -np.inf)
+    np.minimum.at(minimo, linha, desvios)
+    np.maximum.at(maximo, linha, desvios)
+    perfil["Min_mm"], perfil["Max_mm"] = minimo, maximo
+    if tolerancia is not None:
+        perfil["Fora_pct"] = 100 * np.bincount(linha, np.abs(desvios) > tolerancia, minlength=n) / contagem
+    return perfil
+
+
+@cronometrar()
+def comparar_com_referencia(pontos: pd.DataFrame, referencia, alinhar=True, tolerancia=None):
+    """
+    Desvio de cada ponto reconstruído em relação à malha de referência.
+
+    Args:
+        pontos (pd.DataFrame): colunas ['Camada', 'X_mm', 'Y_mm', 'Z_mm'].
+        referencia (Referencia | str): malha ou caminho do STL.
+        alinhar (bool): Alinha a nuvem à referência antes (ver alinhar_referencia).
+        tolerancia (float): Se dada, conta os pontos dentro de ±tolerancia.
+
+    Returns:
+        dict: desvios (np.ndarray, na ordem de `pontos`), estatisticas (dict),
+            perfil (pd.DataFrame por camada), R e t (alinhamento aplicado).
+    """
+    if isinstance(referencia, str):
+        referencia = Referencia.de_stl(referencia)
+    xyz = pontos[['X_mm', 'Y_mm', 'Z_mm']].to_numpy(dtype=float)
+    R, t = np.eye(3), np.zeros(3)
+    if alinhar:
+        R, t = alinhar_referencia(referencia, xyz)
+    desvios = referencia.distancias(xyz @ R.T + t)
+    estat = estatisticas_desvio(desvios, tolerancia)
+    perfil = perfil_por_camada(pontos['Camada'].to_numpy(), xyz[:, 2], desvios, tolerancia)
+    logger.info(f"Desvio em relação à referência: média {estat['media_mm']:+.3f} mm, RMS {estat['rms_mm']:.3f} mm, "
+                f"de {estat['min_mm']:+.2f} a {estat['max_mm']:+.2f} mm")
+    return {"desvios": desvios, "estatisticas": estat, "perfil": perfil, "R": R, "t": t}
+
+
+if __name__ == "__main__":
+    # 1M pontos contra uma referência de ~500k triângulos (ampulheta analítica)
+    import time
+    from gerador_sintetico import ampulheta, raio_verdadeiro
+
+    solido = ampulheta()
+    n_ang, n_z = 1000, 251
+    ang, z = np.meshgrid(np.linspace(0, 2 * np.pi, n_ang, endpoint=False), np.linspace(0, 100, n_z))
+    r = raio_verdadeiro(solido, ang, z)
+    grade = np.stack((r * np.cos(ang), r * np.sin(ang), z), axis=-1)
+    prox = np.roll(grade, -1, axis=1)
+    a, b, c, d = grade[:-1], prox[:-1], prox[1:], grade[1:]
+    triangulos = np.concatenate((np.stack((a, b, c), axis=2).reshape(-1, 3, 3),
+                                 np.stack((a, c, d), axis=2).reshape(-1, 3, 3)))
+
+    inicio = time.perf_counter()
+    referencia = Referencia(triangulos)
+    t_indice = time.perf_counter() - inicio
+
+    rng = np.random.default_rng(0)
+    n = 1_000_000
+    ang_p, z_p = rng.uniform(0, 2 * np.pi, n), rng.uniform(0, 100, n)
+    erro = rng.normal(0, 0.3, n)
+    r_p = raio_verdadeiro(solido, ang_p, z_p) + erro
+    nuvem = pd.DataFrame({"Camada": (z_p // 0.5).astype(int) + 1, "X_mm": r_p * np.cos(ang_p),
+                          "Y_mm": r_p * np.sin(ang_p), "Z_mm": z_p})
+
+    inicio = time.perf_counter()
+    resultado = comparar_com_referencia(nuvem, referencia, alinhar=False, tolerancia=0.5)
+    t_desvio = time.perf_counter() - inicio
+    # o raio na horizontal não é a distância à parede inclinada: compara com o erro projetado na normal
+    inclinacao = np.cos(np.arctan(2 * (45 - 15) / 100))
+    diferenca = resultado["desvios"] - erro * inclinacao
+    print(f"{len(triangulos)} triângulos: índice em {t_indice:.2f} s")
+    print(f"{n} pontos: desvios em {t_desvio:.2f} s; "
+          f"erro contra o valor exato: mediana {np.median(np.abs(diferenca)):.4f} mm, "
+          f"p99 {np.percentile(np.abs(diferenca), 99):.4f} mm")
+    print({k: round(v, 3) for k, v in resultado["estatisticas"].items()})
+    print("pontos resolvidos por etapa:", referencia.etapas)
+
+    # conferência contra força bruta (todos os triângulos) em malhas em que o
+    # triângulo mais próximo nem sempre é dono das amostras vizinhas: cilindro
+    # CAD (triângulos longos e finos) e uma ampulheta decimada
+    from decimacao import decimar_malha, distancia_ponto_triangulo
+
+    def forca_bruta(tri, pontos, bloco=256):
+        return np.concatenate([
+            distancia_ponto_triangulo(pontos[i:i + bloco, None, :], tri[None, :, 0], tri[None, :, 1],
+                                      tri[None, :, 2]).min(axis=1)
+            for i in range(0, len(pontos), bloco)])
+
+    m = 64
+    a0 = np.linspace(0, 2 * np.pi, m, endpoint=False)
+    base = np.column_stack((40 * np.cos(a0), 40 * np.sin(a0), np.zeros(m)))
+    topo = base + [0, 0, 100]
+    j = np.roll(np.arange(m), -1)
+    centro = np.zeros((m, 3))
+    cilindro = np.concatenate((np.stack((base, base[j], topo[j]), axis=1), np.stack((base, topo[j], topo), axis=1),
+                               np.stack((centro, base[j], base), axis=1),
+                               np.stack((centro + [0, 0, 100], topo, topo[j]), axis=1)))
+    ang_c, z_c = rng.uniform(0, 2 * np.pi, 20000), rng.uniform(-5, 105, 20000)
+    r_c = 40 + rng.normal(0, 2, 20000)
+    pontos_cil = np.column_stack((r_c * np.cos(ang_c), r_c * np.sin(ang_c), z_c))
+
+    n_ang, n_z = 200, 51
+    vertices = grade[::5, ::5].reshape(-1, 3)  # a ampulheta acima em grade mais grossa
+    ii, jj = np.meshgrid(np.arange(n_z - 1), np.arange(n_ang), indexing="ij")
+    v00 = ii * n_ang + jj
+    v01 = ii * n_ang + (jj + 1) % n_ang
+    faces = np.concatenate((np.stack((v00, v01, v01 + n_ang), axis=-1).reshape(-1, 3),
+                            np.stack((v00, v01 + n_ang, v00 + n_ang), axis=-1).reshape(-1, 3)))
+    v_dec, f_dec, _ = decimar_malha(vertices, faces, alvo_triangulos=len(faces) // 10)
+    pontos_dec = vertices + rng.normal(0, 1, vertices.shape)
+
+    # e a referência densa, numa amostra da nuvem (a força bruta passa pelos 500k triângulos)
+    amostra = rng.choice(n, 200, replace=False)
+    pontos_densa = nuvem[["X_mm", "Y_mm", "Z_mm"]].to_numpy()[amostra]
+
+    for nome, tri, pontos in (("cilindro CAD", cilindro, pontos_cil), ("ampulheta decimada", v_dec[f_dec], pontos_dec),
+                              ("ampulheta densa", triangulos, pontos_densa)):
+        ref = referencia if tri is triangulos else Referencia(tri)
+        obtido = np.abs(ref.distancias(pontos))
+        diferenca = np.abs(obtido - forca_bruta(tri, pontos, bloco=max(1, 2 ** 22 // len(tri))))
+        print(f"{nome}: {len(tri)} triângulos, {len(pontos)} pontos; contra força bruta: "
+              f"{np.count_nonzero(diferenca > 1e-6)} divergentes, máx {diferenca.max():.2e} mm; {ref.etapas}")
@@ -0,0 +1,468 @@
+"""
+Simplificação de malha por colapso de arestas com erro quádrico (Garland-Heckbert).
+
+Cada vértice acumula as quádricas dos planos das faces vizinhas (e planos
+perpendiculares nas bordas, para não encolher buracos nem as bordas de
+cima e de baixo). O custo de colapsar a aresta (a, b) num ponto v é
+vᵀ(Qa + Qb)v: a soma dos quadrados das distâncias de v aos planos
+originais, em mm².
+
+Um heap com um colapso por vez em Python levaria minutos para um milhão de
+triângulos. Aqui os colapsos são feitos em rodadas vetorizadas, na ordem
+de custo: em cada rodada, entre as arestas mais baratas, colapsam juntas
+as que são a mais barata nas duas pontas (nenhum vértice entra em dois
+colapsos), descartando as que inverteriam alguma face com todos os
+colapsos da rodada aplicados.
+"""
+import numpy as np
+from logger_setup import logger
+from instrumentacao import cronometrar
+
+# peso das quádricas de borda em relação às das faces
+PESO_BORDA = 100.0
+
+
+def _normais(vertices, faces):
+    a, b, c = vertices[faces[:, 0]], vertices[faces[:, 1]], vertices[faces[:, 2]]
+    return np.cross(b - a, c - a)
+
+
+def _quadricas_planos(normais, pontos, peso=1.0):
+    """Quádricas (n, 10) dos planos com normal `normais` passando por `pontos`."""
+    comprimento = np.linalg.norm(normais, axis=1, keepdims=True)
+    n = np.divide(normais, comprimento, out=np.zeros_like(normais), where=comprimento > 0)
+    a, b, c = n.T
+    d = -(n * pontos).sum(axis=1)
+    return peso * np.column_stack((a*a, a*b, a*c, a*d, b*b, b*c, b*d, c*c, c*d, d*d))
+
+
+def _acumular(indices, valores, n):
+    """Soma as linhas de `valores` (k, 10) por vértice."""
+    return np.column_stack([np.bincount(indices, valores[:, i], minlength=n) for i in range(valores.shape[1])])
+
+
+def _custo(q, v):
+    x, y, z = v.T
+    return (q[:, 0]*x*x + 2*q[:, 1]*x*y + 2*q[:, 2]*x*z + 2*q[:, 3]*x
+            + q[:, 4]*y*y + 2*q[:, 5]*y*z + 2*q[:, 6]*y
+            + q[:, 7]*z*z + 2*q[:, 8]*z + q[:, 9])
+
+
+def _melhor_posicao(q, pa, pb):
+    """
+    Posição ótima de cada colapso: solução do sistema 3x3 (regra de Cramer com a
+    adjunta, bem mais rápida que np.linalg.solve em milhões de matrizes) ou,
+    quando ele é singular ou a solução cai longe da aresta, a melhor entre a, b e o meio.
+    """
+    meio = (pa + pb) / 2
+    a11, a12, a13, a22, a23, a33 = q[:, 0], q[:, 1], q[:, 2], q[:, 4], q[:, 5], q[:, 7]
+    c11 = a22 * a33 - a23 * a23
+    c12 = a13 * a23 - a12 * a33
+    c13 = a12 * a23 - a13 * a22
+    c22 = a11 * a33 - a13 * a13
+    c23 = a12 * a13 - a11 * a23
+    c33 = a11 * a22 - a12 * a12
+    det = a11 * c11 + a12 * c12 + a13 * c13
+    escala = np.abs(q[:, [0, 1, 2, 4, 5, 7]]).max(axis=1) ** 3
+    ok = np.abs(det) > 1e-6 * np.maximum(escala, 1e-36)
+
+    pos = meio.copy()
+    resolvido = np.zeros(len(q), dtype=bool)
+    if ok.any():
+        k = np.flatnonzero(ok)
+        d1, d2, d3 = -q[k, 3], -q[k, 6], -q[k, 8]
+        otimo = np.column_stack((c11[k] * d1 + c12[k] * d2 + c13[k] * d3,
+                                 c12[k] * d1 + c22[k] * d2 + c23[k] * d3,
+                                 c13[k] * d1 + c23[k] * d2 + c33[k] * d3)) / det[k, None]
+        # longe da aresta a solução é mal condicionada (superfícies planas ou cilíndricas)
+        perto = np.linalg.norm(otimo - meio[k], axis=1) <= np.linalg.norm(pb[k] - pa[k], axis=1)
+        pos[k[perto]] = otimo[perto]
+        resolvido[k[perto]] = True
+
+    custo = np.empty(len(q))
+    custo[resolvido] = _custo(q[resolvido], pos[resolvido])
+    resto = np.flatnonzero(~resolvido)
+    if len(resto):
+        qr = q[resto]
+        candidatos = np.stack((pa[resto], pb[resto], meio[resto]))
+        custos = np.stack([_custo(qr, c) for c in candidatos])
+        escolha = custos.argmin(axis=0)
+        linhas = np.arange(len(resto))
+        pos[resto] = candidatos[escolha, linhas]
+        custo[resto] = custos[escolha, linhas]
+    return pos, np.maximum(custo, 0)
+
+
+def _chaves_arestas(faces, n):
+    """Chave inteira (menor * n + maior) de cada meia-aresta das faces (3m,) e os pares (3m, 2)."""
+    pares = np.concatenate((faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]))
+    return pares.min(axis=1) * np.int64(n) + pares.max(axis=1), pares
+
+
+def _arestas(faces, n):
+    """
+    Chaves ordenadas das arestas únicas e o número de faces de cada uma. Ordenar e
+    comparar vizinhos é bem mais rápido que np.unique (com ou sem axis=0) nos
+    milhões de arestas de uma varredura.
+    """
+    chaves = np.sort(_chaves_arestas(faces, n)[0])
+    inicio = np.flatnonzero(np.r_[True, chaves[1:] != chaves[:-1]])
+    return chaves[inicio], np.diff(np.r_[inicio, len(chaves)])
+
+
+def _elo_valido(idx, a, b, faces_na_aresta, na_borda, n):
+    """
+    Condição de elo dos colapsos `idx` (com pontas distintas entre si): os
+    vizinhos comuns de a e b têm de ser só os vértices opostos das faces da
+    aresta (2 no interior, 1 na borda), senão o colapso cola duas faces ou
+    deixa uma aresta com três. Uma aresta interior com as duas pontas na
+    borda também é recusada (estrangularia a malha num vértice).
+    """
+    dono = np.full(n, -1)
+    dono[a[idx]] = idx
+    dono[b[idx]] = idx
+    # arestas que tocam uma ponta de colapso, nos dois sentidos: (ponta, vizinho)
+    toca = (dono[a] >= 0) | (dono[b] >= 0)
+    x = np.concatenate((a[toca], b[toca]))
+    y = np.concatenate((b[toca], a[toca]))
+    e = dono[x]
+    manter = (e >= 0) & (dono[y] != e)  # sem a própria aresta do colapso
+    e, y = e[manter], y[manter]
+    # vizinho comum = o mesmo (colapso, vizinho) vindo das duas pontas
+    chaves = np.sort(e * np.int64(n) + y)
+    repetida = chaves[1:][chaves[1:] == chaves[:-1]]
+    comuns = np.bincount(repetida // n, minlength=len(a))[idx]
+    interior = faces_na_aresta[idx] > 1
+    return (comuns == faces_na_aresta[idx]) & ~(interior & na_borda[a[idx]] & na_borda[b[idx]])
+
+
+def _validar_colapsos(vertices, faces, a, b, pos, escolhida, n):
+    """
+    Com todos os colapsos escolhidos aplicados juntos, descarta os que
+    invertem alguma face ou deixam uma aresta com mais de duas faces (ou
+    faces repetidas). Descartar um colapso muda o resultado dos vizinhos,
+    então repete até estabilizar. Altera `escolhida`.
+
+    Returns:
+        np.ndarray: índices dos colapsos descartados
+    """
+    aresta_do_vertice = np.full(n, -1)
+    descartados = []
+    while True:
+        idx = np.flatnonzero(escolhida)
+        aresta_do_vertice[a[idx]] = idx
+        aresta_do_vertice[b[idx]] = idx
+        ids = aresta_do_vertice[faces]
+        # faces com as duas pontas de uma aresta somem no colapso; as demais que a tocam mudam
+        some = (((ids[:, 0] == ids[:, 1]) & (ids[:, 0] >= 0)) | ((ids[:, 1] == ids[:, 2]) & (ids[:, 1] >= 0))
+                | ((ids[:, 0] == ids[:, 2]) & (ids[:, 0] >= 0)))
+        mudam = (ids >= 0).any(axis=1) & ~some
+        faces_m, ids_m = faces[mudam], ids[mudam]
+        antes = vertices[faces_m]
+        depois = np.where((ids_m >= 0)[..., None], pos[np.maximum(ids_m, 0)], antes)
+        n_antes = np.cross(antes[:, 1] - antes[:, 0], antes[:, 2] - antes[:, 0])
+        n_depois = np.cross(depois[:, 1] - depois[:, 0], depois[:, 2] - depois[:, 0])
+        invertida = ((n_antes * n_depois).sum(axis=1)
+                     <= 0.1 * np.linalg.norm(n_antes, axis=1) * np.linalg.norm(n_depois, axis=1))
+        ruins = [ids_m[invertida].ravel()]
+
+        # variedade: as arestas com uma ponta colapsada só aparecem nas faces que mudam
+        apos = np.where(ids_m >= 0, a[np.maximum(ids_m, 0)], faces_m)
+        chaves, pares = _chaves_arestas(apos, n)
+        toca = (aresta_do_vertice[pares] >= 0).any(axis=1)
+        chaves, pares = chaves[toca], pares[toca]
+        ordem = np.argsort(chaves, kind="stable")
+        k = chaves[ordem]
+        inicio = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        excesso = np.repeat(np.diff(np.r_[inicio, len(k)]) > 2, np.diff(np.r_[inicio, len(k)]))
+        ruins.append(aresta_do_vertice[pares[ordem[excesso]]].ravel())
+        ordenadas = np.sort(apos, axis=1)
+        chave_face = (ordenadas[:, 0] * np.int64(n) + ordenadas[:, 1]) * np.int64(n) + ordenadas[:, 2]
+        ordem = np.argsort(chave_face)
+        repetida = chave_face[ordem][1:] == chave_face[ordem][:-1]
+        ruins.append(ids_m[ordem[1:][repetida]].ravel())
+
+        aresta_do_vertice[a[idx]] = -1
+        aresta_do_vertice[b[idx]] = -1
+        ruins = np.concatenate(ruins)
+        ruins = np.unique(ruins[ruins >= 0])
+        if len(ruins) == 0:
+            return np.concatenate(descartados) if descartados else ruins
+        escolhida[ruins] = False
+        descartados.append(ruins)
+
+
+def limpar_malha(vertices, faces):
+    """Remove vértices não usados (ex.: posições NaN da grade) e faces degeneradas."""
+    faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])]
+    usado = np.zeros(len(vertices), dtype=bool)
+    usado[faces] = True
+    novo_indice = np.cumsum(usado) - 1
+    return vertices[usado], novo_indice[faces]
+
+
+@cronometrar()
+def decimar_malha(vertices, faces, alvo_triangulos=None, erro_max=None, fracao_rodada=0.5, max_rodadas=200,
+                  max_tentativas=16, emparelhamentos=4):
+    """
+    Reduz a malha até `alvo_triangulos` e/ou enquanto o erro de cada colapso
+    (raiz do custo quádrico, mm) ficar abaixo de `erro_max`.
+
+    Args:
+        vertices (np.ndarray): (n, 3)
+        faces (np.ndarray): (m, 3) índices em vertices
+        alvo_triangulos (int): Número de triângulos desejado.
+        erro_max (float): Maior erro geométrico aceito por colapso (mm).
+        fracao_rodada (float): Fração das arestas mais baratas consideradas em cada rodada.
+        max_tentativas (int): Seleções por rodada quando as anteriores são todas recusadas.
+        emparelhamentos (int): Passadas de escolha de mínimos locais em cada seleção.
+
+    Returns:
+        tuple: (vertices, faces, info) com info = {'triangulos_antes', 'triangulos_depois',
+            'rodadas', 'erro_quadrico_mm', 'alvo_atingido' (None sem alvo),
+            'motivo_parada' ('alvo', 'erro_max', 'sem_colapso_valido' ou 'max_rodadas')}
+    """
+    if alvo_triangulos is None and erro_max is None:
+        raise ValueError("Informe alvo_triangulos e/ou erro_max")
+    vertices, faces = limpar_malha(np.asarray(vertices, dtype=float), np.asarray(faces))
+    antes = len(faces)
+    alvo = alvo_triangulos or 0
+    limite = np.inf if erro_max is None else erro_max**2
+
+    # quádricas iniciais: planos das faces + planos perpendiculares nas bordas
+    n_vert = len(vertices)
+    normais = _normais(vertices, faces)
+    q_faces = _quadricas_planos(normais, vertices[faces[:, 0]])
+    q = _acumular(faces.ravel(), np.repeat(q_faces, 3, axis=0), n_vert)
+
+    # arestas de borda: meias-arestas sem par
+    chaves, pares = _chaves_arestas(faces, n_vert)
+    ordem = np.argsort(chaves)
+    k = chaves[ordem]
+    borda = np.empty(len(k), dtype=bool)
+    borda[ordem] = np.r_[True, k[1:] != k[:-1]] & np.r_[k[:-1] != k[1:], True]
+    if borda.any():
+        u, v = pares[borda, 0], pares[borda, 1]
+        normal_face = np.tile(normais, (3, 1))[borda]
+        q_borda = _quadricas_planos(np.cross(vertices[v] - vertices[u], normal_face), vertices[u], PESO_BORDA)
+        q += _acumular(np.concatenate((u, v)), np.concatenate((q_borda, q_borda)), n_vert)
+
+    rng = np.random.default_rng(0)
+    erro_maximo = 0.0
+    rodada = 0
+    motivo = "alvo" if alvo else "erro_max"
+    # custos da rodada anterior: os índices dos vértices não mudam entre rodadas,
+    # então só as arestas que tocam um vértice movido precisam ser recalculadas
+    alterado = np.ones(n_vert, dtype=bool)
+    chaves_ant = None
+    for rodada in range(1, max_rodadas + 1):
+        if len(faces) <= alvo: break
+        if len(faces) < n_vert // 2:
+            # a maioria dos vértices já saiu: reindexa, para as rodadas seguintes não
+            # pagarem pelo tamanho original (os custos são recalculados uma vez)
+            usado = np.zeros(n_vert, dtype=bool)
+            usado[faces] = True
+            novo_indice = np.cumsum(usado) - 1
+            vertices, q, faces = vertices[usado], q[usado], novo_indice[faces]
+            n_vert = len(vertices)
+            alterado = np.ones(n_vert, dtype=bool)
+            chaves_ant = None
+        chaves, faces_na_aresta = _arestas(faces, n_vert)
+        a, b = chaves // n_vert, chaves % n_vert
+        recalcular = alterado[a] | alterado[b]
+        if chaves_ant is None:
+            pos, custo = np.empty((len(chaves), 3)), np.empty(len(chaves))
+        else:
+            j = np.minimum(np.searchsorted(chaves_ant, chaves), len(chaves_ant) - 1)
+            pos, custo = pos_ant[j], custo_ant[j]
+        r = np.flatnonzero(recalcular)
+        pos[r], custo[r] = _melhor_posicao(q[a[r]] + q[b[r]], vertices[a[r]], vertices[b[r]])
+        chaves_ant, pos_ant, custo_ant = chaves, pos, custo
+
+        # dentro do erro máximo; primeiro só as arestas mais baratas da rodada
+        dentro = custo <= limite
+        if not dentro.any():
+            motivo = "erro_max"
+            break
+        candidata = custo <= min(np.quantile(custo, fracao_rodada), limite)
+
+        # posição de cada aresta na ordem de custo; empates (comuns em regiões planas)
+        # desfeitos ao acaso, o que dá muito mais mínimos locais por rodada
+        ordem = np.full(len(chaves), np.iinfo(np.int64).max)
+        idx_cand = np.flatnonzero(dentro)
+        custo_cand = np.round(custo[idx_cand], 12)
+        ordem[idx_cand[np.lexsort((rng.random(len(idx_cand)), custo_cand))]] = np.arange(len(idx_cand))
+        na_borda = np.zeros(n_vert, dtype=bool)
+        na_borda[a[faces_na_aresta == 1]] = True
+        na_borda[b[faces_na_aresta == 1]] = True
+        faltam = -(-(len(faces) - alvo) // 2) if alvo else len(chaves)  # cada colapso remove ~2 faces
+
+        # cada aresta escolhida é a mais barata nas suas duas pontas (nenhum vértice participa
+        # de dois colapsos na mesma rodada). Se a condição de elo ou a validação recusar todas,
+        # tenta de novo sem as recusadas, e depois com todas as arestas dentro do erro máximo:
+        # senão a mais barata de um vértice, se inválida, o bloquearia para sempre.
+        escolhida = np.zeros(len(chaves), dtype=bool)
+        recusada = np.zeros(len(chaves), dtype=bool)
+        tentativa = np.zeros(len(chaves), dtype=np.int8)
+        usado = np.zeros(n_vert, dtype=bool)
+        for _ in range(max_tentativas):
+            restam = faltam - np.count_nonzero(escolhida)
+            if restam <= 0: break
+            usado[:] = False
+            usado[a[escolhida]] = usado[b[escolhida]] = True
+            livre = candidata & ~recusada & ~usado[a] & ~usado[b]
+            if not livre.any():
+                if candidata is dentro: break
+                candidata = dentro
+                continue
+            # mínimos locais, e de novo entre as arestas cujas pontas seguem livres: senão um
+            # vértice de grau alto (centro de uma tampa) trava em cadeia toda a vizinhança
+            novas = []
+            for _ in range(emparelhamentos):
+                minimo_vert = np.full(n_vert, np.iinfo(np.int64).max)
+                np.minimum.at(minimo_vert, a[livre], ordem[livre])
+                np.minimum.at(minimo_vert, b[livre], ordem[livre])
+                minimas = np.flatnonzero(livre & (minimo_vert[a] == ordem) & (minimo_vert[b] == ordem))
+                if len(minimas) == 0: break
+                novas.append(minimas)
+                usado[a[minimas]] = usado[b[minimas]] = True
+                livre = livre & ~usado[a] & ~usado[b]
+            novas = np.concatenate(novas)
+            valida = _elo_valido(novas, a, b, faces_na_aresta, na_borda, n_vert)
+            recusada[novas[~valida]] = True
+            # não passar do alvo: corta antes de validar, para validar o que vai ser aplicado
+            novas = novas[valida]
+            cortada = len(novas) > restam
+            # perto do alvo valida uma folga das mais baratas (algumas serão recusadas),
+            # corta no alvo e valida de novo o que sobrou, que é o que vai ser aplicado
+            novas = novas[np.argsort(custo[novas], kind="stable")][:max(restam, min(4 * restam, restam + 64))]
+            escolhida[novas] = True
+            descartadas = _validar_colapsos(vertices, faces, a, b, pos, escolhida, n_vert)
+            while np.count_nonzero(escolhida) > faltam:
+                idx = np.flatnonzero(escolhida)
+                escolhida[idx[np.argsort(custo[idx], kind="stable")][faltam:]] = False
+                descartadas = np.union1d(descartadas, _validar_colapsos(vertices, faces, a, b, pos, escolhida,
+                                                                        n_vert))
+            # recusadas na posição ótima (ruído a puxa para fora da superfície): tentam de novo
+            # colapsando na ponta mais barata, depois na outra ponta e por fim no ponto médio
+            outra = descartadas[tentativa[descartadas] < 3]
+            if len(outra):
+                q_outra = q[a[outra]] + q[b[outra]]
+                pontas = np.stack((vertices[a[outra]], vertices[b[outra]],
+                                   (vertices[a[outra]] + vertices[b[outra]]) / 2))
+                custos = np.stack([_custo(q_outra, p) for p in pontas])
+                mais_barata = custos[1] < custos[0]
+                escolha = np.choose(tentativa[outra], (mais_barata, ~mais_barata, np.full(len(outra), 2)))
+                linhas = np.arange(len(outra))
+                pos[outra], custo[outra] = pontas[escolha, linhas], np.maximum(custos[escolha, linhas], 0)
+                tentativa[outra] += 1
+                outra = outra[custo[outra] <= limite]
+            recusada[np.setdiff1d(descartadas, outra)] = True
+            # perto do alvo o corte deixa poucas; as recusadas são repostas pelas seguintes
+            if escolhida.any() and not cortada: break
+        idx = np.flatnonzero(escolhida)
+        if len(idx) == 0:
+            motivo = "sem_colapso_valido"
+            break
+
+        # aplica os colapsos: b -> a
+        erro_maximo = max(erro_maximo, float(custo[idx].max()))
+        remap = np.arange(n_vert)
+        remap[b[idx]] = a[idx]
+        vertices[a[idx]] = pos[idx]
+        q[a[idx]] += q[b[idx]]
+        alterado[:] = False
+        alterado[a[idx]] = True
+        faces = remap[faces]
+        faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])]
+    else:
+        if len(faces) > alvo: motivo = "max_rodadas"
+
+    vertices, faces = limpar_malha(vertices, faces)
+    info = {
+        "triangulos_antes": antes,
+        "triangulos_depois": len(faces),
+        "rodadas": rodada,
+        "erro_quadrico_mm": float(np.sqrt(erro_maximo)),
+        "alvo_atingido": len(faces) <= alvo if alvo else None,
+        "motivo_parada": motivo,
+    }
+    logger.debug("Decimação: %d -> %d triângulos (%.1f%%) em %d rodadas, erro quádrico máx. %.3f mm",
+                 antes, len(faces), 100 * len(faces) / antes, rodada, info["erro_quadrico_mm"])
+    if alvo and len(faces) > alvo and motivo != "erro_max":
+        logger.warning("Decimação parou em %d triângulos, acima do alvo de %d (%s)",
+                       len(faces), alvo, "nenhum colapso válido restante" if motivo == "sem_colapso_valido"
+                       else f"limite de {max_rodadas} rodadas")
+    return vertices, faces, info
+
+
+# ==================================================
+# DESVIO EM RELAÇÃO À MALHA ORIGINAL
+# ==================================================
+
+def ponto_mais_proximo_triangulo(p, a, b, c):
+    """Ponto do triângulo (a, b, c) mais próximo de cada p (vetorizado; Ericson, 5.1.5)."""
+    ab, ac, ap = b - a, c - a, p - a
+    d1, d2 = (ab * ap).sum(-1), (ac * ap).sum(-1)
+    bp = p - b
+    d3, d4 = (ab * bp).sum(-1), (ac * bp).sum(-1)
+    cp = p - c
+    d5, d6 = (ab * cp).sum(-1), (ac * cp).sum(-1)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # interior por padrão
+        soma = va + vb + vc
+        v, w = vb / soma, vc / soma
+        q = a + ab * v[..., None] + ac * w[..., None]
+        casos = [
+            ((d1 <= 0) & (d2 <= 0), a),
+            ((d3 >= 0) & (d4 <= d3), b),
+            ((d6 >= 0) & (d5 <= d6), c),
+            ((vc <= 0) & (d1 >= 0) & (d3 <= 0), a + ab * (d1 / (d1 - d3))[..., None]),
+            ((vb <= 0) & (d2 >= 0) & (d6 <= 0), a + ac * (d2 / (d2 - d6))[..., None]),
+            ((va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0),
+             b + (c - b) * ((d4 - d3) / ((d4 - d3) + (d5 - d6)))[..., None]),
+        ]
+    # aplica na ordem inversa para que os primeiros casos prevaleçam
+    for mascara, ponto in reversed(casos):
+        q = np.where(mascara[..., None], ponto, q)
+    return q
+
+
+def distancia_ponto_triangulo(p, a, b, c):
+    """Distância de cada ponto p ao triângulo (a, b, c) correspondente."""
+    return np.linalg.norm(p - ponto_mais_proximo_triangulo(p, a, b, c), axis=-1)
+
+
+def distancia_pontos_malha(pontos, vertices, faces):
+    """
+    Distância (sem sinal) de cada ponto à malha, até o triângulo mais
+    próximo de fato (índice exato de controle_qualidade.Referencia).
+    """
+    from controle_qualidade import Referencia
+
+    return np.abs(Referencia(vertices[faces]).distancias(np.asarray(pontos, dtype=float)))
+
+
+if __name__ == "__main__":
+    # Decimação de uma varredura sintética da ampulheta (256 pts x ~100 camadas)
+    import time
+    from gerador_sintetico import SOLIDOS, gerar_varredura
+    from reconstrucao import reconstruir_dataframe
+    from exportar_stl import malha_cilindrica
+
+    for pts, altura in ((256, 1.0), (1024, 0.1)):
+        df = gerar_varredura(SOLIDOS["ampulheta"](), pts, altura_camada=altura, inteiro=False)
+        pontos = reconstruir_dataframe(df, 0, altura, 157, 5, 1.0)
+        v, f = malha_cilindrica(pontos)
+        for kwargs in ({"alvo_triangulos": len(f) // 10}, {"erro_max": 0.05}):
+            inicio = time.perf_counter()
+            v2, f2, info = decimar_malha(v, f, **kwargs)
+            tempo = time.perf_counter() - inicio
+            amostra = v[np.isfinite(v).all(axis=1)][::max(1, len(v) // 200000)]
+            desvio = distancia_pontos_malha(amostra, v2, f2)
+            print(f"{len(f):>8} -> {len(f2):>7} triângulos  {kwargs}  {tempo:6.2f} s  "
+                  f"desvio máx. {desvio.max():.3f} mm  médio {desvio.mean():.4f} mm")
@@ -2,62 +2,214 @@ import numpy as np
 from stl import mesh
 import pandas as pd
 from logger_setup import logger
+from instrumentacao import cronometrar
 
-def dataframe_para_stl(df, nome_arquivo_saida):
+
+# ==================================================
+# GRADE CILÍNDRICA (camada x ângulo)
+# ==================================================
+
+def inferir_pts_por_camada(angulos):
+    """Tamanho da grade angular: 2*pi dividido pelo menor espaçamento entre ângulos distintos."""
+    unicos = np.unique(np.round(np.mod(angulos, 2 * np.pi), 6))
+    if len(unicos) < 2: return max(1, len(unicos))
+    passo = np.diff(np.r_[unicos, unicos[0] + 2 * np.pi]).min()
+    return int(round(2 * np.pi / passo))
+
+
+def montar_grade(df, pts_por_camada=None, desvio_max=None):
     """
-    Converte pontos cartesianos de um DataFrame em uma malha STL.
+    Distribui os pontos numa grade (camada x ângulo).
 
-    Parâmetros:
-    -----------
-    df : pandas.DataFrame
-        Deve conter colunas ['Camada', 'X_mm', 'Y_mm', 'Z_mm']
-    nome_arquivo_saida : str
-        Nome do arquivo STL de saída (ex: 'saida.stl')
+    O ângulo de cada ponto vem da coluna Angulo_rad (ângulo de aquisição) ou,
+    em _cart.csv antigos, de atan2(Y, X). Pontos com Desvio_mm acima de
+    `desvio_max` contam como ausentes.
+
+    Returns:
+        tuple: (grade, z_camadas, pts_por_camada), grade (camadas, pts, 3) com NaN nas ausências
+    """
+    camadas_unicas, linha = np.unique(df['Camada'].to_numpy(), return_inverse=True)
+    xyz = df[['X_mm', 'Y_mm', 'Z_mm']].to_numpy(dtype=float)
+    if 'Angulo_rad' in df.columns:
+        angulos = df['Angulo_rad'].to_numpy(dtype=float)
+    else:
+        angulos = np.arctan2(xyz[:, 1], xyz[:, 0])
+    if pts_por_camada is None:
+        pts_por_camada = inferir_pts_por_camada(angulos)
+    coluna = np.round(np.mod(angulos, 2 * np.pi) * pts_por_camada / (2 * np.pi)).astype(int) % pts_por_camada
+
+    validos = np.isfinite(xyz).all(axis=1)
+    if desvio_max is not None and 'Desvio_mm' in df.columns:
+        validos &= ~(df['Desvio_mm'].to_numpy(dtype=float) > desvio_max)
+
+    grade = np.full((len(camadas_unicas), pts_por_camada, 3), np.nan)
+    grade[linha[validos], coluna[validos]] = xyz[validos]
+
+    z_camadas = np.full(len(camadas_unicas), np.nan)
+    z_camadas[linha] = xyz[:, 2]
+    return grade, z_camadas, pts_por_camada
+
+
+def preencher_lacunas(grade, z_camadas, max_lacuna=3):
+    """
+    Preenche, em cada camada, sequências de até `max_lacuna` posições vazias
+    interpolando o raio entre os vizinhos válidos (circularmente); lacunas
+    maiores ficam como buracos. Tudo vetorizado sobre a grade inteira.
+
+    Returns:
+        np.ndarray: nova grade (camadas, pts, 3)
+    """
+    n_camadas, n = grade.shape[:2]
+    if max_lacuna <= 0 or n < 2: return grade.copy()
+
+    raio = np.hypot(grade[..., 0], grade[..., 1])
+    valido = np.isfinite(raio)
+
+    # índice do válido anterior e do próximo, numa grade repetida 3x para dar a volta
+    idx = np.arange(3 * n)
+    rep = np.tile(valido, 3)
+    anterior = np.maximum.accumulate(np.where(rep, idx, -1), axis=1)[:, n:2 * n]
+    proximo = np.minimum.accumulate(np.where(rep, idx, 3 * n)[:, ::-1], axis=1)[:, ::-1][:, n:2 * n]
+    centro = idx[n:2 * n]
+
+    tamanho = proximo - anterior - 1
+    preencher = ~valido & (anterior >= 0) & (proximo < 3 * n) & (tamanho <= max_lacuna)
+
+    r_ant = np.take_along_axis(raio, np.clip(anterior, 0, 3 * n - 1) % n, axis=1)
+    r_prox = np.take_along_axis(raio, np.clip(proximo, 0, 3 * n - 1) % n, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = (centro - anterior) / (proximo - anterior)
+    r = r_ant + t * (r_prox - r_ant)
+
+    theta = 2 * np.pi * np.arange(n) / n
+    saida = grade.copy()
+    saida[..., 0] = np.where(preencher, r * np.cos(theta), grade[..., 0])
+    saida[..., 1] = np.where(preencher, r * np.sin(theta), grade[..., 1])
+    saida[..., 2] = np.where(preencher, z_camadas[:, None], grade[..., 2])
+    return saida
+
+
+def malha_cilindrica(df, max_lacuna=3, tampas=False, pts_por_camada=None, desvio_max=None):
+    """
+    Malha triangular da superfície lateral sobre a grade (camada x ângulo).
+
+    Cada célula (camada i, ângulo j) liga-se a (i+1, j), (i+1, j+1) e (i, j+1)
+    pela posição real na volta, não pela ordem no DataFrame: uma leitura
+    perdida não desloca as vizinhas. Quadriláteros com um vértice ausente
+    viram um triângulo; com dois ou mais, um buraco. Normais para fora.
+
+    Args:
+        df (pd.DataFrame): colunas ['Camada', 'X_mm', 'Y_mm', 'Z_mm'] (+ 'Angulo_rad', 'Desvio_mm').
+        max_lacuna (int): Maior sequência de ângulos vazios preenchida por interpolação.
+        tampas (bool): Fecha a primeira e a última camada com um leque a partir do centróide.
+        pts_por_camada (int): Tamanho da grade angular; inferido dos ângulos se None.
+        desvio_max (float): Pontos com Desvio_mm acima disso são tratados como lacunas.
+
+    Returns:
+        tuple: (vertices (n, 3), faces (m, 3) de índices em vertices)
     """
+    grade, z_camadas, n = montar_grade(df, pts_por_camada, desvio_max)
+    grade = preencher_lacunas(grade, z_camadas, max_lacuna)
+    n_camadas = grade.shape[0]
+
+    vertices = grade.reshape(-1, 3)
+    valido = np.isfinite(vertices).all(axis=1)
+
+    # vértices de cada quadrilátero entre as camadas i e i+1
+    i, j = np.meshgrid(np.arange(n_camadas - 1), np.arange(n), indexing="ij")
+    p1 = (i * n + j).ravel()                   # camada atual, ângulo j
+    p2 = ((i + 1) * n + j).ravel()             # camada seguinte, ângulo j
+    p3 = ((i + 1) * n + (j + 1) % n).ravel()   # camada seguinte, ângulo j+1
+    p4 = (i * n + (j + 1) % n).ravel()         # camada atual, ângulo j+1
+    v1, v2, v3, v4 = valido[p1], valido[p2], valido[p3], valido[p4]
+
+    # ordem (1, 3, 2) e afins: normal para fora com ângulo crescente anti-horário e Z para cima
+    faces = [
+        np.column_stack((p1, p3, p2))[v1 & v2 & v3],
+        np.column_stack((p1, p4, p3))[v1 & v3 & v4],
+        np.column_stack((p2, p4, p3))[~v1 & v2 & v3 & v4],
+        np.column_stack((p1, p4, p2))[v1 & v2 & ~v3 & v4],
+    ]
+
+    if tampas and n_camadas > 0:
+        for linha, de_cima in ((0, False), (n_camadas - 1, True)):
+            anel = linha * n + np.arange(n)
+            aresta = valido[anel] & valido[linha * n + (np.arange(n) + 1) % n]
+            if not aresta.any(): continue
+            centro = len(vertices)
+            vertices = np.vstack((vertices, np.nanmean(grade[linha], axis=0)))
+            a, b = anel[aresta], linha * n + (np.arange(n)[aresta] + 1) % n
+            c = np.full(len(a), centro)
+            faces.append(np.column_stack((c, a, b) if de_cima else (c, b, a)))
+
+    return vertices, np.concatenate(faces).astype(np.int64)
 
-    # Ordena para garantir consistência
-    df = df.sort_values(by=['Camada'])
 
-    faces = []
+def simplificar(vertices, faces, alvo_triangulos=None, erro_max=None, amostras=200000):
+    """
+    Decima a malha e mede o desvio dos vértices originais (até `amostras`
+    deles) em relação à malha simplificada.
+
+    Returns:
+        tuple: (vertices, faces, info) com info de decimar_malha mais
+            'desvio_max_mm' e 'desvio_medio_mm'
+    """
+    from decimacao import decimar_malha, distancia_pontos_malha
 
-    # Itera camada por camada
-    camadas = df['Camada'].unique()
-    for i in range(len(camadas)-1):
-        camada_atual = df[df['Camada'] == camadas[i]][['X_mm', 'Y_mm', 'Z_mm']].to_numpy()
-        camada_prox = df[df['Camada'] == camadas[i+1]][['X_mm', 'Y_mm', 'Z_mm']].to_numpy()
+    novos_vertices, novas_faces, info = decimar_malha(vertices, faces, alvo_triangulos, erro_max)
+    originais = vertices[np.unique(faces)]
+    originais = originais[::max(1, len(originais) // amostras)]
+    desvio = distancia_pontos_malha(originais, novos_vertices, novas_faces)
+    info["desvio_max_mm"] = float(desvio.max())
+    info["desvio_medio_mm"] = float(desvio.mean())
+    logger.info("Malha simplificada: %d -> %d triângulos (%.1f%%), desvio máx. %.3f mm, médio %.3f mm",
+                info["triangulos_antes"], info["triangulos_depois"],
+                100 * info["triangulos_depois"] / max(1, info["triangulos_antes"]),
+                info["desvio_max_mm"], info["desvio_medio_mm"])
+    return novos_vertices, novas_faces, info
 
-        # Garante mesma quantidade de pontos
-        n = min(len(camada_atual), len(camada_prox))
-        camada_atual = camada_atual[:n]
-        camada_prox = camada_prox[:n]
 
-        # Conecta os pontos entre as camadas
-        for j in range(n):
-            p1 = camada_atual[j]
-            p2 = camada_prox[j]
-            p3 = camada_prox[(j+1) % n]
-            p4 = camada_atual[(j+1) % n]
+@cronometrar()
+def dataframe_para_stl(df, nome_arquivo_saida, max_lacuna=3, tampas=False, pts_por_camada=None,
+                       desvio_max=None, alvo_triangulos=None, erro_max=None):
+    """
+    Converte pontos cartesianos de um DataFrame em uma malha STL.
 
-            # Duas faces por quadrilátero
-            faces.append([p1, p2, p3])
-            faces.append([p1, p3, p4])
+    Parâmetros:
+    -----------
+    df : pandas.DataFrame
+        Deve conter colunas ['Camada', 'X_mm', 'Y_mm', 'Z_mm']; usa também
+        'Angulo_rad' e 'Desvio_mm', se existirem (ver malha_cilindrica)
+    nome_arquivo_saida : str
+        Nome do arquivo STL de saída (ex: 'saida.stl')
+    max_lacuna, tampas, pts_por_camada, desvio_max :
+        Ver malha_cilindrica
+    alvo_triangulos, erro_max :
+        Se algum for dado, a malha é simplificada antes de salvar (ver
+        decimacao.decimar_malha) e a redução e o desvio introduzido vão para o log
 
-    # Concatena em um único array
-    faces_np = np.array(faces)
+    Retorna:
+    --------
+    stl.mesh.Mesh
+    """
+    vertices, faces = malha_cilindrica(df, max_lacuna, tampas, pts_por_camada, desvio_max)
+    if alvo_triangulos is not None or erro_max is not None:
+        vertices, faces, _ = simplificar(vertices, faces, alvo_triangulos, erro_max)
 
     # Cria malha STL
-    stl_mesh = mesh.Mesh(np.zeros(faces_np.shape[0], dtype=mesh.Mesh.dtype))
-    for i, f in enumerate(faces_np):
-        stl_mesh.vectors[i] = f
+    stl_mesh = mesh.Mesh(np.zeros(len(faces), dtype=mesh.Mesh.dtype))
+    stl_mesh.vectors[:] = vertices[faces]
 
     # Salva
     stl_mesh.save(nome_arquivo_saida)
+    logger.debug("STL com %d triângulos salvo em %s", len(faces), nome_arquivo_saida)
+    return stl_mesh
 
 if __name__ == "__main__":
     arquivo_csv = "tests/ampulheta/ampulheta_sim_cart.csv"
-    
+
     df = pd.read_csv(arquivo_csv)
 
     # Gerar STL
     arquivo_saida = arquivo_csv.replace(".csv", ".stl")
-    dataframe_para_stl(df, arquivo_saida)
\ No newline at end of file
+    dataframe_para_stl(df, arquivo_saida)
@@ -0,0 +1,237 @@
+"""
+Gerador de varreduras sintéticas a partir de sólidos analíticos.
+
+Cada sólido é lançado contra o raio do sensor (a `dist_sensor` do eixo,
+deslocado `alin_horizontal` na horizontal), para cada ângulo da base e
+cada camada, produzindo o mesmo CSV bruto do scanner:
+Camada, Ponto, Angulo_rad, Distancia_mm.
+
+Uso:
+    python gerador_sintetico.py ampulheta saida.csv --pts 128 --camadas 16 --ruido 0.5
+"""
+import argparse
+import numpy as np
+import pandas as pd
+
+# ==================================================
+# SÓLIDOS
+# ==================================================
+# Um sólido é um dict com "nome", "altura" (mm) e uma seção transversal:
+#   "raio": f(z) -> raio (mm) para sólidos de revolução, ou
+#   "poligono": array (k, 2) de vértices, para prismas.
+
+def cilindro(raio=40.0, altura=100.0):
+    return {"nome": "cilindro", "altura": altura,
+            "raio": lambda z: np.full_like(z, raio, dtype=float)}
+
+
+def cone(raio_base=50.0, raio_topo=20.0, altura=100.0):
+    return {"nome": "cone", "altura": altura,
+            "raio": lambda z: raio_base + (raio_topo - raio_base) * z / altura}
+
+
+def ampulheta(raio_max=45.0, raio_min=15.0, altura=100.0):
+    return {"nome": "ampulheta", "altura": altura,
+            "raio": lambda z: raio_min + (raio_max - raio_min) * np.abs(2 * z / altura - 1)}
+
+
+def prisma_estrela(pontas=5, raio_externo=50.0, raio_interno=25.0, altura=100.0):
+    ang = np.arange(2 * pontas) * np.pi / pontas
+    raios = np.where(np.arange(2 * pontas) % 2 == 0, raio_externo, raio_interno)
+    vertices = np.column_stack((raios * np.cos(ang), raios * np.sin(ang)))
+    return {"nome": "estrela", "altura": altura, "poligono": vertices}
+
+
+SOLIDOS = {
+    "cilindro": cilindro,
+    "cone": cone,
+    "ampulheta": ampulheta,
+    "estrela": prisma_estrela,
+}
+
+
+# ==================================================
+# LANÇAMENTO DE RAIOS
+# ==================================================
+
+def _distancia_circulo(raio, dist_sensor, alin_horizontal):
+    # raio do sensor: (dist_sensor - t, alin); |p|² = r² -> t = ds - sqrt(r² - alin²)
+    dentro = raio**2 - alin_horizontal**2
+    return np.where(dentro >= 0, dist_sensor - np.sqrt(np.maximum(dentro, 0)), np.nan)
+
+
+def _lancar_raios(vertices, origem, direcao):
+    # menor t >= 0 em que origem + t*direcao cruza uma aresta do polígono
+    a = vertices[None, :, :]                                               # (1, k, 2)
+    aresta = np.roll(vertices, -1, axis=0)[None, :, :] - a
+    def cruz(u, v): return u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0]
+    den = cruz(direcao, aresta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = cruz(a - origem, aresta) / den
+        u = cruz(a - origem, direcao) / den
+    t = np.where((np.abs(den) > 1e-12) & (t >= 0) & (u >= 0) & (u <= 1), t, np.inf)
+    t = t.min(axis=1)
+    return np.where(np.isfinite(t), t, np.nan)
+
+
+def _distancia_poligono(vertices, angulos, dist_sensor, alin_horizontal):
+    # no referencial do objeto o sensor gira +ang (mesma convenção de reconstruir_pontos)
+    c, s = np.cos(angulos)[:, None], np.sin(angulos)[:, None]
+    origem = np.stack((dist_sensor * c - alin_horizontal * s,
+                       dist_sensor * s + alin_horizontal * c), axis=-1)    # (n, 1, 2)
+    direcao = np.stack((-c, -s), axis=-1)                                  # (n, 1, 2)
+    return _lancar_raios(vertices, origem, direcao)
+
+
+# ==================================================
+# GEOMETRIA DE REFERÊNCIA
+# ==================================================
+
+def raio_verdadeiro(solido, angulos, z):
+    """
+    Raio da superfície do sólido na direção `angulos` (a partir do eixo) e altura `z`.
+
+    Args:
+        angulos, z (np.ndarray): Mesma forma; ângulo em rad (atan2(y, x)) e Z em mm.
+
+    Returns:
+        np.ndarray: raio (mm); NaN fora da altura do sólido.
+    """
+    angulos, z = np.broadcast_arrays(np.asarray(angulos, float), np.asarray(z, float))
+    if "raio" in solido:
+        raio = solido["raio"](z).astype(float)
+    else:
+        direcao = np.stack((np.cos(angulos), np.sin(angulos)), axis=-1).reshape(-1, 1, 2)
+        raio = _lancar_raios(solido["poligono"], np.zeros((1, 1, 2)), direcao).reshape(angulos.shape)
+    return np.where((z >= 0) & (z <= solido["altura"]), raio, np.nan)
+
+
+def area_secao(solido, z):
+    """Área da seção transversal (mm²) em cada altura de `z`."""
+    z = np.asarray(z, dtype=float)
+    if "raio" in solido:
+        area = np.pi * solido["raio"](z) ** 2
+    else:
+        x, y = solido["poligono"].T
+        area = np.full_like(z, 0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))))
+    return np.where((z >= 0) & (z <= solido["altura"]), area, np.nan)
+
+
+def volume_verdadeiro(solido, z_min=0.0, z_max=None, amostras=20001):
+    """Volume (mm³) do sólido entre z_min e z_max (integração numérica fina da área)."""
+    z_max = solido["altura"] if z_max is None else z_max
+    z = np.linspace(z_min, z_max, amostras)
+    area = area_secao(solido, z)
+    return float(np.sum((area[1:] + area[:-1]) / 2 * np.diff(z)))
+
+
+def distancia_superficie(solido, xs, ys, zs):
+    """
+    Distância com sinal (mm, positiva fora) de cada ponto à superfície lateral do sólido.
+
+    Sólidos de revolução: distância ao perfil r(z) no plano (r, z), com o perfil
+    amostrado a cada 0,01 mm. Prismas: distância exata às arestas do polígono.
+    """
+    from scipy.spatial import cKDTree
+
+    xs, ys, zs = (np.asarray(v, dtype=float) for v in (xs, ys, zs))
+    if "raio" in solido:
+        z_perfil = np.linspace(0, solido["altura"], int(solido["altura"] / 0.01) + 1)
+        perfil = np.column_stack((solido["raio"](z_perfil), z_perfil))
+        r = np.hypot(xs, ys)
+        dist, _ = cKDTree(perfil).query(np.column_stack((r, zs)))
+        return np.where(r >= solido["raio"](np.clip(zs, 0, solido["altura"])), dist, -dist)
+
+    a = solido["poligono"]
+    aresta = np.roll(a, -1, axis=0) - a
+    p = np.column_stack((xs, ys))[:, None, :]                              # (n, 1, 2)
+    t = np.clip(((p - a) * aresta).sum(-1) / (aresta**2).sum(-1), 0, 1)    # (n, k)
+    dist = np.linalg.norm(p - (a + t[..., None] * aresta), axis=-1).min(axis=1)
+    fora = np.hypot(xs, ys) > raio_verdadeiro(solido, np.arctan2(ys, xs), np.clip(zs, 0, solido["altura"]))
+    return np.where(fora, dist, -dist)
+
+
+def amostrar_superficie(solido, n_angulos=720, z_min=0.0, z_max=None, passo_z=0.5):
+    """Pontos (n, 3) sobre a superfície lateral, numa grade regular ângulo x Z."""
+    z_max = solido["altura"] if z_max is None else z_max
+    ang, z = np.meshgrid(np.linspace(0, 2 * np.pi, n_angulos, endpoint=False),
+                         np.arange(z_min, z_max + 1e-9, passo_z))
+    r = raio_verdadeiro(solido, ang, z)
+    return np.column_stack(((r * np.cos(ang)).ravel(), (r * np.sin(ang)).ravel(), z.ravel()))
+
+
+def gerar_varredura(solido, pts_por_camada=128, camadas=None, altura_camada=5.0,
+                    dist_sensor=157.0, alin_horizontal=5.0, ruido_mm=0.0,
+                    taxa_falhas=0.0, inteiro=True, semente=None):
+    """
+    Simula uma varredura completa do sólido.
+
+    Args:
+        solido (dict): Sólido de SOLIDOS (ex.: ampulheta()).
+        pts_por_camada (int): Ângulos por camada.
+        camadas (int): Número de camadas; padrão cobre toda a altura do sólido.
+        altura_camada (float): Passo em Z (mm); a camada c fica em (c-1)*altura_camada.
+        dist_sensor, alin_horizontal (float): Geometria do sensor (mm).
+        ruido_mm (float): Desvio padrão do ruído gaussiano da leitura.
+        taxa_falhas (float): Fração de leituras perdidas (TIMEOUT -> vazio no CSV).
+        inteiro (bool): Arredonda para mm, como o VL53L0X.
+        semente (int): Semente do gerador aleatório.
+
+    Returns:
+        pd.DataFrame: colunas ['Camada', 'Ponto', 'Angulo_rad', 'Distancia_mm']
+    """
+    if camadas is None:
+        camadas = int(solido["altura"] // altura_camada) + 1
+    rng = np.random.default_rng(semente)
+
+    ponto = np.arange(pts_por_camada)
+    angulos = 2 * np.pi * ponto / pts_por_camada
+    z = altura_camada * np.arange(camadas)
+
+    if "raio" in solido:
+        raio = solido["raio"](z)                                            # (camadas,)
+        dist = np.repeat(_distancia_circulo(raio, dist_sensor, alin_horizontal), pts_por_camada)
+    else:
+        por_angulo = _distancia_poligono(solido["poligono"], angulos, dist_sensor, alin_horizontal)
+        dist = np.tile(por_angulo, camadas)
+    dist = dist.astype(float)
+    dist[np.repeat(z > solido["altura"], pts_por_camada)] = np.nan
+
+    if ruido_mm > 0:
+        dist += rng.normal(0, ruido_mm, dist.shape)
+    if taxa_falhas > 0:
+        dist[rng.random(dist.shape) < taxa_falhas] = np.nan
+    if inteiro:
+        dist = np.round(dist)
+
+    return pd.DataFrame({
+        "Camada": np.repeat(np.arange(1, camadas + 1), pts_por_camada),
+        "Ponto": np.tile(ponto, camadas),
+        "Angulo_rad": np.tile(angulos, camadas),
+        "Distancia_mm": pd.array(dist, dtype="Int64") if inteiro else dist,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("solido", choices=sorted(SOLIDOS))
+    parser.add_argument("saida")
+    parser.add_argument("--pts", type=int, default=128)
+    parser.add_argument("--camadas", type=int)
+    parser.add_argument("--altura-camada", type=float, default=5.0)
+    parser.add_argument("--dist-sensor", type=float, default=157.0)
+    parser.add_argument("--alin-hor", type=float, default=5.0)
+    parser.add_argument("--ruido", type=float, default=0.0, help="desvio padrão (mm)")
+    parser.add_argument("--falhas", type=float, default=0.0, help="fração de TIMEOUTs")
+    parser.add_argument("--semente", type=int)
+    args = parser.parse_args()
+
+    df = gerar_varredura(SOLIDOS[args.solido](), args.pts, args.camadas, args.altura_camada,
+                         args.dist_sensor, args.alin_hor, args.ruido, args.falhas,
+                         semente=args.semente)
+    df.to_csv(args.saida, index=False)
+    print(f"{args.saida}: {len(df)} leituras")
+
+
+if __name__ == "__main__":
+    main()
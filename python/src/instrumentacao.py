@@ -0,0 +1,184 @@
+"""
+Cronometragem por etapa do pipeline (serial, motores, CSV, reconstrução,
+suavização, STL, plot) e captura opcional com cProfile/tracemalloc.
+
+Desativada por padrão: o decorador e o gerenciador de contexto custam só
+uma checagem de flag. Ative com a variável de ambiente
+
+    SCANNER_PERFIL=tempos           só os tempos por etapa
+    SCANNER_PERFIL=cprofile         tempos + cProfile da thread principal
+    SCANNER_PERFIL=tracemalloc      tempos + maiores alocações
+    SCANNER_PERFIL=cprofile,tracemalloc
+
+ou chamando ativar(). Ao sair, o resumo da sessão é salvo em JSON em
+tests/perfil/ (e o .prof do cProfile ao lado).
+"""
+import atexit
+import contextlib
+import functools
+import json
+import os
+import time
+from datetime import datetime
+
+_ativo = False
+_tempos = {}      # nome -> lista de durações (s)
+_perfil = None    # cProfile.Profile em execução
+_tracemalloc = False
+_inicio_sessao = None
+_NULO = contextlib.nullcontext()
+
+
+def ativar(cprofile=False, tracemalloc=False):
+    """Liga a cronometragem (e, opcionalmente, cProfile e tracemalloc)."""
+    global _ativo, _perfil, _tracemalloc, _inicio_sessao
+    _ativo = True
+    _inicio_sessao = datetime.now()
+    if cprofile and _perfil is None:
+        import cProfile
+        _perfil = cProfile.Profile()
+        _perfil.enable()
+    if tracemalloc and not _tracemalloc:
+        import tracemalloc as tm
+        tm.start(10)
+        _tracemalloc = True
+
+
+def desativar():
+    global _ativo, _perfil, _tracemalloc
+    _ativo = False
+    if _perfil is not None:
+        _perfil.disable()
+    if _tracemalloc:
+        import tracemalloc as tm
+        tm.stop()
+        _tracemalloc = False
+
+
+def ativo():
+    return _ativo
+
+
+def registrar(nome, duracao):
+    """Registra uma duração (s) para a etapa `nome`."""
+    _tempos.setdefault(nome, []).append(duracao)
+
+
+def medir(nome):
+    """
+    Gerenciador de contexto que cronometra um bloco:
+
+        with medir("escrita_csv"):
+            writer.writerow(...)
+    """
+    if not _ativo: return _NULO
+    return _Cronometro(nome)
+
+
+class _Cronometro:
+    __slots__ = ("nome", "inicio")
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registrar(self.nome, time.perf_counter() - self.inicio)
+        return False
+
+
+def cronometrar(nome=None):
+    """Decorador que cronometra cada chamada da função."""
+    def decorador(func):
+        etapa = nome or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _ativo: return func(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registrar(etapa, time.perf_counter() - inicio)
+        return wrapper
+    return decorador
+
+
+def estatisticas():
+    """
+    Resumo por etapa.
+
+    Returns:
+        dict: {nome: {'n', 'total_s', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'}}
+    """
+    import numpy as np
+
+    resumo = {}
+    for nome, tempos in list(_tempos.items()):
+        t = np.asarray(tempos) * 1000
+        p50, p95, p99 = np.percentile(t, [50, 95, 99])
+        resumo[nome] = {
+            "n": int(t.size),
+            "total_s": float(t.sum() / 1000),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(t.max()),
+        }
+    return resumo
+
+
+def limpar():
+    _tempos.clear()
+
+
+def salvar_json(caminho=None, pasta="tests/perfil"):
+    """
+    Salva o resumo da sessão em JSON (e o .prof do cProfile, se ativo).
+
+    Returns:
+        str | None: Caminho do JSON, ou None se não houver nada a salvar.
+    """
+    if not _tempos and _perfil is None: return None
+    if caminho is None:
+        os.makedirs(pasta, exist_ok=True)
+        caminho = os.path.join(pasta, f"perfil_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+
+    dados = {
+        "inicio": _inicio_sessao.isoformat() if _inicio_sessao else None,
+        "fim": datetime.now().isoformat(),
+        "etapas": estatisticas(),
+    }
+    if _tracemalloc:
+        import tracemalloc as tm
+        atual, pico = tm.get_traced_memory()
+        maiores = tm.take_snapshot().statistics("lineno")[:15]
+        dados["memoria"] = {
+            "atual_mb": atual / 2**20,
+            "pico_mb": pico / 2**20,
+            "maiores_alocacoes": [
+                {"local": str(s.traceback), "kb": s.size / 1024, "blocos": s.count} for s in maiores
+            ],
+        }
+    if _perfil is not None:
+        arquivo_prof = os.path.splitext(caminho)[0] + ".prof"
+        _perfil.create_stats()
+        _perfil.dump_stats(arquivo_prof)
+        dados["cprofile"] = arquivo_prof
+
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
+    return caminho
+
+
+def _ao_sair():
+    if _ativo: salvar_json()
+
+
+_modo = os.environ.get("SCANNER_PERFIL", "").lower()
+if _modo:
+    ativar(cprofile="cprofile" in _modo, tracemalloc="tracemalloc" in _modo)
+atexit.register(_ao_sair)
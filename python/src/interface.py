@@ -2,38 +2,47 @@
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
     QLabel, QSpinBox, QPushButton, QLineEdit, QProgressBar, QSlider,
-    QFrame, QPlainTextEdit
+    QFrame, QPlainTextEdit, QCheckBox, QDoubleSpinBox, QComboBox
 )
-from PyQt5.QtCore import Qt, QObject, pyqtSignal
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from logger_setup import logger
+from PyQt5.QtCore import Qt, QTimer
+from logger_setup import logger, adicionar_handler
+from collections import deque
 import logging
-from mpl_toolkits.mplot3d import Axes3D
-import numpy as np
+import math
 
-class QtSignalHandler(logging.Handler, QObject):
-    log_signal = pyqtSignal(str)
-
-    def __init__(self):
-        logging.Handler.__init__(self)
-        QObject.__init__(self)
+class BufferLogHandler(logging.Handler):
+    """Guarda as mensagens formatadas para o LogViewer buscar em lote."""
+    def __init__(self, capacidade=10000):
+        super().__init__()
+        self.mensagens = deque(maxlen=capacidade)
 
     def emit(self, record):
-        msg = self.format(record)
-        self.log_signal.emit(msg)
+        self.mensagens.append(self.format(record))
 
 class LogViewer(QPlainTextEdit):
-    """QPlainTextEdit que recebe mensagens de log."""
-    def __init__(self, parent=None):
+    """QPlainTextEdit que recebe mensagens de log em lotes, por timer."""
+    def __init__(self, parent=None, intervalo_ms=100, max_linhas=5000):
         super().__init__(parent)
         self.setReadOnly(True)
+        self.setMaximumBlockCount(max_linhas)  # descarta as linhas mais antigas
+        self.handler = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(intervalo_ms)
+        self.timer.timeout.connect(self.descarregar)
 
     def connect_logger(self, logger):
-        handler = QtSignalHandler()
-        handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
-        handler.log_signal.connect(self.appendPlainText)
-        logger.addHandler(handler)
+        self.handler = BufferLogHandler()
+        self.handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+        adicionar_handler(self.handler)  # formata na thread do listener
+        self.timer.start()
+
+    def descarregar(self):
+        mensagens = self.handler.mensagens
+        if not mensagens: return
+        lote = []
+        while mensagens:
+            lote.append(mensagens.popleft())
+        self.appendPlainText("\n".join(lote[-self.maximumBlockCount():]))
 
 class Input_SpinBox(QSpinBox):
         """SpinBox que arredonda o valor ao step mais próximo ao perder foco."""
@@ -102,10 +111,10 @@ class Interface(QMainWindow):
             return "…/" + final
 
     def lim_plot(self):
-        if hasattr(self, "pontos_reconst"):
+        if getattr(self, "pontos_reconst", None) is not None:
             max_xy = self.pontos_reconst[["X_mm", "Y_mm"]].abs().max().max()
-            self.lim_xy = np.ceil(max_xy / 10) * 10 + 10
-            self.lim_z = np.ceil(self.pontos_reconst["Z_mm"].max() / 10) * 10 + 10
+            self.lim_xy = math.ceil(max_xy / 10) * 10 + 10
+            self.lim_z = math.ceil(self.pontos_reconst["Z_mm"].max() / 10) * 10 + 10
         else:
             self.lim_xy = -self.parametros_padrao["dist_max"]//2
             self.lim_xy = self.parametros_padrao["dist_max"]//2
@@ -135,9 +144,62 @@ class Interface(QMainWindow):
         self.ax_3D.grid(True)
     
     def alternar_2d_3d(self):
-        self.canvas_2D.setVisible(not self.vis_2d)
-        self.canvas_3D.setVisible(self.vis_2d)
         self.vis_2d = not self.vis_2d
+        criado = self.criar_canvas_visivel()
+        if self.canvas_2D is not None: self.canvas_2D.setVisible(self.vis_2d)
+        if self.canvas_3D is not None: self.canvas_3D.setVisible(not self.vis_2d)
+        if criado:
+            self.sincronizar_renderizadores()
+        else:
+            render = self.render_2D if self.vis_2d else self.render_3D
+            if render.pendente: render.desenhar()
+
+    def renderizadores(self):
+        """Renderizadores dos canvases já criados."""
+        return [r for r in (self.render_2D, self.render_3D) if r is not None]
+
+    def sincronizar_renderizadores(self):
+        """Envia os dados atuais aos renderizadores. Implementado pela aplicação."""
+        pass
+
+    def criar_canvas_visivel(self):
+        """
+        Cria sob demanda o canvas da visualização atual (2D ou 3D).
+        O matplotlib só é importado aqui, depois que a janela já apareceu.
+
+        Returns:
+            bool: True se um canvas novo foi criado.
+        """
+        from renderizacao import RenderizadorNuvem
+
+        if self.vis_2d and self.canvas_2D is None:
+            self.canvas_2D, self.figura_2D = self._novo_canvas()
+            self.ax_2D = self.figura_2D.add_subplot(111)
+            self.ax_2D.set_aspect('equal', adjustable='box')
+            self.base_plot_2D("Nenhum dado carregado")
+            self.render_2D = RenderizadorNuvem(self.canvas_2D, self.ax_2D)
+            self.canvas_2D.setVisible(True)
+            return True
+        if not self.vis_2d and self.canvas_3D is None:
+            from mpl_toolkits.mplot3d import Axes3D  # registra a projeção 3D
+            self.canvas_3D, self.figura_3D = self._novo_canvas()
+            self.ax_3D = self.figura_3D.add_subplot(111, projection='3d')
+            self.ax_3D.set_aspect('equal', adjustable='box')
+            self.base_plot_3D("Nenhum dado carregado")
+            self.render_3D = RenderizadorNuvem(self.canvas_3D, self.ax_3D, eixo_3d=True)
+            self.canvas_3D.setVisible(True)
+            return True
+        return False
+
+    def _novo_canvas(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+
+        figura = Figure(figsize=(5,5))
+        canvas = FigureCanvas(figura)
+        canvas.setMinimumSize(400, 400)
+        self.visu_layout.addWidget(canvas)
+        return canvas, figura
     
     # ===========================
     # Painel de Configurações
@@ -170,7 +232,38 @@ class Interface(QMainWindow):
         )
         self.layout_porta.addWidget(self.input_porta)
         self.varredura_layout.addLayout(self.layout_porta)
-        
+
+        # Movimento dos motores, enviado ao conectar (firmware >= 1.3)
+        self.input_vel_base = Input_SpinBox(
+            min_value=1,
+            max_value=2000,
+            step=1,
+            start_value=self.parametros_padrao["vel_base"],
+            suffix=" passos/s"
+        )
+        self.input_vel_base.setToolTip("Aplicada ao conectar; 341 passos/s = 5 rpm (padrão do firmware)")
+        form_varredura.addRow("Velocidade da base", self.input_vel_base)
+
+        self.input_vel_elev = Input_SpinBox(
+            min_value=1,
+            max_value=2000,
+            step=1,
+            start_value=self.parametros_padrao["vel_elev"],
+            suffix=" passos/s"
+        )
+        self.input_vel_elev.setToolTip("Aplicada ao conectar")
+        form_varredura.addRow("Velocidade da elevação", self.input_vel_elev)
+
+        self.input_aceleracao = Input_SpinBox(
+            min_value=0,
+            max_value=20000,
+            step=100,
+            start_value=self.parametros_padrao["aceleracao"],
+            suffix=" passos/s²"
+        )
+        self.input_aceleracao.setToolTip("Rampa de partida e parada dos dois motores; 0 = sem rampa")
+        form_varredura.addRow("Aceleração", self.input_aceleracao)
+
         # Pontos por camada
         self.input_pts_camada = Input_SpinBox(
             min_value=8,
@@ -200,6 +293,48 @@ class Interface(QMainWindow):
         )
         form_varredura.addRow("Altura máxima", self.input_alt_max)
 
+        # Amostragem adaptativa (mede só onde o perfil muda)
+        self.check_adaptativa = QCheckBox("Amostragem adaptativa")
+        self.check_adaptativa.setToolTip("Usa a camada anterior para escolher os ângulos; "
+                                         "mede no máximo metade dos pontos por camada")
+        form_varredura.addRow("", self.check_adaptativa)
+
+        # Sobreamostragem: 3 a 9 leituras por ponto, agregadas pela mediana
+        self.check_sobreamostragem = QCheckBox("Várias leituras por ponto")
+        self.check_sobreamostragem.setToolTip("3 a 9 leituras por parada conforme o ruído; "
+                                              "grava a mediana e o desvio como confiança")
+        form_varredura.addRow("", self.check_sobreamostragem)
+
+        # Multirresolução: passe grosso (20 mm, 1/4 dos pontos) e depois refinamentos
+        self.check_multirresolucao = QCheckBox("Multirresolução (prévia rápida)")
+        self.check_multirresolucao.setToolTip("Primeiro camadas de 20 mm com 1/4 dos pontos; "
+                                              "os passes seguintes intercalam o que falta")
+        form_varredura.addRow("", self.check_multirresolucao)
+
+        # Aquisição e processamento em processos separados (serial fora do GIL da interface)
+        self.check_multiprocesso = QCheckBox("Aquisição em processo separado")
+        self.check_multiprocesso.setToolTip("A serial fica num processo próprio e a conversão/malha em outro; "
+                                            "a interface só recebe os resultados")
+        form_varredura.addRow("", self.check_multiprocesso)
+
+        # Perfil do sensor: tempo por leitura x ruído (firmware >= 1.2)
+        self.combo_perfil_sensor = QComboBox()
+        self.combo_perfil_sensor.addItems(["firmware", "rapido", "padrao", "preciso", "longo", "automatico"])
+        self.combo_perfil_sensor.setCurrentText(self.parametros_padrao["perfil_sensor"])
+        self.combo_perfil_sensor.setToolTip("firmware: mantém a configuração do Arduino; "
+                                            "automatico: menor tempo por leitura com ruído abaixo do alvo")
+        form_varredura.addRow("Perfil do sensor", self.combo_perfil_sensor)
+
+        self.input_sigma_alvo = QDoubleSpinBox()
+        self.input_sigma_alvo.setRange(0.1, 10)
+        self.input_sigma_alvo.setSingleStep(0.1)
+        self.input_sigma_alvo.setValue(self.parametros_padrao["sigma_alvo"])
+        self.input_sigma_alvo.setSuffix(" mm")
+        self.input_sigma_alvo.setEnabled(self.parametros_padrao["perfil_sensor"] == "automatico")
+        self.combo_perfil_sensor.currentTextChanged.connect(
+            lambda perfil: self.input_sigma_alvo.setEnabled(perfil == "automatico"))
+        form_varredura.addRow("Ruído alvo", self.input_sigma_alvo)
+
         # Nome do projeto / pasta
         self.input_nome_projeto = QLineEdit()
         form_varredura.addRow("Nome do projeto", self.input_nome_projeto)
@@ -230,6 +365,11 @@ class Interface(QMainWindow):
         self.progress_camadas.setFormat("Camadas: %v/%m")
         self.varredura_layout.addWidget(self.progress_camadas)
 
+        # Saúde do link serial (latências e falhas)
+        self.label_link = QLabel("Link serial: -")
+        self.label_link.setWordWrap(True)
+        self.varredura_layout.addWidget(self.label_link)
+
         self.config_layout.addWidget(self.varredura_frame)
 
         # ---------- Reconstrução ----------
@@ -295,12 +435,41 @@ class Interface(QMainWindow):
             suffix=" pts"
         )
         form_reconst.addRow("Janela suavização", self.input_suav)
+
+        self.check_registro = QCheckBox("Registro entre camadas")
+        self.check_registro.setToolTip("Corrige a rotação e o deslocamento de cada camada em relação às vizinhas "
+                                       "(folga das engrenagens e truncamento dos passos por ponto)")
+        form_reconst.addRow("", self.check_registro)
         self.reconst_layout.addLayout(form_reconst)
 
         # Botão export STL
         self.btn_export_stl = QPushButton("Exportar STL")
         self.btn_export_stl.setEnabled(False)
         self.reconst_layout.addWidget(self.btn_export_stl)
+
+        # Volume, área e seção da camada atual (metricas.py)
+        self.label_metricas = QLabel("")
+        self.label_metricas.setWordWrap(True)
+        self.reconst_layout.addWidget(self.label_metricas)
+
+        # Controle de qualidade contra um STL nominal
+        self.reconst_layout.addWidget(QLabel("<b>Controle de qualidade</b>"))
+        self.btn_referencia_stl = QPushButton("Carregar STL de referência")
+        self.reconst_layout.addWidget(self.btn_referencia_stl)
+
+        form_qc = QFormLayout()
+        self.input_tolerancia = QDoubleSpinBox()
+        self.input_tolerancia.setKeyboardTracking(False)
+        self.input_tolerancia.setRange(0.05, 10)
+        self.input_tolerancia.setSingleStep(0.05)
+        self.input_tolerancia.setValue(self.parametros_padrao["tolerancia_qc"])
+        self.input_tolerancia.setSuffix(" mm")
+        form_qc.addRow("Tolerância", self.input_tolerancia)
+        self.reconst_layout.addLayout(form_qc)
+
+        self.label_qc = QLabel("Sem referência")
+        self.label_qc.setWordWrap(True)
+        self.reconst_layout.addWidget(self.label_qc)
         
         self.config_layout.addWidget(self.reconst_frame)
 
@@ -326,23 +495,12 @@ class Interface(QMainWindow):
         self.btn_2d3d.clicked.connect(self.alternar_2d_3d)
         self.visu_layout.addWidget(self.btn_2d3d)
         
-        self.figura_2D = Figure(figsize=(5,5))
-        self.canvas_2D = FigureCanvas(self.figura_2D)
-        self.canvas_2D.setMinimumSize(400, 400)
-        self.canvas_2D.setVisible(self.vis_2d)
-        self.ax_2D = self.figura_2D.add_subplot(111)
-        self.ax_2D.set_aspect('equal', adjustable='box')
-        self.base_plot_2D("Nenhum dado carregado")
-        self.visu_layout.addWidget(self.canvas_2D)
-        
-        self.figura_3D = Figure(figsize=(5,5))
-        self.canvas_3D = FigureCanvas(self.figura_3D)
-        self.canvas_3D.setMinimumSize(400, 400)
-        self.canvas_3D.setVisible(not self.vis_2d)
-        self.ax_3D = self.figura_3D.add_subplot(111, projection='3d')
-        self.ax_3D.set_aspect('equal', adjustable='box')
-        self.base_plot_3D("Nenhum dado carregado")
-        self.visu_layout.addWidget(self.canvas_3D)
+        # Canvases criados sob demanda: só o visível, depois que a janela
+        # aparece (ver main.py) ou ao alternar 2D/3D
+        self.canvas_2D = None
+        self.canvas_3D = None
+        self.render_2D = None
+        self.render_3D = None
         
         # Aqui será adicionado o matplotlib canvas ou similar
         self.main_layout.addWidget(self.visu_frame, stretch=2)
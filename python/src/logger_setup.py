@@ -1,11 +1,17 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import os
-from datetime import datetime
 
 # Cria instância global
 logger = logging.getLogger("app_logger")
-logger.setLevel(logging.DEBUG)
+
+# Nível e arquivo configuráveis por variável de ambiente. Com o nível acima de
+# DEBUG, chamadas logger.debug("...%s", x) no laço de varredura quase não custam nada.
+logger.setLevel(os.environ.get("SCANNER_LOG_NIVEL", "INFO").upper())
+arquivo_log = os.environ.get("SCANNER_LOG_ARQUIVO", "tests/app.log")
 
 # Evita adicionar handlers duplicados ao importar em vários módulos
 if not logger.handlers:
@@ -16,14 +22,28 @@ if not logger.handlers:
     console_handler.setFormatter(console_formatter)
 
     # Arquivo handler
-    arquivo_log = f"log/app_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-    file_handler = logging.FileHandler("tests/app.log", encoding="utf-8")
+    # delay=True: o arquivo só é aberto na primeira mensagem, sem custo na partida
+    pasta_log = os.path.dirname(arquivo_log)
+    if pasta_log: os.makedirs(pasta_log, exist_ok=True)
+    file_handler = logging.FileHandler(arquivo_log, encoding="utf-8", delay=True)
     file_handler.setLevel(logging.DEBUG)
     file_formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
     file_handler.setFormatter(file_formatter)
 
-    # Adiciona ao logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # O logger só enfileira; console e arquivo são escritos pela thread do listener
+    fila_log = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(fila_log))
+    listener = logging.handlers.QueueListener(
+        fila_log, console_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+
+def adicionar_handler(handler):
+    """
+    Acrescenta um handler de saída à thread do listener (fora do caminho
+    de quem chama o logger), ex.: o painel de log da interface.
+    """
+    listener.handlers = listener.handlers + (handler,)
 
 # Agora o logger pode ser importado em qualquer módulo
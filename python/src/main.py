@@ -1,64 +1,97 @@
+import time
+T_INICIO = time.perf_counter()  # referência para o tempo até a primeira janela
+
 from PyQt5.QtWidgets import QApplication, QFileDialog
-from mpl_toolkits.mplot3d import Axes3D
+from PyQt5.QtCore import QTimer, pyqtSignal
 from interface import Interface
-from reconstrucao import reconstruir_pontos, suavizar_pontos
 from logger_setup import logger
-from exportar_stl import dataframe_para_stl
-from scanner import (
-    conectar_serial, iniciar_arduino, girar_motor, medir_distancia)
-import pandas as pd
-import numpy as np
+from parametros import parametros_padrao
+from reconstrucao_assincrona import ReconstrucaoAssincrona
+from instrumentacao import cronometrar
+from telemetria_serial import telemetria
+from nivel_detalhe import CacheNivelDetalhe, DecimacaoIncremental, orcamento_pontos
 from datetime import datetime
+import math
 import sys
 import os
-import csv
-
-# ----- Parâmetros padrões -----
-parametros_padrao = {
-    "pts_camada": 128,
-    "altura_camada": 5,
-    "altura_max": 150,
-    "dist_sensor": 157,
-    "alin_hor": 5,
-    "escala": 1.10,
-    "dist_min": 20,
-    "dist_max": 300,
-    "suavizacao": 3,
-    "passos_por_volta": 2038,  # passos por volta
-    "altura_volta": 70, # mm por volta elevação
-    "baudrate": 115200,
-    "porta_serial": 7
-}
-
-# elev: uma volta = 70 mm
-# base: uma volta = 360 graus
+import shutil
+import threading
+
+# pandas, numpy, scipy, numpy-stl e pyserial são importados no primeiro uso
 
 class App(Interface):
+    varredura_terminou = pyqtSignal(str, bool, str)  # arquivo, concluída, erro
+    passe_concluido = pyqtSignal(str)  # cópia do CSV ao fim de cada passe da multirresolução
+    referencia_carregada = pyqtSignal(object, str)  # Referencia, caminho do STL
+    qc_concluido = pyqtSignal(object, object)  # chave da reconstrução, resultado de comparar_com_referencia
+    qc_falhou = pyqtSignal(str)
+
     def __init__(self, parametros_padrao):
         super().__init__(parametros_padrao)
         self.pontos_reconst = None
+        self.chave_reconst = None
+        self.cache_lod = CacheNivelDetalhe()
+        self.lod_previa = DecimacaoIncremental()  # prévia ao vivo: só as leituras novas a cada quadro
         self.arduino_iniciado = False
+        self.thread_varredura = None
+        self.varredura_processos = None  # VarreduraMultiprocesso, no modo em processos separados
+        self.firmware = None
+        self.movimento = None  # movimento aplicado aos motores na conexão
+        self.catalogo = None  # ReindexadorSegundoPlano, iniciado depois da primeira janela
+        self.referencia_qc = None  # controle_qualidade.Referencia do STL nominal
+        self.qc = None  # último resultado de comparar_com_referencia, válido para chave_qc
+        self.chave_qc = None
+        self.metricas = None  # (perfil por camada, resumo) da reconstrução atual
+        
+        # prévia ao vivo da varredura, atualizada a 5 Hz
+        self.timer_previa = QTimer(self)
+        self.timer_previa.setInterval(200)
+        self.timer_previa.timeout.connect(self.atualizar_previa_varredura)
+        self.varredura_terminou.connect(self.varredura_finalizada)
+        self.passe_concluido.connect(self.abrir_csv_reconst)
+        self.referencia_carregada.connect(self.referencia_pronta)
+        self.qc_concluido.connect(self.qc_pronto)
+        self.qc_falhou.connect(lambda erro: logger.error(f"Erro no controle de qualidade: {erro}"))
+        
+        # reconstrução fora da thread da UI, com debounce e descarte de pedidos obsoletos
+        self.reconstrucao = ReconstrucaoAssincrona(atraso_ms=150, parent=self)
+        self.reconstrucao.concluida.connect(self.reconstrucao_concluida)
+        self.reconstrucao.falhou.connect(lambda erro: logger.error(f"Erro na reconstrução: {erro}"))
         
         self.btn_conectar_arduino.clicked.connect(self.iniciar_arduino)
         self.btn_select_csv.clicked.connect(self.carregar_csv_reconst)
         self.btn_iniciar_varredura.clicked.connect(self.iniciar_varredura)
+        self.btn_parar_varredura.clicked.connect(self.parar_varredura)
         
-        self.input_dist_sens.valueChanged.connect(self.plotar_dados)
-        self.input_alin_hor.valueChanged.connect(self.plotar_dados)
-        self.input_escala.valueChanged.connect(self.plotar_dados)
-        self.input_suav.valueChanged.connect(self.plotar_dados)
-        self.input_alt_camada_reconst.valueChanged.connect(self.plotar_dados)
-        self.slider_camada.valueChanged.connect(self.plotar_dados)
+        self.input_dist_sens.valueChanged.connect(self.reconstruir)
+        self.input_alin_hor.valueChanged.connect(self.reconstruir)
+        self.input_escala.valueChanged.connect(self.reconstruir)
+        self.input_suav.valueChanged.connect(self.reconstruir)
+        self.check_registro.toggled.connect(self.reconstruir)
+        self.input_alt_camada_reconst.valueChanged.connect(self.reconstruir)
+        self.slider_camada.valueChanged.connect(lambda _: self.atualizar_camada())  # o wrapper do @cronometrar repassaria o valor
+        self.btn_referencia_stl.clicked.connect(self.carregar_referencia)
+        self.input_tolerancia.valueChanged.connect(self.atualizar_resumo_qc)
+        self.slider_camada.sliderReleased.connect(self.registrar_quadros)
         
         self.btn_export_stl.clicked.connect(self.exportar_stl)
     
     def iniciar_arduino(self):
         porta = f"COM{self.input_porta.value()}"
+        self.porta = porta
         try:
             if not self.arduino_iniciado:
+                from scanner import conectar_serial, iniciar_arduino, preparar_movimento
                 try:
-                    self.ser = conectar_serial(porta, self.parametros_padrao["baudrate"])
-                    iniciar_arduino(self.ser)
+                    # SCANNER_GRAVAR_SERIAL=<pasta>: grava a sessão serial para replay offline
+                    pasta_gravacao = os.environ.get("SCANNER_GRAVAR_SERIAL")
+                    gravar = None
+                    if pasta_gravacao:
+                        os.makedirs(pasta_gravacao, exist_ok=True)
+                        gravar = os.path.join(pasta_gravacao, f"serial_{datetime.now().strftime('%Y%m%d_%H%M%S')}.scnt")
+                    self.ser = conectar_serial(porta, self.parametros_padrao["baudrate"], gravar=gravar)
+                    self.firmware = iniciar_arduino(self.ser)
+                    self.movimento = preparar_movimento(self.ser, self.movimento_motores(), self.firmware)
                     self.arduino_iniciado = True
                     logger.info("Arduino iniciado e pronto para varredura.")
                 except Exception as e_inner:
@@ -73,7 +106,15 @@ class App(Interface):
             self.btn_iniciar_varredura.setEnabled(self.arduino_iniciado)
             self.btn_parar_varredura.setEnabled(self.arduino_iniciado)
     
+    def movimento_motores(self):
+        aceleracao = self.input_aceleracao.value()
+        return {"BASE": (self.input_vel_base.value(), aceleracao), "ELEV": (self.input_vel_elev.value(), aceleracao)}
+
     def iniciar_varredura(self):
+        if self.check_multirresolucao.isChecked() and self.check_adaptativa.isChecked():
+            logger.error("A amostragem adaptativa não se combina com a varredura multirresolução.")
+            return
+
         # define as constantes
         passos_por_volta = parametros_padrao["passos_por_volta"]
         altura_volta = parametros_padrao["altura_volta"]
@@ -81,12 +122,9 @@ class App(Interface):
         pts_por_camada = self.input_pts_camada.value()
         altura_camada = self.input_alt_camada_varredura.value()
         altura_max = self.input_alt_max.value()
-        camadas = np.ceil(altura_max // altura_camada)
+        camadas = math.ceil(altura_max / altura_camada)
         passos_por_camada = int(passos_por_volta * (altura_camada / altura_volta))
         
-        passos_por_ponto = passos_por_volta // pts_por_camada
-        angulo = 2 * np.pi * passo / pts_por_camada
-        
         # define nome do arquivo
         nome_projeto = self.input_nome_projeto.text().strip()
         if not nome_projeto: nome_projeto = "projeto_sem_nome"
@@ -97,24 +135,185 @@ class App(Interface):
         os.makedirs(pasta_destino, exist_ok=True)
         arquivo_csv = os.path.join(pasta_destino, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
 
-        # inicia varredura
-        logger.info(f"Iniciando varredura: {arquivo_csv}")
-        
-        with open(arquivo_csv, mode='w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(['Camada', 'Ponto', 'Angulo_rad', 'Distancia_mm'])
-
-            for camada in range(camadas):
-                logger.info(f"Camada {camada} iniciada - ({pts_por_camada} pts).")
-                for passo in range(pts_por_camada):
-                    distancia = medir_distancia(self.ser)
-                    girar_motor(self.ser, 'BASE', passos_por_ponto)
-                    writer.writerow([camada, passo, angulo, distancia])
-                girar_motor(self.ser, 'ELEV', passos_por_camada)
-
-        girar_motor(self.ser, 'ELEV', -camadas*passos_por_camada)  # volta ao início
-        
-        logger.info(f"Varredura concluída. CSV: {arquivo_csv}")
+        # a varredura roda em outra thread; as leituras vão para o buffer da prévia
+        from scanner import (executar_varredura, executar_varredura_multirresolucao, passes_multirresolucao,
+                             preparar_sensor)
+        from varredura_ao_vivo import BufferLeituras, PreviaVarredura
+        self.buffer_varredura = BufferLeituras(capacidade=pts_por_camada * camadas)
+        self.previa_varredura = PreviaVarredura(self.buffer_varredura)
+        self.evento_parar = threading.Event()
+        amostragem = None
+        if self.check_adaptativa.isChecked():
+            from amostragem_adaptativa import AmostragemAdaptativa
+            amostragem = AmostragemAdaptativa(pts_por_camada)
+
+        medicao = None
+        if self.check_sobreamostragem.isChecked():
+            from medicao_robusta import MedicaoRobusta
+            medicao = MedicaoRobusta()
+
+        multirresolucao = self.check_multirresolucao.isChecked()
+        passes = passes_multirresolucao(round(20 / altura_camada), 4)
+
+        # perfil do sensor, aplicado já na thread/processo da aquisição
+        perfil = self.combo_perfil_sensor.currentText()
+        sensor = {}
+        if perfil == "automatico":
+            sensor = {"sigma_alvo_mm": self.input_sigma_alvo.value()}
+        elif perfil != "firmware":
+            sensor = {"perfil": perfil}
+
+        # parâmetros da aquisição para o catálogo (gravados em <csv>_meta.json ao fim)
+        calibracao = self.parametros_reconstrucao()
+        self.arquivo_varredura = arquivo_csv
+        self.metadados_varredura = {
+            "projeto": nome_projeto, "data": datetime.now().isoformat(), "pts_por_camada": pts_por_camada,
+            "camadas": camadas, "altura_camada": altura_camada, "passos_por_volta": passos_por_volta,
+            "passos_por_camada": passos_por_camada, "dist_sensor": calibracao["dist_sensor"],
+            "alin_horizontal": calibracao["alin_horizontal"], "escala": calibracao["escala"],
+            "firmware": self.firmware,
+            "modo": ("multirresolucao" if multirresolucao else "adaptativa" if amostragem is not None else "uniforme"),
+            "sobreamostragem": medicao is not None, "multiprocesso": self.check_multiprocesso.isChecked(),
+            "movimento": self.movimento,
+        }
+
+        self.progress_pts.setMaximum(pts_por_camada)
+        self.progress_camadas.setMaximum(camadas)
+        if self.check_multiprocesso.isChecked():
+            from varredura_multiprocesso import VarreduraMultiprocesso
+            # a porta passa a ser do processo de aquisição; reconectada ao fim
+            self.ser.close()
+            self.arduino_iniciado = False
+            self.varredura_processos = VarreduraMultiprocesso(
+                self.porta, self.parametros_padrao["baudrate"], arquivo_csv,
+                pts_por_camada, camadas, passos_por_volta, passos_por_camada,
+                self.parametros_reconstrucao(),
+                {"amostragem": amostragem, "medicao": medicao, "passes": passes if multirresolucao else None,
+                 "sensor": sensor, "movimento": self.movimento_motores()}
+            )
+            self.previa_varredura = self.varredura_processos
+            self.varredura_processos.iniciar()
+            self.btn_iniciar_varredura.setEnabled(False)
+            self.timer_previa.start()
+            return
+
+        def passe_concluido(indice, *_):
+            if indice == len(passes): return  # o último passe é aberto por varredura_finalizada
+            # cópia feita na thread da varredura, antes de o próximo passe voltar a escrever
+            copia = arquivo_csv.replace(".csv", f"_passe{indice}.csv")
+            shutil.copyfile(arquivo_csv, copia)
+            self.passe_concluido.emit(copia)
+
+        def executar():
+            try:
+                config = preparar_sensor(self.ser, **sensor)
+                if config is not None: self.metadados_varredura["sensor"] = config
+                if multirresolucao:
+                    concluida = executar_varredura_multirresolucao(
+                        self.ser, arquivo_csv, pts_por_camada, camadas,
+                        passos_por_volta, passos_por_camada,
+                        passes,
+                        ao_medir=self.buffer_varredura.adicionar,
+                        parar=self.evento_parar,
+                        ao_concluir_passe=passe_concluido,
+                        medicao=medicao
+                    )
+                else:
+                    concluida = executar_varredura(
+                        self.ser, arquivo_csv, pts_por_camada, camadas,
+                        passos_por_volta, passos_por_camada,
+                        ao_medir=self.buffer_varredura.adicionar,
+                        parar=self.evento_parar,
+                        amostragem=amostragem,
+                        medicao=medicao
+                    )
+                self.varredura_terminou.emit(arquivo_csv, concluida, "")
+            except Exception as e:
+                self.varredura_terminou.emit(arquivo_csv, False, str(e))
+
+        self.btn_iniciar_varredura.setEnabled(False)
+        self.thread_varredura = threading.Thread(target=executar, name="varredura", daemon=True)
+        self.thread_varredura.start()
+        self.timer_previa.start()
+
+    def parar_varredura(self):
+        if self.varredura_processos is not None:
+            logger.info("Interrompendo varredura...")
+            self.varredura_processos.parar()
+            return
+        if self.thread_varredura is not None and self.thread_varredura.is_alive():
+            logger.info("Interrompendo varredura...")
+            self.evento_parar.set()
+
+    def atualizar_previa_varredura(self):
+        """
+        Converte as leituras novas com a calibração atual e atualiza
+        nuvem, camada em curso e progresso numa única passada.
+        """
+        if self.varredura_processos is not None:
+            self._eventos_processos()
+        else:
+            self.label_link.setText(f"Link serial: {telemetria.resumo_curto()}")
+        previa = self.previa_varredura
+        if not previa.atualizar(self.parametros_reconstrucao()): return
+
+        progresso = previa.progresso()
+        if progresso is not None:
+            self.progress_camadas.setValue(progresso[0])
+            self.progress_pts.setValue(progresso[1] + 1)
+        if len(previa.xs) == 0: return
+
+        lim_xy = math.ceil(max(abs(previa.xs).max(), abs(previa.ys).max()) / 10) * 10 + 10
+        lim_z = math.ceil(previa.zs.max() / 10) * 10 + 10
+        camada = int(previa.camadas[-1])
+        na_camada = previa.camadas == camada  # na multirresolução as camadas chegam fora de ordem
+
+        xs, ys, zs = previa.xs, previa.ys, previa.zs
+        if self.render_3D is not None:
+            orcamento = orcamento_pontos(self.canvas_3D.width(), self.canvas_3D.height())
+            idx = self.lod_previa.indices(xs, ys, zs, orcamento, (id(previa), previa.reinicios))
+            self.render_3D.definir_nuvem(xs[idx], ys[idx], zs[idx])
+        for render in self.renderizadores():
+            render.definir_limites(lim_xy, lim_z)
+            render.definir_camada(xs[na_camada], ys[na_camada], zs[na_camada],
+                                  f"Varredura - camada {camada}")
+            render.desenhar()
+
+    def _eventos_processos(self):
+        """Eventos da aquisição em processo separado e vazão/jitter medidos."""
+        varredura = self.varredura_processos
+        for evento in varredura.eventos():
+            if evento[0] == "sensor":
+                self.metadados_varredura["sensor"] = evento[1]
+            elif evento[0] == "passe":
+                self.abrir_csv_reconst(evento[1])
+            elif evento[0] == "fim":
+                # fora desta chamada: varredura_finalizada volta a atualizar a prévia
+                QTimer.singleShot(0, lambda e=evento: self.varredura_terminou.emit(self.arquivo_varredura, e[1], e[2]))
+        estatisticas = varredura.estatisticas()
+        if estatisticas and "jitter_ms" in estatisticas:
+            self.label_link.setText(f"Aquisição: {estatisticas['leituras_por_s']:.1f} leituras/s, "
+                                    f"jitter {estatisticas['jitter_ms']:.1f} ms")
+
+    def varredura_finalizada(self, arquivo_csv, concluida, erro):
+        self.timer_previa.stop()
+        self.atualizar_previa_varredura()
+        if self.varredura_processos is not None:
+            self.varredura_processos.encerrar()
+            if self.varredura_processos.arquivo_malha:
+                logger.info(f"Malha da varredura: {self.varredura_processos.arquivo_malha}")
+            self.varredura_processos = None
+            self.iniciar_arduino()  # retoma a porta liberada pelo processo de aquisição
+        self.btn_iniciar_varredura.setEnabled(self.arduino_iniciado)
+        if os.path.exists(arquivo_csv) and self.catalogo is not None:
+            self.catalogo.varredura(arquivo_csv, dict(self.metadados_varredura, concluida=concluida))
+            for sufixo in ("_link.json", "_previa.stl"):
+                derivado = arquivo_csv.replace(".csv", sufixo)
+                if os.path.exists(derivado): self.catalogo.artefato(derivado, arquivo_csv)
+        if erro:
+            logger.error(f"Erro na varredura: {erro}")
+        elif os.path.exists(arquivo_csv):
+            self.abrir_csv_reconst(arquivo_csv)  # reconstrução completa do arquivo gravado
         
     def carregar_csv_reconst(self):
         caminho, _ = QFileDialog.getOpenFileName(
@@ -124,85 +323,224 @@ class App(Interface):
             "Arquivos CSV (*.csv)"
         )
         if caminho:
-            logger.info(f"Arquivo escolhido: {caminho}")
-            self.csv_reconst_path = caminho
-            self.label_reconst_csv.setText(caminho)
-            
-            try:
-                self.dados_reconst = pd.read_csv(self.csv_reconst_path)
-                if not {"Camada","Ponto","Angulo_rad","Distancia_mm"}.issubset(self.dados_reconst.columns):
-                    raise ValueError("CSV não possui colunas corretas")
-                self.dados_reconst = self.dados_reconst.sort_values(by='Camada', ascending=True, inplace=False)
-                self.slider_camada.setMaximum(self.dados_reconst['Camada'].max())
-                self.plotar_dados()
-            except Exception as e:
-                msg = f"Erro ao carregar CSV"
-                self.label_reconst_csv.setText(msg)
-                logger.error(f"{msg}: {e}")
+            self.abrir_csv_reconst(caminho)
 
-    def reconstruir(self):
-        # pega valores dos spinboxes atuais
-        altura_inicial = 0
-        altura_camada = self.input_alt_camada_reconst.value()
-        dist_sensor   = self.input_dist_sens.value()
-        alin_hor      = self.input_alin_hor.value()
-        escala        = self.input_escala.value()/100.0  # converte de % para fator
-
-        # chama função de reconstrução
+    def abrir_csv_reconst(self, caminho):
+        """Carrega um CSV bruto e pede a reconstrução."""
+        logger.info(f"Arquivo escolhido: {caminho}")
+        self.csv_reconst_path = caminho
+        self.label_reconst_csv.setText(caminho)
+        
         try:
-            pontos = reconstruir_pontos(
-                arquivo_csv=self.csv_reconst_path,
-                altura_inicial=altura_inicial,
-                altura_camada=altura_camada,
-                dist_sensor=dist_sensor,
-                alin_horizontal=alin_hor,
-                escala=escala
-            )
-            try:
-                self.pontos_reconst = suavizar_pontos(
-                    pontos,
-                    self.input_suav.value()
-                )
-            except Exception as e:
-                logger.error(f"Erro na suavização: {e}")
-                self.pontos_reconst = pontos.copy()
+            import pandas as pd
+            self.dados_reconst = pd.read_csv(self.csv_reconst_path)
+            if not {"Camada","Ponto","Angulo_rad","Distancia_mm"}.issubset(self.dados_reconst.columns):
+                raise ValueError("CSV não possui colunas corretas")
+            self.dados_reconst = self.dados_reconst.sort_values(by='Camada', ascending=True, inplace=False)
+            self.slider_camada.setMaximum(self.dados_reconst['Camada'].max())
+            self.reconstrucao.solicitar(self.csv_reconst_path, self.parametros_reconstrucao())
         except Exception as e:
-            logger.error(f"Erro na reconstrução: {e}")
-        finally:
-            self.btn_export_stl.setEnabled(self.pontos_reconst is not None)
+            msg = f"Erro ao carregar CSV"
+            self.label_reconst_csv.setText(msg)
+            logger.error(f"{msg}: {e}")
+
+    def parametros_reconstrucao(self):
+        """Valores atuais dos spinboxes de reconstrução."""
+        return {
+            "altura_inicial": 0,
+            "altura_camada": self.input_alt_camada_reconst.value(),
+            "dist_sensor": self.input_dist_sens.value(),
+            "alin_horizontal": self.input_alin_hor.value(),
+            "escala": self.input_escala.value()/100.0,  # converte de % para fator
+            "suavizacao": self.input_suav.value(),
+            "registro": self.check_registro.isChecked(),
+            "passos_por_volta": self.parametros_padrao["passos_por_volta"],
+            "compacto": self.parametros_padrao["compacto"],
+        }
+
+    def reconstruir(self):
+        """Agenda a reconstrução com os parâmetros atuais (debounce + worker)."""
+        if not hasattr(self, 'dados_reconst'): return
+        self.reconstrucao.agendar(self.csv_reconst_path, self.parametros_reconstrucao())
+
+    def reconstrucao_concluida(self, pontos, parametros):
+        self.pontos_reconst = pontos
+        # identifica o conjunto de parâmetros para o cache da prévia decimada
+        self.chave_reconst = (self.csv_reconst_path, tuple(sorted(parametros.items())))
+        self.btn_export_stl.setEnabled(True)
+        self.calcular_metricas()
+        self.plotar_dados()
+        if self.referencia_qc is not None:
+            self.calcular_qc()
         
+    @cronometrar()
     def plotar_dados(self):
         """
-        Plota a reconstrução no canvas usando os parâmetros atuais.
+        Atualiza a nuvem nos canvases com os pontos já reconstruídos.
         """
-        if not hasattr(self, 'dados_reconst'): return
+        if self.pontos_reconst is None: return
         
-        self.reconstruir()
+        # arrays contíguos; pontos_reconst já vem ordenado por camada
+        self.xs_todos = self.pontos_reconst['X_mm'].to_numpy()
+        self.ys_todos = self.pontos_reconst['Y_mm'].to_numpy()
+        self.zs_todos = self.pontos_reconst['Z_mm'].to_numpy()
+        self.camadas_todas = self.pontos_reconst['Camada'].to_numpy()
+        self.lim_plot()
         
-        xs_todos = self.pontos_reconst['X_mm'].values
-        ys_todos = self.pontos_reconst['Y_mm'].values
-        zs_todos = self.pontos_reconst['Z_mm'].values
-        
-        camada_idx = self.slider_camada.value()  # se tiver slider de camada
-        camada = self.pontos_reconst[self.pontos_reconst['Camada'] == camada_idx]
+        self.sincronizar_renderizadores()
+
+    def sincronizar_renderizadores(self):
+        if getattr(self, 'camadas_todas', None) is None: return
+        for render in self.renderizadores():
+            render.definir_limites(self.lim_xy, self.lim_z)
+        if self.render_3D is not None:
+            # prévia 3D decimada; a camada destacada e a exportação usam todos os pontos
+            orcamento = orcamento_pontos(self.canvas_3D.width(), self.canvas_3D.height())
+            idx = self.cache_lod.indices(self.chave_reconst, self.xs_todos, self.ys_todos,
+                                         self.zs_todos, orcamento)
+            desvios = self.desvios_atuais()
+            self.render_3D.definir_nuvem(self.xs_todos[idx], self.ys_todos[idx], self.zs_todos[idx],
+                                         None if desvios is None else desvios[idx])
+        self.atualizar_camada()
+
+    @cronometrar()
+    def atualizar_camada(self):
+        """
+        Destaca a camada do slider sem reconstruir nem redesenhar a nuvem.
+        """
+        if getattr(self, 'camadas_todas', None) is None: return
         
-        xs_camada = camada['X_mm'].values
-        ys_camada = camada['Y_mm'].values
-        zs_camada = camada['Z_mm'].values
-        mask_outros = self.pontos_reconst['Camada'] != camada_idx
-
-        # limpa eixo e plota
-        self.ax_2D.clear()
-        self.ax_2D.scatter(xs_camada, ys_camada, c='blue', s=10)
-        self.base_plot_2D(f"Camada {camada_idx} - Z={zs_camada[0]:.1f} mm")
-        self.canvas_2D.draw()
+        camada_idx = self.slider_camada.value()
+        inicio, fim = self.camadas_todas.searchsorted([camada_idx, camada_idx + 1])
         
-        self.ax_3D.clear()
-        self.ax_3D.scatter(xs_todos[mask_outros], ys_todos[mask_outros], zs_todos[mask_outros], c='blue', s=1)
-        self.ax_3D.scatter(xs_camada, ys_camada, zs_camada, c='red', s=5)
-        self.base_plot_3D(f"Camada {camada_idx} - Z={zs_camada[0]:.1f} mm")
-        self.canvas_3D.draw()
+        xs_camada = self.xs_todos[inicio:fim]
+        ys_camada = self.ys_todos[inicio:fim]
+        zs_camada = self.zs_todos[inicio:fim]
+        if len(zs_camada): titulo = f"Camada {camada_idx} - Z={zs_camada[0]:.1f} mm"
+        else: titulo = f"Camada {camada_idx} - sem pontos"
+
+        desvios = self.desvios_atuais()
+        if desvios is not None:
+            desvios = desvios[inicio:fim]
+            if len(desvios): titulo += f" - RMS {float((desvios ** 2).mean()) ** 0.5:.2f} mm"
+
+        for render in self.renderizadores():
+            render.definir_camada(xs_camada, ys_camada, zs_camada, titulo, desvios)
+            render.desenhar()  # só o canvas visível é desenhado
+        self.atualizar_label_metricas(camada_idx)
+
+    def registrar_quadros(self):
+        render = self.render_2D if self.vis_2d else self.render_3D
+        if render is None: return
+        est = render.estatisticas_quadros()
+        logger.debug(f"Quadros: {est['quadros']}, média {est['media_ms']:.1f} ms, "
+                     f"p95 {est['p95_ms']:.1f} ms ({est['fps']:.0f} FPS)")
+
+    def closeEvent(self, event):
+        self.parar_varredura()
+        if self.varredura_processos is not None:
+            self.varredura_processos.encerrar()
+        self.reconstrucao.encerrar()
+        if self.catalogo is not None:
+            self.catalogo.parar()
+        super().closeEvent(event)
+
+    # ----- métricas geométricas -----
+    def calcular_metricas(self):
+        """Perfil por camada e volume/área da reconstrução atual (dezenas de ms: roda a cada recálculo)."""
+        try:
+            from metricas import metricas_camadas, resumo_camadas
+            perfil = metricas_camadas(self.pontos_reconst)
+            self.metricas = (perfil.set_index("Camada"), resumo_camadas(perfil))
+        except Exception as e:
+            self.metricas = None
+            logger.error(f"Erro nas métricas geométricas: {e}")
 
+    def atualizar_label_metricas(self, camada):
+        if self.metricas is None:
+            self.label_metricas.setText("")
+            return
+        perfil, resumo = self.metricas
+        texto = (f"Volume {resumo['volume_mm3'] / 1000:.1f} cm³, área {resumo['area_superficie_mm2'] / 100:.1f} cm², "
+                 f"altura {resumo['altura_mm']:.0f} mm")
+        if camada in perfil.index and perfil.at[camada, "Pontos"] >= 3:
+            c = perfil.loc[camada]
+            texto += (f"\nCamada {camada}: seção {c['Area_mm2']:.0f} mm², perímetro {c['Perimetro_mm']:.1f} mm, "
+                      f"Ø eq. {c['Diametro_eq_mm']:.1f} mm\n"
+                      f"raio {c['Raio_min_mm']:.1f} / {c['Raio_medio_mm']:.1f} / {c['Raio_max_mm']:.1f} mm "
+                      f"(mín. / médio / máx.)")
+        self.label_metricas.setText(texto)
+
+    # ----- controle de qualidade -----
+    def carregar_referencia(self):
+        caminho, _ = QFileDialog.getOpenFileName(self, "Selecione o STL de referência", "", "Arquivos STL (*.stl)")
+        if not caminho: return
+        self.label_qc.setText(f"Indexando {os.path.basename(caminho)}...")
+
+        def executar():
+            try:
+                from controle_qualidade import Referencia
+                self.referencia_carregada.emit(Referencia.de_stl(caminho), caminho)
+            except Exception as e:
+                self.qc_falhou.emit(str(e))
+        threading.Thread(target=executar, daemon=True).start()
+
+    def referencia_pronta(self, referencia, caminho):
+        logger.info(f"Referência carregada: {caminho} ({len(referencia.tri)} triângulos)")
+        self.referencia_qc = referencia
+        self.chave_qc = None
+        self.label_qc.setText(f"Referência: {os.path.basename(caminho)}")
+        if self.pontos_reconst is not None:
+            self.calcular_qc()
+
+    def calcular_qc(self):
+        """Desvio da reconstrução atual em relação à referência, fora da thread da UI."""
+        chave, pontos, referencia = self.chave_reconst, self.pontos_reconst, self.referencia_qc
+        tolerancia = self.input_tolerancia.value()
+
+        def executar():
+            try:
+                from controle_qualidade import comparar_com_referencia
+                self.qc_concluido.emit(chave, comparar_com_referencia(pontos, referencia, tolerancia=tolerancia))
+            except Exception as e:
+                self.qc_falhou.emit(str(e))
+        threading.Thread(target=executar, daemon=True).start()
+
+    def qc_pronto(self, chave, resultado):
+        if chave != self.chave_reconst: return  # a reconstrução mudou enquanto o QC rodava
+        self.qc, self.chave_qc = resultado, chave
+        self.atualizar_resumo_qc()
+
+    def desvios_atuais(self):
+        """Desvios da reconstrução exibida, ou None se o QC ainda não a cobriu."""
+        if self.qc is None or self.chave_qc != self.chave_reconst: return None
+        return self.qc["desvios"]
+
+    def atualizar_resumo_qc(self):
+        """Estatísticas e escala de cores com a tolerância atual (sem recalcular as distâncias)."""
+        desvios = self.desvios_atuais()
+        if desvios is None: return
+        from controle_qualidade import estatisticas_desvio
+
+        tolerancia = self.input_tolerancia.value()
+        est = estatisticas_desvio(desvios, tolerancia)
+        self.label_qc.setText(
+            f"Desvio: média {est['media_mm']:+.3f} mm, RMS {est['rms_mm']:.3f} mm\n"
+            f"{est['min_mm']:+.2f} a {est['max_mm']:+.2f} mm, |p95| {est['p95_abs_mm']:.2f} mm\n"
+            f"{est['dentro_pct']:.1f}% dentro de ±{tolerancia:g} mm (azul: falta material, vermelho: sobra)")
+        # cores saturam em 2x a tolerância
+        for render in self.renderizadores():
+            render.definir_escala(2 * tolerancia)
+        self.sincronizar_renderizadores()
+
+    def iniciar_catalogo(self):
+        """Reindexação do catálogo SQLite em segundo plano (depois da partida)."""
+        try:
+            from catalogo import ReindexadorSegundoPlano
+            self.catalogo = ReindexadorSegundoPlano()
+            self.catalogo.start()
+        except Exception as e:
+            logger.warning(f"Catálogo de varreduras indisponível: {e}")
 
     def exportar_stl(self):
         if self.pontos_reconst is None:
@@ -219,16 +557,41 @@ class App(Interface):
             if not caminho.lower().endswith('.stl'):
                 caminho += '.stl'
             try:
+                from exportar_stl import dataframe_para_stl
                 dataframe_para_stl(self.pontos_reconst, caminho)
             except Exception as e:
                 logger.error(f"Erro ao exportar STL: {e}")
             else:
                 logger.info(f"STL salvo em: {caminho}")
+                if self.catalogo is not None:
+                    self.catalogo.artefato(caminho, self.csv_reconst_path)
+
+def marco_partida(nome):
+    """Registra o tempo desde o início do processo até um marco da partida."""
+    ms = (time.perf_counter() - T_INICIO) * 1000
+    logger.info(f"Partida: {nome} em {ms:.0f} ms")
+    return ms
 
 def main():
+    # --medir-partida: abre a janela, informa os tempos de partida e sai
+    medir_partida = "--medir-partida" in sys.argv
     app = QApplication(sys.argv)
     janela = App(parametros_padrao)
     janela.show()
+
+    tempos = {}
+    def concluir_partida():
+        janela.criar_canvas_visivel()
+        tempos["canvas"] = marco_partida("visualização pronta")
+        if medir_partida:
+            print(f"primeira_janela_ms={tempos['janela']:.1f} canvas_ms={tempos['canvas']:.1f}")
+            app.quit()
+        else:
+            janela.iniciar_catalogo()
+
+    # os timers rodam em ordem: primeiro a janela é exibida, depois o canvas é criado
+    QTimer.singleShot(0, lambda: tempos.__setitem__("janela", marco_partida("primeira janela")))
+    QTimer.singleShot(0, concluir_partida)
     logger.info(f"Aplicação iniciada: {datetime.now().strftime('%d/%m/%Y, %H:%M:%S')}")
     return sys.exit(app.exec_())
 
@@ -0,0 +1,293 @@
+"""
+Métricas geométricas da peça escaneada: área e perímetro de cada camada,
+raios, volume, área de superfície e seções da malha em Z arbitrário.
+
+Na grade (camada x ângulo) cada camada é um polígono fechado em torno do
+eixo de rotação; as posições vazias são puladas (o polígono liga cada
+ponto válido ao próximo válido da volta). Área, perímetro e centróide de
+todas as camadas saem de uma vez pela fórmula do laço (shoelace).
+
+Para malhas (STL ou malha_cilindrica), o volume vem do teorema da
+divergência (soma dos tetraedros com a origem, exato para malhas fechadas)
+e as seções, da interseção de cada triângulo com o plano Z = z: os
+segmentos são orientados pela normal e a área sai da mesma fórmula do
+laço, sem precisar encadeá-los em contornos.
+"""
+import numpy as np
+import pandas as pd
+from logger_setup import logger
+from instrumentacao import cronometrar
+
+
+# ==================================================
+# CAMADAS DA GRADE
+# ==================================================
+
+def _proximo_valido(valido):
+    """Índice do próximo ponto válido depois de cada posição, dando a volta na camada."""
+    n = valido.shape[1]
+    idx = np.arange(2 * n)
+    prox = np.where(np.tile(valido, 2), idx, 2 * n)
+    prox = np.minimum.accumulate(prox[:, ::-1], axis=1)[:, ::-1]
+    return prox[:, 1:n + 1] % n
+
+
+def metricas_grade(grade):
+    """
+    Área, perímetro, centróide e raios de cada camada da grade (vetorizado).
+
+    Args:
+        grade (np.ndarray): (camadas, pts, 3), NaN nas posições vazias.
+
+    Returns:
+        dict: arrays por camada: pontos, area_mm2, perimetro_mm, centro_x_mm,
+            centro_y_mm, raio_min_mm, raio_medio_mm, raio_max_mm.
+            Camadas com menos de 3 pontos ficam com área e perímetro NaN.
+    """
+    x, y = grade[..., 0], grade[..., 1]
+    valido = np.isfinite(x) & np.isfinite(y)
+    x, y = np.where(valido, x, 0.0), np.where(valido, y, 0.0)
+    prox = _proximo_valido(valido)
+    xn, yn = np.take_along_axis(x, prox, axis=1), np.take_along_axis(y, prox, axis=1)
+
+    cruz = np.where(valido, x * yn - xn * y, 0.0)
+    area = 0.5 * cruz.sum(axis=1)
+    perimetro = np.where(valido, np.hypot(xn - x, yn - y), 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cx = ((x + xn) * cruz).sum(axis=1) / (6 * area)
+        cy = ((y + yn) * cruz).sum(axis=1) / (6 * area)
+
+    pontos = valido.sum(axis=1)
+    raio = np.hypot(x, y)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        raio_medio = np.where(valido, raio, 0).sum(axis=1) / pontos
+    poligono = pontos >= 3
+    vazia = pontos == 0
+    return {
+        "pontos": pontos,
+        "area_mm2": np.where(poligono, np.abs(area), np.nan),
+        "perimetro_mm": np.where(poligono, perimetro, np.nan),
+        "centro_x_mm": np.where(poligono, cx, np.nan),
+        "centro_y_mm": np.where(poligono, cy, np.nan),
+        "raio_min_mm": np.where(vazia, np.nan, np.where(valido, raio, np.inf).min(axis=1)),
+        "raio_medio_mm": raio_medio,
+        "raio_max_mm": np.where(vazia, np.nan, np.where(valido, raio, -np.inf).max(axis=1)),
+    }
+
+
+@cronometrar()
+def metricas_camadas(df, max_lacuna=3, pts_por_camada=None):
+    """
+    Perfil geométrico por camada dos pontos reconstruídos, sobre a mesma
+    grade (com as mesmas lacunas preenchidas) que vira a malha do STL.
+
+    Args:
+        df (pd.DataFrame): colunas ['Camada', 'X_mm', 'Y_mm', 'Z_mm'] (+ 'Angulo_rad').
+        max_lacuna (int): Ver exportar_stl.preencher_lacunas.
+        pts_por_camada (int): Tamanho da grade angular; inferido se None.
+
+    Returns:
+        pd.DataFrame: Camada, Z_mm, Pontos, Area_mm2, Perimetro_mm, Diametro_eq_mm
+            (círculo de mesma área), Raio_min_mm, Raio_medio_mm, Raio_max_mm,
+            Centro_X_mm, Centro_Y_mm.
+    """
+    from exportar_stl import montar_grade, preencher_lacunas
+
+    grade, z_camadas, _ = montar_grade(df, pts_por_camada)
+    grade = preencher_lacunas(grade, z_camadas, max_lacuna)
+    m = metricas_grade(grade)
+    return pd.DataFrame({
+        "Camada": np.unique(df["Camada"].to_numpy()),
+        "Z_mm": z_camadas,
+        "Pontos": m["pontos"],
+        "Area_mm2": m["area_mm2"],
+        "Perimetro_mm": m["perimetro_mm"],
+        "Diametro_eq_mm": 2 * np.sqrt(m["area_mm2"] / np.pi),
+        "Raio_min_mm": m["raio_min_mm"],
+        "Raio_medio_mm": m["raio_medio_mm"],
+        "Raio_max_mm": m["raio_max_mm"],
+        "Centro_X_mm": m["centro_x_mm"],
+        "Centro_Y_mm": m["centro_y_mm"],
+    })
+
+
+def resumo_camadas(perfil):
+    """
+    Volume e área de superfície a partir do perfil por camada.
+
+    O volume integra a área das seções em Z (trapézios); a área de
+    superfície soma as faixas laterais entre camadas vizinhas (perímetro
+    médio x geratriz) e as duas tampas. Camadas sem polígono são puladas.
+
+    Returns:
+        dict: volume_mm3, area_superficie_mm2, altura_mm, camadas,
+            diametro_eq_max_mm, raio_max_mm
+    """
+    p = perfil[np.isfinite(perfil["Area_mm2"].to_numpy())]
+    z = p["Z_mm"].to_numpy()
+    area = p["Area_mm2"].to_numpy()
+    perimetro = p["Perimetro_mm"].to_numpy()
+    raio = p["Raio_medio_mm"].to_numpy()
+    if len(p) == 0:
+        return {"volume_mm3": 0.0, "area_superficie_mm2": 0.0, "altura_mm": 0.0, "camadas": 0,
+                "diametro_eq_max_mm": np.nan, "raio_max_mm": np.nan}
+
+    dz = np.diff(z)
+    volume = float(np.sum(dz * (area[1:] + area[:-1]) / 2))
+    geratriz = np.hypot(dz, np.diff(raio))  # inclinação média da parede entre as camadas
+    lateral = float(np.sum(geratriz * (perimetro[1:] + perimetro[:-1]) / 2))
+    return {
+        "volume_mm3": abs(volume),
+        "area_superficie_mm2": lateral + float(area[0] + area[-1]),
+        "altura_mm": float(z.max() - z.min()),
+        "camadas": int(len(p)),
+        "diametro_eq_max_mm": float(p["Diametro_eq_mm"].max()),
+        "raio_max_mm": float(p["Raio_max_mm"].max()),
+    }
+
+
+# ==================================================
+# MALHAS
+# ==================================================
+
+def volume_malha(vertices, faces):
+    """Volume delimitado pela malha (soma dos tetraedros com a origem; exato se fechada), em mm³."""
+    a, b, c = vertices[faces[:, 0]], vertices[faces[:, 1]], vertices[faces[:, 2]]
+    return float(abs(np.einsum("ij,ij->i", a, np.cross(b, c)).sum()) / 6)
+
+
+def area_malha(vertices, faces):
+    """Área total dos triângulos, em mm²."""
+    a, b, c = vertices[faces[:, 0]], vertices[faces[:, 1]], vertices[faces[:, 2]]
+    return float(np.linalg.norm(np.cross(b - a, c - a), axis=1).sum() / 2)
+
+
+def secao_malha(vertices, faces, z):
+    """
+    Seção da malha pelo plano Z = z.
+
+    Cada triângulo que cruza o plano vira um segmento, orientado de modo
+    que a normal do triângulo fique à direita (contorno externo anti-horário
+    com normais para fora). Vértices exatamente em z contam como acima.
+
+    Returns:
+        dict: area_mm2, perimetro_mm e segmentos (m, 2, 3)
+    """
+    tri = vertices[faces]
+    acima = tri[..., 2] >= z
+    cruza = acima.any(axis=1) & ~acima.all(axis=1)
+    tri, acima = tri[cruza], acima[cruza]
+    if len(tri) == 0:
+        return {"area_mm2": 0.0, "perimetro_mm": 0.0, "segmentos": np.empty((0, 2, 3))}
+
+    # interseção do plano com cada aresta (i, i+1); exatamente duas cruzam
+    inicio, fim = tri, np.roll(tri, -1, axis=1)
+    corta = acima != np.roll(acima, -1, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):  # arestas horizontais não cortam
+        t = (z - inicio[..., 2]) / (fim[..., 2] - inicio[..., 2])
+        pontos = inicio + t[..., None] * (fim - inicio)
+    arestas = np.argsort(~corta, axis=1, kind="stable")[:, :2]
+    linhas = np.arange(len(tri))[:, None]
+    p, q = pontos[linhas, arestas][:, 0], pontos[linhas, arestas][:, 1]
+
+    normal = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    d = q - p
+    inverter = d[:, 1] * normal[:, 0] - d[:, 0] * normal[:, 1] < 0
+    p, q = np.where(inverter[:, None], q, p), np.where(inverter[:, None], p, q)
+
+    area = 0.5 * np.sum(p[:, 0] * q[:, 1] - q[:, 0] * p[:, 1])
+    return {
+        "area_mm2": float(area),
+        "perimetro_mm": float(np.linalg.norm(q - p, axis=1).sum()),
+        "segmentos": np.stack((p, q), axis=1),
+    }
+
+
+def fatiar_malha(vertices, faces, zs):
+    """
+    Seções da malha em vários Z.
+
+    Returns:
+        pd.DataFrame: Z_mm, Area_mm2, Perimetro_mm, Diametro_eq_mm, Segmentos
+    """
+    # só os triângulos cuja faixa em Z contém o plano entram em cada seção
+    zs = np.atleast_1d(np.asarray(zs, dtype=float))
+    z_tri = vertices[faces][..., 2]
+    z_min, z_max = z_tri.min(axis=1), z_tri.max(axis=1)
+    linhas = []
+    for z in zs:
+        secao = secao_malha(vertices, faces[(z_min <= z) & (z_max >= z)], z)
+        linhas.append((z, secao["area_mm2"], secao["perimetro_mm"], len(secao["segmentos"])))
+    perfil = pd.DataFrame(linhas, columns=["Z_mm", "Area_mm2", "Perimetro_mm", "Segmentos"])
+    perfil.insert(3, "Diametro_eq_mm", 2 * np.sqrt(perfil["Area_mm2"].clip(lower=0) / np.pi))
+    return perfil
+
+
+def metricas_malha(vertices, faces):
+    """
+    Volume, área e extensão de uma malha (ex.: STL de referência).
+
+    Returns:
+        dict: volume_mm3, area_superficie_mm2, altura_mm, triangulos,
+            arestas_borda (0 numa malha fechada; senão o volume não vale)
+    """
+    metricas = {
+        "volume_mm3": volume_malha(vertices, faces),
+        "area_superficie_mm2": area_malha(vertices, faces),
+        "altura_mm": float(np.ptp(vertices[np.unique(faces), 2])) if len(faces) else 0.0,
+        "triangulos": int(len(faces)),
+        "arestas_borda": arestas_borda(faces),
+    }
+    logger.info(f"Malha: volume {metricas['volume_mm3'] / 1000:.2f} cm³, "
+                f"área {metricas['area_superficie_mm2'] / 100:.2f} cm²")
+    if metricas["arestas_borda"]:
+        logger.warning(f"Malha aberta ({metricas['arestas_borda']} arestas de borda): o volume não é confiável; "
+                       f"exporte com tampas ou use o perfil por camada do CSV")
+    return metricas
+
+
+def arestas_borda(faces):
+    """Número de arestas usadas por um único triângulo (0 numa malha fechada)."""
+    arestas = np.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    _, usos = np.unique(arestas, axis=0, return_counts=True)
+    return int(np.count_nonzero(usos == 1))
+
+
+def ler_malha_stl(caminho):
+    """Vértices e faces indexadas de um STL (vértices repetidos unificados)."""
+    from stl import mesh
+
+    triangulos = mesh.Mesh.from_file(caminho).vectors.reshape(-1, 3).astype(float)
+    vertices, faces = np.unique(triangulos, axis=0, return_inverse=True)
+    return vertices, faces.reshape(-1, 3)
+
+
+if __name__ == "__main__":
+    # cilindro de raio 40 mm e 100 mm de altura: compara com os valores exatos
+    import time
+    from exportar_stl import malha_cilindrica
+
+    raio, altura, pts, camadas = 40.0, 100.0, 512, 401
+    ang = np.linspace(0, 2 * np.pi, pts, endpoint=False)
+    z = np.linspace(0, altura, camadas)
+    A, Z = np.meshgrid(ang, z)
+    df = pd.DataFrame({"Camada": np.repeat(np.arange(1, camadas + 1), pts), "Angulo_rad": A.ravel(),
+                       "X_mm": raio * np.cos(A).ravel(), "Y_mm": raio * np.sin(A).ravel(), "Z_mm": Z.ravel()})
+
+    inicio = time.perf_counter()
+    perfil = metricas_camadas(df)
+    resumo = resumo_camadas(perfil)
+    t_camadas = time.perf_counter() - inicio
+    area_poligono = 0.5 * pts * raio ** 2 * np.sin(2 * np.pi / pts)  # polígono regular inscrito
+    print(f"{len(df)} pontos: perfil e resumo em {t_camadas * 1000:.1f} ms")
+    print(f"  área da camada {perfil['Area_mm2'].iloc[0]:.3f} mm² (polígono exato {area_poligono:.3f})")
+    print(f"  volume {resumo['volume_mm3']:.0f} mm³ (exato {area_poligono * altura:.0f})")
+
+    vertices, faces = malha_cilindrica(df, tampas=True)
+    inicio = time.perf_counter()
+    secoes = fatiar_malha(vertices, faces, [12.34, 50.0, 87.6])
+    t_secoes = time.perf_counter() - inicio
+    print(f"{len(faces)} triângulos: 3 seções em {t_secoes * 1000:.1f} ms")
+    print(secoes.to_string(index=False))
+    print(f"  volume da malha {volume_malha(vertices, faces):.0f} mm³, área {area_malha(vertices, faces):.0f} mm² "
+          f"(resumo das camadas: {resumo['area_superficie_mm2']:.0f} mm²)")
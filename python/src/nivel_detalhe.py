@@ -0,0 +1,146 @@
+from collections import OrderedDict
+import numpy as np
+
+def indices_voxel(xs, ys, zs, tamanho):
+    """
+    Um ponto representante (o primeiro) por voxel cúbico de aresta `tamanho`.
+
+    Args:
+        xs, ys, zs (np.ndarray): Coordenadas da nuvem (mm).
+        tamanho (float): Aresta do voxel (mm).
+
+    Returns:
+        np.ndarray: Índices dos pontos mantidos, em ordem crescente.
+    """
+    pontos = np.column_stack((xs, ys, zs))
+    celulas = np.floor((pontos - pontos.min(axis=0)) / tamanho).astype(np.int64)
+    dims = celulas.max(axis=0) + 1
+    chaves = np.ravel_multi_index(celulas.T, dims)
+    _, indices = np.unique(chaves, return_index=True)
+    indices.sort()
+    return indices
+
+
+def decimar_nuvem(xs, ys, zs, max_pontos, iteracoes=6):
+    """
+    Reduz a nuvem a no máximo `max_pontos` com grade de voxels.
+    A aresta é ajustada supondo nuvem de superfície (pontos ~ 1/aresta²);
+    se não convergir, completa com decimação por passo fixo.
+
+    Returns:
+        np.ndarray: Índices dos pontos mantidos.
+    """
+    n = len(xs)
+    if n <= max_pontos:
+        return np.arange(n)
+
+    extensao = np.array([np.ptp(xs), np.ptp(ys), np.ptp(zs)])
+    area = max(2 * (extensao[0]*extensao[1] + extensao[1]*extensao[2] + extensao[0]*extensao[2]), 1e-9)
+    tamanho = np.sqrt(area / max_pontos)
+    for _ in range(iteracoes):
+        indices = indices_voxel(xs, ys, zs, tamanho)
+        if len(indices) <= max_pontos:
+            return indices
+        tamanho *= np.sqrt(len(indices) / max_pontos) * 1.05
+    passo = int(np.ceil(len(indices) / max_pontos))
+    return indices[::passo]
+
+
+def orcamento_pontos(largura_px, altura_px, pontos_por_pixel=0.1, minimo=2000, maximo=50000):
+    """
+    Número de pontos da prévia proporcional à área do canvas,
+    arredondado para o milhar (evita recalcular a cada pixel de redimensionamento).
+    """
+    orcamento = int(largura_px * altura_px * pontos_por_pixel)
+    return int(np.clip(round(orcamento, -3), minimo, maximo))
+
+
+class CacheNivelDetalhe:
+    """Cache LRU de índices decimados por (parâmetros da reconstrução, orçamento)."""
+    def __init__(self, tamanho_max=8):
+        self.tamanho_max = tamanho_max
+        self.itens = OrderedDict()
+
+    def indices(self, chave, xs, ys, zs, max_pontos):
+        chave = (chave, max_pontos)
+        if chave in self.itens:
+            self.itens.move_to_end(chave)
+            return self.itens[chave]
+        indices = decimar_nuvem(xs, ys, zs, max_pontos)
+        self.itens[chave] = indices
+        if len(self.itens) > self.tamanho_max:
+            self.itens.popitem(last=False)
+        return indices
+
+
+class DecimacaoIncremental:
+    """
+    Decimação por voxels de uma nuvem que só cresce (prévia da varredura).
+
+    Guarda as chaves dos voxels já ocupados: a cada chamada só os pontos
+    novos são classificados, e o primeiro de cada voxel ainda vazio entra.
+    Se os mantidos passarem do orçamento, a aresta cresce e a nuvem é
+    refeita mirando em `fracao` do orçamento, para que isso só se repita
+    quando a área varrida crescer na mesma proporção (custo amortizado
+    linear no número de pontos, e não uma passada na nuvem toda por quadro).
+    """
+    def __init__(self, fracao=0.5, iteracoes=6):
+        self.fracao = fracao
+        self.iteracoes = iteracoes
+        self.versao = None
+        self.max_pontos = None
+        self._limpar(None)
+
+    def _limpar(self, tamanho):
+        self.tamanho = tamanho
+        self.n = 0
+        self.chaves = np.empty(0, dtype=np.int64)     # voxels ocupados, ordenados
+        self.mantidos = np.empty(0, dtype=np.int64)   # índices dos representantes, crescentes
+
+    def _acrescentar(self, xs, ys, zs):
+        inicio, self.n = self.n, len(xs)
+        if self.n == inicio: return
+        celulas = np.floor(np.column_stack((xs[inicio:], ys[inicio:], zs[inicio:])) / self.tamanho)
+        celulas = celulas.astype(np.int64) & 0x1FFFFF  # 21 bits por eixo: 2 milhões de voxels por lado
+        chaves = (celulas[:, 0] << 42) | (celulas[:, 1] << 21) | celulas[:, 2]
+        chaves, primeiros = np.unique(chaves, return_index=True)
+        vazios = ~np.isin(chaves, self.chaves, assume_unique=True)
+        self.chaves = np.union1d(self.chaves, chaves[vazios])
+        self.mantidos = np.concatenate((self.mantidos, np.sort(primeiros[vazios]) + inicio))
+
+    def _refazer(self, xs, ys, zs, max_pontos):
+        alvo = self.fracao * max_pontos
+        extensao = np.array([np.ptp(xs), np.ptp(ys), np.ptp(zs)])
+        area = max(2 * (extensao[0]*extensao[1] + extensao[1]*extensao[2] + extensao[0]*extensao[2]), 1e-9)
+        tamanho = np.sqrt(area / alvo)
+        if self.tamanho is not None:
+            tamanho = max(tamanho, self.tamanho * 1.05)
+        for _ in range(self.iteracoes):
+            self._limpar(tamanho)
+            self._acrescentar(xs, ys, zs)
+            if len(self.mantidos) <= max_pontos:
+                return
+            tamanho *= np.sqrt(len(self.mantidos) / alvo) * 1.05
+        self.mantidos = self.mantidos[::int(np.ceil(len(self.mantidos) / max_pontos))]
+
+    def indices(self, xs, ys, zs, max_pontos, versao=None):
+        """
+        Índices dos pontos mantidos (no máximo `max_pontos`, em ordem crescente).
+
+        Args:
+            versao: Muda quando a nuvem é refeita do zero (ex.: calibração
+                nova); junto com um orçamento diferente, descarta o estado.
+        """
+        n = len(xs)
+        if versao != self.versao or max_pontos != self.max_pontos or n < self.n:
+            self.versao, self.max_pontos = versao, max_pontos
+            self._limpar(None)
+        if self.tamanho is None:
+            if n <= max_pontos:
+                return np.arange(n)
+            self._refazer(xs, ys, zs, max_pontos)
+        else:
+            self._acrescentar(xs, ys, zs)
+            if len(self.mantidos) > max_pontos:
+                self._refazer(xs, ys, zs, max_pontos)
+        return self.mantidos
@@ -0,0 +1,26 @@
+# ----- Parâmetros padrões -----
+parametros_padrao = {
+    "pts_camada": 128,
+    "altura_camada": 5,
+    "altura_max": 150,
+    "dist_sensor": 157,
+    "alin_hor": 5,
+    "escala": 1.10,
+    "dist_min": 20,
+    "dist_max": 300,
+    "suavizacao": 3,
+    "tolerancia_qc": 0.5,  # mm, controle de qualidade contra o STL de referência
+    "compacto": False,  # reconstrução em float32 (varreduras muito grandes)
+    "perfil_sensor": "firmware",  # perfil do VL53L0X: firmware (não altera), rapido, padrao, preciso, longo, automatico
+    "sigma_alvo": 1.0,  # mm, ruído desejado no perfil automático
+    "vel_base": 341,  # passos/s (341 = 5 rpm, o padrão do firmware)
+    "vel_elev": 341,  # passos/s
+    "aceleracao": 0,  # passos/s², rampa trapezoidal dos dois motores (0 = sem rampa)
+    "passos_por_volta": 2038,  # passos por volta
+    "altura_volta": 70, # mm por volta elevação
+    "baudrate": 115200,
+    "porta_serial": 7
+}
+
+# elev: uma volta = 70 mm
+# base: uma volta = 360 graus
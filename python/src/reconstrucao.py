@@ -1,65 +1,177 @@
 import pandas as pd
 import numpy as np
-from scipy.ndimage import uniform_filter1d
+from instrumentacao import cronometrar
 
+# colunas por ponto que acompanham X/Y/Z (ângulo de aquisição e confiança)
+COLUNAS_EXTRAS = ("Angulo_rad", "Desvio_mm")
+
+# modo compacto: tipos lidos direto do CSV (colunas ausentes são ignoradas)
+TIPOS_COMPACTOS = {"Camada": np.int32, "Ponto": np.int32, "Passo": np.int32,
+                   "Angulo_rad": np.float32, "Distancia_mm": np.float32, "Desvio_mm": np.float32}
+SEM_LEITURA = np.iinfo(np.uint16).max  # TIMEOUT nas distâncias uint16 (o VL53L0X não passa de 2 m)
+
+
+def tabela_trig(angulos, indices=None, dtype=np.float64):
+    """
+    cos e sin de cada leitura, calculados uma vez por ângulo distinto.
+
+    Os ângulos de aquisição (2*pi*ponto/pts_por_camada) se repetem exatamente
+    em todas as camadas. Com `indices` (coluna Ponto) a tabela sai sem
+    ordenar nada, desde que cada índice corresponda sempre ao mesmo ângulo;
+    senão os ângulos distintos vêm de np.unique.
+
+    Returns:
+        tuple: (cos, sin) por leitura, no tipo `dtype`
+    """
+    angulos = np.asarray(angulos)
+    if indices is not None: indices = np.asarray(indices, dtype=np.intp)
+    if indices is not None and len(indices) and indices.min() >= 0:
+        algum = np.zeros(indices.max() + 1, dtype=np.intp)
+        algum[indices] = np.arange(len(indices))  # qualquer leitura de cada índice serve
+        tabela = angulos[algum]
+        if np.array_equal(tabela[indices], angulos):
+            tabela = tabela.astype(np.float64)
+            return np.cos(tabela).astype(dtype)[indices], np.sin(tabela).astype(dtype)[indices]
+    unicos, inverso = np.unique(angulos, return_inverse=True)
+    unicos = unicos.astype(np.float64)
+    return np.cos(unicos).astype(dtype)[inverso], np.sin(unicos).astype(dtype)[inverso]
+
+
+def ler_leituras(arquivo_csv, compacto=False):
+    """
+    Lê o CSV bruto. No modo compacto as colunas já chegam em 32 bits e as
+    distâncias inteiras (as do VL53L0X, sem sobreamostragem) viram uint16,
+    com SEM_LEITURA nos TIMEOUTs.
+    """
+    if not compacto:
+        return pd.read_csv(arquivo_csv)
+    df = pd.read_csv(arquivo_csv, dtype=TIPOS_COMPACTOS)
+    distancias = df['Distancia_mm'].to_numpy()
+    validas = distancias[~np.isnan(distancias)]
+    if np.array_equal(validas, np.round(validas)) and (len(validas) == 0 or validas.max() < SEM_LEITURA):
+        df['Distancia_mm'] = np.where(np.isnan(distancias), SEM_LEITURA, distancias).astype(np.uint16)
+    return df
+
+
+def polar_para_cartesiano(camadas, angulos, distancias,
+                          altura_inicial, altura_camada,
+                          dist_sensor, alin_horizontal, escala, trig=None):
+    """
+    Modelo de calibração + conversão polar -> cartesiana, vetorizado.
+    O tipo de ponto flutuante de `distancias` (float32 ou float64) é mantido.
+
+    Args:
+        camadas (np.ndarray): Índice da camada de cada leitura (a partir de 1).
+        angulos (np.ndarray): Ângulo da base (rad).
+        distancias (np.ndarray): Distância bruta do sensor (mm).
+        trig (tuple): (cos, sin) já calculados por leitura (ver tabela_trig).
+
+    Returns:
+        tuple: (xs, ys, zs) como np.ndarray
+    """
+    if trig is None:
+        trig = np.cos(angulos), np.sin(angulos)
+    # inverte a medição e corrige o deslocamento horizontal do sensor
+    raio = np.sqrt((dist_sensor - distancias)**2 + alin_horizontal**2) * escala
+    xs = raio * trig[0]
+    ys = raio * trig[1]
+    zs = altura_camada * (camadas - 1) + altura_inicial
+    if raio.dtype == np.float32: zs = zs.astype(np.float32)
+    return xs, ys, zs
+
+
+def _em_ordem(df):
+    """True se as leituras já estão por camada e ponto (varredura uniforme): dispensa a ordenação."""
+    chave = df['Camada'].to_numpy().astype(np.int64)
+    if 'Ponto' in df.columns and len(df):
+        ponto = df['Ponto'].to_numpy().astype(np.int64)
+        if ponto.min() < 0: return False
+        chave = chave * (int(ponto.max()) + 1) + ponto
+    return bool(np.all(chave[1:] >= chave[:-1]))
+
+
+def reconstruir_dataframe(df: pd.DataFrame,
+                          altura_inicial: float,
+                          altura_camada: float,
+                          dist_sensor: float,
+                          alin_horizontal: float,
+                          escala: float,
+                          compacto: bool = False) -> pd.DataFrame:
+    """
+    Reconstrói pontos 3D a partir das medições polares já carregadas.
+
+    As leituras podem estar em qualquer ordem (passes de multirresolução
+    acrescentam camadas e ângulos intercalados ao fim do arquivo): a saída
+    é ordenada por camada e, dentro dela, pelo ponto da volta.
+
+    Com `compacto`, X/Y/Z/Angulo_rad saem em float32 (metade da memória;
+    erro de arredondamento da ordem de 1e-5 mm, muito abaixo do milímetro
+    do sensor).
+
+    Returns:
+        pd.DataFrame: colunas ['Camada', 'X_mm', 'Y_mm', 'Z_mm', 'Angulo_rad']
+            (e 'Desvio_mm', se houver)
+    """
+    tipo = np.float32 if compacto else np.float64
+    if not _em_ordem(df):
+        ordem = ['Camada', 'Ponto'] if 'Ponto' in df.columns else ['Camada']
+        df = df.sort_values(by=ordem, kind='stable')
+    validas = df['Distancia_mm'].notna()
+    if df['Distancia_mm'].dtype == np.uint16:
+        validas &= df['Distancia_mm'] != SEM_LEITURA
+    df = df[validas]
+
+    camadas = df['Camada'].to_numpy()
+    angulos = df['Angulo_rad'].to_numpy(dtype=tipo)
+    trig = tabela_trig(angulos, df['Ponto'].to_numpy() if 'Ponto' in df.columns else None, tipo)
+    xs, ys, zs = polar_para_cartesiano(
+        camadas,
+        angulos,
+        df['Distancia_mm'].to_numpy(dtype=tipo),
+        altura_inicial, altura_camada, dist_sensor, alin_horizontal, escala, trig
+    )
+
+    # cria DataFrame direto; o ângulo de aquisição vai junto para a malha em grade
+    pontos = pd.DataFrame({
+        "Camada": camadas,
+        "X_mm": xs,
+        "Y_mm": ys,
+        "Z_mm": zs,
+        "Angulo_rad": angulos
+    })
+    if 'Desvio_mm' in df.columns:  # confiança da sobreamostragem (medicao_robusta)
+        pontos["Desvio_mm"] = df['Desvio_mm'].to_numpy(dtype=tipo)
+    return pontos
+
+
+def filtrar_grade(df: pd.DataFrame, salto_camada: int, salto_ponto: int) -> pd.DataFrame:
+    """Leituras na subgrade de um passe (camadas 1, 1+salto, ... e pontos múltiplos do salto)."""
+    return df[((df['Camada'] - 1) % salto_camada == 0) & (df['Ponto'] % salto_ponto == 0)]
+
+
+@cronometrar()
 def reconstruir_pontos(arquivo_csv: str,
                        altura_inicial: float,
                        altura_camada: float,
                        dist_sensor: float,
                        alin_horizontal: float,
-                       escala: float) -> pd.DataFrame:
+                       escala: float,
+                       compacto: bool = False) -> pd.DataFrame:
     """
     Reconstrói pontos 3D a partir de medições polares armazenadas em CSV.
-    Itera por todas as camadas registradas.
+    Processa todas as camadas registradas de uma vez (vetorizado).
 
     Args:
         arquivo_csv (str): Caminho para o arquivo de medições.
         altura_inicial (float): Posição Z da primeira camada.
         altura_camada (float): Incremento de altura entre camadas.
+        compacto (bool): Leituras em 32 bits/uint16 e pontos em float32 (ver ler_leituras).
 
     Returns:
-        dict: {camada: (xs, ys, zs)} com arrays numpy de pontos para cada camada
+        pd.DataFrame: colunas de reconstruir_dataframe, ordenadas por camada
     """
-    df = pd.read_csv(arquivo_csv)
-    
-    def calibracao(dist):
-        if dist is None or np.isnan(dist): return np.nan
-        # invert a medição e corrige o deslocamento horizontal do sensor
-        return np.sqrt((dist_sensor - dist)**2 + alin_horizontal**2) * escala
-
-    df['Distancia_calibrada'] = df['Distancia_mm'].apply(
-        lambda d: calibracao(d)
-    )
-    
-    camadas, xs, ys, zs = [], [], [], []
-    for camada in sorted(df['Camada'].unique()):
-        linhas = df[df['Camada'] == camada]
-
-        for _, linha in linhas.iterrows():
-            dist = linha['Distancia_calibrada']
-            if pd.isna(dist): continue
-            
-            ang = linha['Angulo_rad']
-
-            # Conversão polar para cartesiana (plano XY)
-            x = dist * np.cos(ang)
-            y = dist * np.sin(ang)
-
-            # Altura da camada no eixo Z
-            z = altura_camada * (camada - 1) + altura_inicial
-
-            camadas.append(camada)
-            xs.append(x)
-            ys.append(y)
-            zs.append(z)
-
-    # cria DataFrame direto
-    pontos = pd.DataFrame({
-        "Camada": camadas,
-        "X_mm": xs,
-        "Y_mm": ys,
-        "Z_mm": zs
-    })
+    pontos = reconstruir_dataframe(ler_leituras(arquivo_csv, compacto), altura_inicial, altura_camada,
+                                   dist_sensor, alin_horizontal, escala, compacto)
 
     # Salvar CSV consolidado
     nome_saida = arquivo_csv.replace(".csv", "_cart.csv")
@@ -68,26 +180,43 @@ def reconstruir_pontos(arquivo_csv: str,
     return pontos
 
 
+@cronometrar()
 def suavizar_pontos(pontos: pd.DataFrame, janela: int = 3) -> pd.DataFrame:
     """
     Suaviza todos os pontos de todas as camadas de uma reconstrução 3D
     usando média móvel circular (modo wrap).
 
+    Se houver a coluna 'Desvio_mm' (sobreamostragem), a média é ponderada
+    pelo inverso da variância de cada ponto: leituras confiáveis puxam as
+    vizinhas ruidosas, e não o contrário, o que borra menos as arestas.
+
     Args:
         pontos (pd.DataFrame): colunas ['Camada', 'X_mm', 'Y_mm', 'Z_mm']
         janela (int): tamanho da janela (ímpar, >=1)
 
     Returns:
-        pd.DataFrame: X e Y suavizados, Z inalterado
+        pd.DataFrame: X e Y suavizados; Z e as COLUNAS_EXTRAS inalterados
     """
     if janela <= 1: return pontos.copy()
     if janela % 2 == 0: janela += 1
 
+    from scipy.ndimage import uniform_filter1d  # scipy só é carregado se houver suavização
+
+    ponderada = 'Desvio_mm' in pontos.columns
+    if ponderada:
+        from medicao_robusta import pesos_confianca
+
     camadas_suavizadas = []
 
     for camada_val, grupo in pontos.groupby('Camada', sort=True):
-        xs = uniform_filter1d(grupo['X_mm'].values, size=janela, mode='wrap')
-        ys = uniform_filter1d(grupo['Y_mm'].values, size=janela, mode='wrap')
+        if ponderada:
+            pesos = pesos_confianca(grupo['Desvio_mm'].values)
+            soma_pesos = uniform_filter1d(pesos, size=janela, mode='wrap')
+            xs = uniform_filter1d(pesos * grupo['X_mm'].values, size=janela, mode='wrap') / soma_pesos
+            ys = uniform_filter1d(pesos * grupo['Y_mm'].values, size=janela, mode='wrap') / soma_pesos
+        else:
+            xs = uniform_filter1d(grupo['X_mm'].values, size=janela, mode='wrap')
+            ys = uniform_filter1d(grupo['Y_mm'].values, size=janela, mode='wrap')
         zs = grupo['Z_mm'].values  # Z não é suavizado
 
         df_camada = pd.DataFrame({
@@ -96,6 +225,9 @@ def suavizar_pontos(pontos: pd.DataFrame, janela: int = 3) -> pd.DataFrame:
             'Y_mm': ys,
             'Z_mm': zs
         })
+        for coluna in COLUNAS_EXTRAS:
+            if coluna in grupo.columns:
+                df_camada[coluna] = grupo[coluna].values
         camadas_suavizadas.append(df_camada)
 
     # Concatena todas as camadas
@@ -0,0 +1,144 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from logger_setup import logger
+
+def reconstruir_e_suavizar(arquivo_csv, parametros, cancelado=lambda: False):
+    """
+    Reconstrução + suavização com os parâmetros dados.
+
+    Args:
+        arquivo_csv (str): CSV bruto da varredura.
+        parametros (dict): altura_inicial, altura_camada, dist_sensor,
+            alin_horizontal, escala (fator) e suavizacao (janela); opcionais
+            registro (bool, registro entre camadas), passos_por_volta (só
+            usado se o <csv>_meta.json indicar passe único) e compacto
+            (bool, pontos em float32).
+        cancelado (callable): Consultado entre as etapas; se True, aborta.
+
+    Returns:
+        pd.DataFrame | None: Pontos suavizados, ou None se cancelado.
+    """
+    from reconstrucao import reconstruir_pontos, suavizar_pontos
+
+    pontos = reconstruir_pontos(
+        arquivo_csv=arquivo_csv,
+        altura_inicial=parametros["altura_inicial"],
+        altura_camada=parametros["altura_camada"],
+        dist_sensor=parametros["dist_sensor"],
+        alin_horizontal=parametros["alin_horizontal"],
+        escala=parametros["escala"],
+        compacto=parametros.get("compacto", False)
+    )
+    if cancelado(): return None
+    if parametros.get("registro"):
+        from registro_camadas import registrar_camadas, passos_para_deriva
+        passos_por_volta = passos_para_deriva(arquivo_csv, parametros.get("passos_por_volta"))
+        pontos, _ = registrar_camadas(pontos, passos_por_volta=passos_por_volta)
+        if cancelado(): return None
+    try:
+        return suavizar_pontos(pontos, parametros["suavizacao"])
+    except Exception as e:
+        logger.error(f"Erro na suavização: {e}")
+        return pontos.copy()
+
+
+class ReconstrucaoAssincrona(QObject):
+    """
+    Executa a reconstrução fora da thread da interface.
+
+    - Alterações em sequência dentro de `atraso_ms` viram um único pedido.
+    - Só um cálculo roda por vez; enquanto isso, apenas o pedido mais novo
+      fica na fila (os anteriores são substituídos sem rodar).
+    - Resultados de parâmetros desatualizados são descartados, e o cálculo
+      em andamento desiste entre as etapas se já estiver obsoleto.
+    """
+    concluida = pyqtSignal(object, object)  # pontos reconstruídos, parâmetros usados
+    falhou = pyqtSignal(str)
+    _terminou = pyqtSignal(int, object, object, str)  # geração, pontos, parâmetros, erro (na thread da UI)
+
+    def __init__(self, atraso_ms=150, parent=None):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reconstrucao")
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(atraso_ms)
+        self.timer.timeout.connect(self._disparar)
+        self._terminou.connect(self._ao_terminar)
+
+        self.geracao = 0
+        self.em_execucao = False
+        self.ultimo_pedido = None  # (arquivo, parametros) ainda não disparado
+        self.pendente = None       # (geracao, arquivo, parametros) aguardando o worker
+        self.t_alteracao = None
+
+        self.metricas = {"alteracoes": 0, "calculos": 0, "descartados": 0,
+                         "substituidos": 0, "latencias_ms": []}
+        self._interacao = {"alteracoes": 0, "calculos": 0, "descartados": 0}
+
+    def agendar(self, arquivo_csv, parametros):
+        """Registra uma alteração de parâmetro; dispara após o atraso sem novas alterações."""
+        self.ultimo_pedido = (arquivo_csv, dict(parametros))
+        self.t_alteracao = time.perf_counter()
+        self.metricas["alteracoes"] += 1
+        self._interacao["alteracoes"] += 1
+        self.timer.start()
+
+    def solicitar(self, arquivo_csv, parametros):
+        """Pede a reconstrução imediatamente (ex.: ao carregar um CSV)."""
+        self.agendar(arquivo_csv, parametros)
+        self.timer.stop()
+        self._disparar()
+
+    def encerrar(self):
+        self.timer.stop()
+        self.geracao += 1  # invalida o que estiver rodando
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # ----- interno -----
+    def _disparar(self):
+        if self.ultimo_pedido is None: return
+        self.geracao += 1
+        arquivo, parametros = self.ultimo_pedido
+        self.ultimo_pedido = None
+        if self.em_execucao:
+            if self.pendente is not None: self.metricas["substituidos"] += 1
+            self.pendente = (self.geracao, arquivo, parametros)
+        else:
+            self._iniciar(self.geracao, arquivo, parametros)
+
+    def _iniciar(self, geracao, arquivo, parametros):
+        self.em_execucao = True
+        self.metricas["calculos"] += 1
+        self._interacao["calculos"] += 1
+        self.executor.submit(self._executar, geracao, arquivo, parametros)
+
+    def _executar(self, geracao, arquivo, parametros):
+        # roda no worker
+        try:
+            pontos = reconstruir_e_suavizar(arquivo, parametros, lambda: geracao != self.geracao)
+            self._terminou.emit(geracao, pontos, parametros, "")
+        except Exception as e:
+            self._terminou.emit(geracao, None, parametros, str(e))
+
+    def _ao_terminar(self, geracao, pontos, parametros, erro):
+        # roda na thread da UI
+        self.em_execucao = False
+        if geracao != self.geracao or (pontos is None and not erro):
+            self.metricas["descartados"] += 1
+            self._interacao["descartados"] += 1
+        elif erro:
+            self.falhou.emit(erro)
+        else:
+            latencia = (time.perf_counter() - self.t_alteracao) * 1000
+            self.metricas["latencias_ms"].append(latencia)
+            i = self._interacao
+            logger.debug(f"Reconstrução: {i['alteracoes']} alterações -> {i['calculos']} cálculos "
+                         f"({i['descartados']} descartados), latência {latencia:.0f} ms")
+            self._interacao = {"alteracoes": 0, "calculos": 0, "descartados": 0}
+            self.concluida.emit(pontos, parametros)
+
+        if self.pendente is not None:
+            geracao, arquivo, parametros = self.pendente
+            self.pendente = None
+            self._iniciar(geracao, arquivo, parametros)
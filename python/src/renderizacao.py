@@ -0,0 +1,139 @@
+import time
+from collections import deque
+import numpy as np
+
+class RenderizadorNuvem:
+    """
+    Mantém os artistas de um eixo (2D ou 3D) e atualiza os dados no lugar,
+    sem clear() + scatter() a cada mudança.
+
+    - A nuvem completa (só no 3D) é um artista normal, redesenhado apenas
+      quando os dados ou os limites mudam.
+    - A camada destacada e o título são artistas "animados": ao trocar de
+      camada, o fundo em cache é restaurado e só eles são redesenhados (blit).
+    - Nada é desenhado enquanto o canvas está oculto; a atualização fica
+      pendente até ele aparecer.
+    - Com uma escala definida (definir_escala), os pontos que recebem
+      `valores` são coloridos num mapa divergente em ±limite; sem valores
+      voltam à cor fixa.
+    """
+    MAPA_CORES = 'coolwarm'
+
+    def __init__(self, canvas, ax, eixo_3d=False, max_quadros=240):
+        self.canvas = canvas
+        self.ax = ax
+        self.eixo_3d = eixo_3d
+        self.figura = canvas.figure
+        self.fundo = None
+        self.limites = None
+        self.pendente = False
+        self.limite_cores = None
+        self.tempos_quadro = deque(maxlen=max_quadros)
+
+        if eixo_3d:
+            self.sc_nuvem = ax.scatter([], [], [], c='blue', s=1)
+            self.sc_camada = ax.scatter([], [], [], c='red', s=5, animated=True)
+        else:
+            self.sc_nuvem = None
+            self.sc_camada = ax.scatter([], [], c='blue', s=10, animated=True)
+        self.titulo = ax.title
+        self.titulo.set_animated(True)
+
+        canvas.mpl_connect('draw_event', self._ao_desenhar)
+
+    # ----- estado -----
+    def definir_limites(self, lim_xy, lim_z=None):
+        """Aplica os limites dos eixos só se mudaram. Retorna True se mudaram."""
+        limites = (lim_xy, lim_z)
+        if limites == self.limites: return False
+        self.limites = limites
+        self.ax.set_xlim([-lim_xy, lim_xy])
+        self.ax.set_ylim([-lim_xy, lim_xy])
+        if self.eixo_3d and lim_z is not None:
+            self.ax.set_zlim([0, lim_z])
+        self.fundo = None
+        return True
+
+    def definir_escala(self, limite):
+        """Limite simétrico (±limite) do mapa de cores; None desliga a coloração por valor."""
+        if limite == self.limite_cores: return
+        self.limite_cores = limite
+        self.fundo = None
+
+    def definir_nuvem(self, xs, ys, zs, valores=None):
+        """Troca a nuvem completa (3D). Exige redesenho completo."""
+        if self.sc_nuvem is None: return
+        self.sc_nuvem._offsets3d = (xs, ys, zs)
+        self._colorir(self.sc_nuvem, valores, 'blue')
+        self.fundo = None
+
+    def definir_camada(self, xs, ys, zs, titulo, valores=None):
+        """Troca a camada destacada e o título."""
+        if self.eixo_3d:
+            self.sc_camada._offsets3d = (xs, ys, zs)
+        else:
+            self.sc_camada.set_offsets(np.column_stack((xs, ys)))
+        self._colorir(self.sc_camada, valores, 'red' if self.eixo_3d else 'blue')
+        self.titulo.set_text(titulo)
+
+    def _colorir(self, sc, valores, cor):
+        if valores is None or self.limite_cores is None:
+            if sc.get_array() is not None:
+                sc.set_array(None)
+                sc.set_facecolor(cor)
+                sc.set_edgecolor(cor)
+            return
+        sc.set_array(np.asarray(valores))
+        sc.set_cmap(self.MAPA_CORES)
+        sc.set_clim(-self.limite_cores, self.limite_cores)
+
+    # ----- desenho -----
+    def desenhar(self):
+        """
+        Desenha o estado atual: blit se o fundo em cache ainda vale,
+        senão redesenho completo. Canvas oculto fica pendente.
+        """
+        if not self.canvas.isVisible():
+            self.pendente = True
+            return
+        self.pendente = False
+
+        inicio = time.perf_counter()
+        if self.fundo is None:
+            self.canvas.draw()  # _ao_desenhar captura o novo fundo
+        else:
+            self.canvas.restore_region(self.fundo)
+            self._desenhar_animados()
+            self.canvas.blit(self.figura.bbox)
+        self.tempos_quadro.append(time.perf_counter() - inicio)
+
+    def _desenhar_animados(self):
+        if self.eixo_3d:
+            self.sc_camada.do_3d_projection()
+        self.ax.draw_artist(self.sc_camada)
+        self.ax.draw_artist(self.titulo)
+
+    def _ao_desenhar(self, event):
+        # todo redesenho completo (inclusive rotação com o mouse) renova o fundo
+        self.fundo = self.canvas.copy_from_bbox(self.figura.bbox)
+        self._desenhar_animados()
+
+    # ----- métricas -----
+    def estatisticas_quadros(self):
+        """
+        Estatísticas dos últimos quadros desenhados.
+
+        Returns:
+            dict: {'quadros', 'media_ms', 'p95_ms', 'max_ms', 'fps'}
+        """
+        if not self.tempos_quadro:
+            return {'quadros': 0, 'media_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0, 'fps': 0.0}
+        tempos = np.fromiter(self.tempos_quadro, dtype=float) * 1000
+        media = tempos.mean()
+        return {
+            'quadros': len(tempos),
+            'media_ms': float(media),
+            'p95_ms': float(np.percentile(tempos, 95)),
+            'max_ms': float(tempos.max()),
+            'fps': float(1000 / media) if media > 0 else float('inf'),
+        }
@@ -1,94 +1,677 @@
 import serial
 import time
 import csv
-import numpy as np
-import sys
+import math
+import os
 from logger_setup import logger
+from instrumentacao import cronometrar, medir
+from telemetria_serial import telemetria
 
 # ==================================================
 # COMUNICAÇÃO COM ARDUINO
 # ==================================================
 
-def conectar_serial(porta, baudrate):
+def conectar_serial(porta, baudrate, gravar=None):
+    """
+    Abre a porta serial.
+
+    Args:
+        porta (str): Ex.: "COM7". "replay:<arquivo.scnt>" reproduz uma
+            transcrição gravada (o mais rápido possível; "replay-rt:" em tempo real).
+        baudrate (int): Velocidade da porta.
+        gravar (str): Opcional, caminho .scnt para gravar tudo o que passar pela porta.
+    """
     try:
-        ser = serial.Serial(porta, baudrate, timeout=2)
+        if porta.startswith(("replay:", "replay-rt:")):
+            from transcricao_serial import SerialReplay
+            modo, caminho = porta.split(":", 1)
+            ser = SerialReplay(caminho, tempo_real=(modo == "replay-rt"))
+        else:
+            ser = serial.Serial(porta, baudrate, timeout=2)
+        if gravar:
+            from transcricao_serial import SerialGravador
+            ser = SerialGravador(ser, gravar, {"porta": porta, "baudrate": baudrate})
         logger.info(f"Conectado em {porta}")
         return ser
     except Exception as e:
         logger.error(f"Não foi possível abrir {porta}: {e}")
         
 def iniciar_arduino(ser):
+    """
+    Espera o fim do setup do Arduino.
+
+    Returns:
+        str: versão do firmware (linha FIRMWARE:), ou None em firmwares antigos.
+    """
+    global _orcamento_us
+    firmware = None
     inicio = time.time()
     while time.time() - inicio < 10:  # timeout 10s
         if ser.in_waiting > 0:
             linha = ser.readline().decode(errors="ignore").strip()
-            if "DONE" in linha:
-                logger.info("Arduino pronto")
-                return
+            if linha.startswith("FIRMWARE:"):
+                firmware = linha[len("FIRMWARE:"):].strip()
+            elif "DONE" in linha:
+                logger.info(f"Arduino pronto (firmware {firmware or 'sem versão'})")
+                # o Arduino reinicia ao abrir a porta: volta às configurações de fábrica
+                _orcamento_us = PERFIS_SENSOR["padrao"]
+                _movimento.update(MOVIMENTO_PADRAO)
+                return firmware
         time.sleep(0.1)
     raise TimeoutError("Timeout: Arduino não respondeu a tempo")
     
 
-def girar_motor(ser, motor_id, passos, timeout=20):
+def _ler_linha(ser):
+    """Lê uma linha da serial; em caso de bytes inválidos conta na telemetria e retorna None."""
+    try:
+        return ser.readline().decode().strip()
+    except UnicodeDecodeError:
+        telemetria.falha_decodificacao()
+        return None
+
+
+@cronometrar()
+def girar_motor(ser, motor_id, passos, timeout=None):
+    """
+    Gira um eixo e espera o DONE.
+
+    Args:
+        timeout (float): segundos; por padrão, a duração prevista pelo
+            movimento configurado no eixo (tempo_movimento) com folga.
+    """
+    if timeout is None:
+        timeout = 1.25 * tempo_movimento(abs(passos), *_movimento.get(motor_id, MOVIMENTO_PADRAO["BASE"])) + 2
     comando = f"{motor_id}:{passos}\n"
-    print(comando)
+    logger.debug("Comando %s", comando.strip())
+    t0 = telemetria.comando(motor_id)
     ser.write(comando.encode())
     inicio = time.time()
 
     while True:
-        if ser.in_waiting > 0:
-            resposta = ser.readline().decode().strip()
-            if resposta == f"{motor_id} DONE":
-                print(f"Motor [{motor_id}] girado {passos} passos")
-                return True
-            elif resposta.startswith("ERRO"):
-                raise Exception(resposta)
+        # readline bloqueia, sem segurar o GIL, até chegar uma linha ou vencer o timeout da porta
+        resposta = _ler_linha(ser)
+        if not resposta:
+            pass
+        elif resposta == f"{motor_id} DONE":
+            telemetria.resposta(motor_id, t0)
+            logger.debug("Motor [%s] girado %d passos", motor_id, passos)
+            return True
+        elif resposta.startswith("Executando"):
+            telemetria.eco(motor_id, t0)
+        elif resposta.startswith("ERRO"):
+            telemetria.erro(motor_id)
+            raise Exception(resposta)
+        else:
+            telemetria.lixo()
         if time.time() - inicio > timeout:
+            telemetria.timeout(motor_id)
             raise TimeoutError(f"[ERRO] Timeout no motor '{motor_id}'")
 
 
+@cronometrar()
 def medir_distancia(ser, timeout=5):
+    t0 = telemetria.comando("SENS")
     ser.write(b"SENS\n")
     inicio = time.time()
 
     while True:
-        if ser.in_waiting > 0:
-            linha = ser.readline().decode().strip()
-            if linha.startswith("DIST:"):
-                valor = linha.split(":")[1].strip()
-                if valor != "TIMEOUT":
-                    try:
-                        return int(valor)
-                    except ValueError:
-                        return None
-                else:
+        # readline bloqueia, sem segurar o GIL, até chegar uma linha ou vencer o timeout da porta
+        linha = _ler_linha(ser)
+        if linha and linha.startswith("DIST:"):
+            telemetria.resposta("SENS", t0)
+            valor = linha.split(":")[1].strip()
+            if valor != "TIMEOUT":
+                try:
+                    return int(valor)
+                except ValueError:
+                    telemetria.lixo()
                     return None
+            else:
+                telemetria.leitura_timeout()
+                return None
+        elif linha:
+            telemetria.lixo()
         if time.time() - inicio > timeout:
+            telemetria.timeout("SENS")
+            raise TimeoutError("Timeout na leitura do sensor")
+
+
+@cronometrar()
+def medir_leituras(ser, k, timeout=5):
+    """
+    Pede k leituras seguidas num único comando (SENS:k).
+
+    Returns:
+        list: k distâncias (mm), com None nas leituras que deram TIMEOUT.
+    """
+    t0 = telemetria.comando("SENS")
+    ser.write(f"SENS:{k}\n".encode())
+    inicio = time.time()
+
+    while True:
+        # readline bloqueia, sem segurar o GIL, até chegar uma linha ou vencer o timeout da porta
+        linha = _ler_linha(ser)
+        if linha and linha.startswith("DIST:"):
+            telemetria.resposta("SENS", t0)
+            leituras = []
+            for valor in linha[5:].split(","):
+                valor = valor.strip()
+                if valor.isdigit():
+                    leituras.append(int(valor))
+                else:
+                    telemetria.leitura_timeout()
+                    leituras.append(None)
+            return leituras
+        elif linha:
+            telemetria.lixo()
+        if time.time() - inicio > timeout + k * 2 * _orcamento_us / 1e6:  # o dobro do orçamento por leitura
+            telemetria.timeout("SENS")
             raise TimeoutError("Timeout na leitura do sensor")
 
 
+# ==================================================
+# PERFIL DO SENSOR (tempo por leitura x ruído)
+# ==================================================
+
+# orçamento de tempo por leitura de cada perfil do firmware (us)
+PERFIS_SENSOR = {"rapido": 20000, "padrao": 33000, "preciso": 200000, "longo": 33000}
+# orçamentos testados por escolher_orcamento, do mais rápido ao mais lento
+ORCAMENTOS_US = (20000, 33000, 50000, 100000, 200000)
+ORCAMENTO_MIN_US, ORCAMENTO_MAX_US = 20000, 200000  # faixa aceita pelo firmware (ORCAMENTO:)
+
+_orcamento_us = PERFIS_SENSOR["padrao"]  # último orçamento confirmado pelo firmware (timeouts das leituras)
+
+
+def _comando_sensor(ser, comando, timeout=5):
+    """Envia um comando de configuração e lê a resposta SENSOR:<perfil>,<orçamento_us>."""
+    global _orcamento_us
+    t0 = telemetria.comando("SENSOR")
+    ser.write(f"{comando}\n".encode())
+    inicio = time.time()
+
+    while True:
+        linha = _ler_linha(ser)
+        if linha and linha.startswith("SENSOR:"):
+            telemetria.resposta("SENSOR", t0)
+            perfil, orcamento = linha[len("SENSOR:"):].split(",")
+            _orcamento_us = int(orcamento)
+            return {"perfil": perfil.strip().lower(), "orcamento_us": _orcamento_us}
+        elif linha and linha.startswith("ERRO"):
+            telemetria.erro("SENSOR")
+            raise ValueError(linha)
+        elif linha:
+            telemetria.lixo()
+        if time.time() - inicio > timeout:
+            telemetria.timeout("SENSOR")
+            raise TimeoutError(f"Timeout em {comando} (firmware anterior à 1.2?)")
+
+
+def configurar_sensor(ser, perfil=None, orcamento_us=None):
+    """
+    Ajusta o perfil de medição e/ou o orçamento de tempo por leitura do VL53L0X.
+
+    Args:
+        perfil (str): Uma das chaves de PERFIS_SENSOR; aplicado antes do orçamento.
+        orcamento_us (int): Orçamento em microssegundos (20000 a 200000); o
+            firmware passa a informar o perfil 'personalizado'.
+            Sem nenhum dos dois, só consulta a configuração atual.
+
+    Returns:
+        dict: {'perfil', 'orcamento_us'} confirmados pelo firmware
+    """
+    if perfil is not None and perfil not in PERFIS_SENSOR:
+        raise ValueError(f"Perfil do sensor desconhecido: {perfil}")
+    if orcamento_us is not None and not ORCAMENTO_MIN_US <= orcamento_us <= ORCAMENTO_MAX_US:
+        raise ValueError(f"Orçamento do sensor fora da faixa ({ORCAMENTO_MIN_US} a {ORCAMENTO_MAX_US} us): "
+                         f"{orcamento_us}")
+    config = None
+    if perfil is not None:
+        config = _comando_sensor(ser, f"PERFIL:{perfil.upper()}")
+    if orcamento_us is not None:
+        config = _comando_sensor(ser, f"ORCAMENTO:{int(orcamento_us)}")
+    if config is None:
+        config = _comando_sensor(ser, "SENSOR?")
+    logger.info(f"Sensor: perfil {config['perfil']}, {config['orcamento_us'] / 1000:.0f} ms por leitura")
+    return config
+
+
+@cronometrar()
+def escolher_orcamento(ser, sigma_alvo_mm, perfil="padrao", orcamentos=ORCAMENTOS_US, amostras=32,
+                       falhas_max_pct=10.0):
+    """
+    Escolhe o orçamento mais rápido cujo ruído atende `sigma_alvo_mm`.
+
+    Com a base parada (o alvo atual à frente do sensor), mede `amostras`
+    leituras com cada orçamento (um único SENS:32 no padrão), do mais rápido ao mais lento, e para no
+    primeiro cujo desvio padrão fique dentro do alvo (e com no máximo
+    `falhas_max_pct` de TIMEOUTs). Se nenhum atender, fica o de menor ruído.
+
+    Returns:
+        dict: perfil e orcamento_us confirmados pelo firmware, sigma_mm, ms_por_leitura e
+            sondagem (lista com o que foi medido em cada orçamento)
+    """
+    from statistics import stdev
+
+    _comando_sensor(ser, f"PERFIL:{perfil.upper()}")
+    sondagem = []
+    for orcamento in sorted(orcamentos):
+        config = _comando_sensor(ser, f"ORCAMENTO:{orcamento}")
+        leituras = []
+        inicio = time.perf_counter()
+        while len(leituras) < amostras:
+            leituras += medir_leituras(ser, min(32, amostras - len(leituras)))
+        validas = [d for d in leituras if d is not None]
+        medida = {
+            "orcamento_us": orcamento,
+            "sigma_mm": stdev(validas) if len(validas) >= 3 else float("inf"),
+            "falhas_pct": 100 * (1 - len(validas) / len(leituras)),
+            "ms_por_leitura": 1000 * (time.perf_counter() - inicio) / len(leituras),
+        }
+        sondagem.append(medida)
+        logger.debug("Sondagem do sensor: %s", medida)
+        if medida["sigma_mm"] <= sigma_alvo_mm and medida["falhas_pct"] <= falhas_max_pct:
+            escolhida = medida
+            break
+    else:
+        escolhida = min(sondagem, key=lambda m: (m["falhas_pct"] > falhas_max_pct, m["sigma_mm"]))
+        logger.warning(f"Nenhum orçamento atingiu σ <= {sigma_alvo_mm} mm; "
+                       f"usando {escolhida['orcamento_us']} us (σ {escolhida['sigma_mm']:.2f} mm)")
+        config = _comando_sensor(ser, f"ORCAMENTO:{escolhida['orcamento_us']}")
+
+    logger.info(f"Orçamento do sensor: {escolhida['orcamento_us'] / 1000:.0f} ms "
+                f"(σ {escolhida['sigma_mm']:.2f} mm, {escolhida['ms_por_leitura']:.0f} ms por leitura medidos)")
+    # o perfil confirmado pelo firmware ('personalizado' depois de um ORCAMENTO), como em configurar_sensor
+    return {"perfil": config["perfil"], "orcamento_us": config["orcamento_us"], "sigma_mm": escolhida["sigma_mm"],
+            "ms_por_leitura": escolhida["ms_por_leitura"], "sondagem": sondagem}
+
+
+def preparar_sensor(ser, perfil=None, orcamento_us=None, sigma_alvo_mm=None):
+    """
+    Aplica as opções de sensor de uma varredura. Sem nenhuma, nada é enviado
+    (o firmware fica como está, e firmwares antigos continuam funcionando).
+
+    Returns:
+        dict | None: configuração aplicada (ver configurar_sensor / escolher_orcamento)
+    """
+    if sigma_alvo_mm is not None:
+        return escolher_orcamento(ser, sigma_alvo_mm, perfil or "padrao")
+    if perfil is not None or orcamento_us is not None:
+        return configurar_sensor(ser, perfil, orcamento_us)
+    return None
+
+
+# ==================================================
+# MOVIMENTO DOS MOTORES (velocidade e rampa)
+# ==================================================
+
+# (passos/s, passos/s²) por eixo no firmware: 5 rpm do antigo setSpeed(5), sem rampa
+MOVIMENTO_PADRAO = {"BASE": (341, 0), "ELEV": (341, 0)}
+# velocidades testadas por ajustar_velocidade (passos/s)
+VELOCIDADES_TESTE = (400, 500, 600, 800, 1000, 1200)
+
+_movimento = dict(MOVIMENTO_PADRAO)  # último movimento confirmado pelo firmware (timeouts dos motores)
+
+
+def _versao(firmware):
+    try:
+        return tuple(int(p) for p in firmware.split("."))
+    except (AttributeError, ValueError):
+        return ()
+
+
+def tempo_movimento(passos, velocidade, aceleracao=0):
+    """
+    Duração (s) de um giro de `passos` no perfil trapezoidal do firmware:
+    acelera até `velocidade`, segue constante e freia com a mesma
+    aceleração; triangular quando os passos não bastam para chegar à máxima.
+    """
+    if passos <= 0:
+        return 0.0
+    if aceleracao <= 0:
+        return passos / velocidade
+    rampa = velocidade ** 2 / (2 * aceleracao)  # passos para acelerar (e para frear)
+    if passos < 2 * rampa:
+        return 2 * math.sqrt(passos / aceleracao)
+    return 2 * velocidade / aceleracao + (passos - 2 * rampa) / velocidade
+
+
+def configurar_movimento(ser, eixo, velocidade, aceleracao=0, timeout=5):
+    """
+    Ajusta a velocidade máxima (passos/s) e a aceleração (passos/s², 0 = sem
+    rampa) de um eixo. Os timeouts de girar_motor passam a seguir o novo perfil.
+
+    Returns:
+        tuple: (velocidade, aceleracao) confirmadas pelo firmware (MOV:<eixo>,<v>,<a>)
+    """
+    comando = f"VEL:{eixo},{int(velocidade)},{int(aceleracao)}"
+    t0 = telemetria.comando("VEL")
+    ser.write(f"{comando}\n".encode())
+    inicio = time.time()
+
+    while True:
+        linha = _ler_linha(ser)
+        if linha and linha.startswith(f"MOV:{eixo},"):
+            telemetria.resposta("VEL", t0)
+            _, v, a = linha[len("MOV:"):].split(",")
+            _movimento[eixo] = (int(v), int(a))
+            logger.debug("Movimento [%s]: %s passos/s, %s passos/s²", eixo, v, a)
+            return _movimento[eixo]
+        elif linha and linha.startswith("ERRO"):
+            telemetria.erro("VEL")
+            raise ValueError(linha)
+        elif linha:
+            telemetria.lixo()
+        if time.time() - inicio > timeout:
+            telemetria.timeout("VEL")
+            raise TimeoutError(f"Timeout em {comando} (firmware anterior à 1.3?)")
+
+
+def preparar_movimento(ser, movimento=None, firmware=None):
+    """
+    Envia o movimento de cada eixo logo após a conexão.
+
+    Args:
+        movimento (dict): {"BASE": (passos/s, passos/s²), "ELEV": ...}; None não envia nada.
+        firmware (str): versão retornada por iniciar_arduino; abaixo da 1.3 o
+            firmware não aceita VEL e fica no padrão (com aviso se diferente).
+
+    Returns:
+        dict | None: movimento aplicado por eixo
+    """
+    if not movimento:
+        return None
+    if _versao(firmware) < (1, 3):
+        if any(tuple(m) != MOVIMENTO_PADRAO[eixo] for eixo, m in movimento.items()):
+            logger.warning(f"Firmware {firmware or 'sem versão'} não ajusta velocidade; motores a 5 rpm, sem rampa")
+        return None
+    aplicado = {eixo: configurar_movimento(ser, eixo, *m) for eixo, m in movimento.items()}
+    logger.info("Movimento: " + ", ".join(f"{e} {v} passos/s ({a} passos/s²)" for e, (v, a) in aplicado.items()))
+    return aplicado
+
+
+def _perfil_referencia(ser, eixo, pontos, passo, leituras):
+    """
+    Mediana das leituras em `pontos` posições do eixo espaçadas de `passo`
+    passos, voltando à posição inicial. Termina sempre com um giro negativo,
+    como as idas e voltas do teste, para a folga mecânica não contar como perda.
+    """
+    from statistics import median
+
+    perfil = []
+    for j in range(pontos):
+        if j: girar_motor(ser, eixo, passo)
+        validas = [d for d in medir_leituras(ser, leituras) if d is not None]
+        perfil.append(median(validas) if validas else None)
+    girar_motor(ser, eixo, -passo * (pontos - 1))
+    return perfil
+
+
+def _desvio_perfis(a, b):
+    diferencas = [abs(x - y) for x, y in zip(a, b) if x is not None and y is not None]
+    if not diferencas:
+        raise RuntimeError("Sem leituras válidas na feição de referência")
+    return max(diferencas)
+
+
+@cronometrar()
+def ajustar_velocidade(ser, eixo="BASE", velocidades=VELOCIDADES_TESTE, aceleracao=1000, excursao=2038,
+                       repeticoes=3, margem=0.2, tolerancia_mm=1.0, pontos=9, passo=8, leituras=8):
+    """
+    Sobe a velocidade de um eixo até aparecerem passos perdidos e fica com
+    a maior velocidade sem perdas reduzida pela `margem` de segurança.
+
+    Os passos perdidos aparecem como deslocamento do perfil de uma feição
+    de referência (uma quina ou degrau à frente do sensor, variando ao longo
+    do eixo). O perfil é medido no movimento atual, considerado seguro; a
+    cada velocidade, o eixo faz `repeticoes` idas e voltas de `excursao`
+    passos e o perfil é medido de novo. Um desvio acima do limiar (a
+    `tolerancia_mm` ou o dobro da repetibilidade medida parada, o que for
+    maior) encerra o teste. Depois de uma perda o eixo fica fora da posição
+    inicial: reposicione a peça antes de varrer.
+
+    Returns:
+        dict: eixo, velocidade, aceleracao (aplicadas), limite (primeira
+            velocidade com perda, ou None), limiar_mm e sondagem
+    """
+    seguro = _movimento[eixo]
+    referencia = _perfil_referencia(ser, eixo, pontos, passo, leituras)
+    limiar = max(tolerancia_mm, 2 * _desvio_perfis(referencia, _perfil_referencia(ser, eixo, pontos, passo, leituras)))
+    validos = [d for d in referencia if d is not None]
+    if max(validos) - min(validos) < 2 * limiar:
+        logger.warning(f"Feição de referência quase plana ao longo de {eixo} "
+                       f"({max(validos) - min(validos):.1f} mm); perdas de passos podem passar despercebidas")
+
+    aprovada, limite, sondagem = None, None, []
+    for velocidade in sorted(velocidades):
+        configurar_movimento(ser, eixo, velocidade, aceleracao)
+        for _ in range(repeticoes):
+            girar_motor(ser, eixo, excursao)
+            girar_motor(ser, eixo, -excursao)
+        configurar_movimento(ser, eixo, *seguro)
+        desvio = _desvio_perfis(referencia, _perfil_referencia(ser, eixo, pontos, passo, leituras))
+        sondagem.append({"velocidade": velocidade, "desvio_mm": desvio})
+        logger.debug("Ajuste de %s: %s", eixo, sondagem[-1])
+        if desvio > limiar:
+            limite = velocidade
+            logger.warning(f"{eixo} perdeu passos a {velocidade} passos/s (desvio {desvio:.1f} mm); "
+                           "o eixo saiu da posição inicial")
+            break
+        aprovada = velocidade
+
+    if aprovada is None:
+        logger.warning(f"{eixo} perdeu passos já na menor velocidade testada; mantido {seguro[0]} passos/s")
+        velocidade, acel = seguro
+    else:
+        if limite is None:
+            logger.info(f"{eixo} sem perdas até {aprovada} passos/s, a maior testada")
+        velocidade, acel = configurar_movimento(ser, eixo, max(seguro[0], int(aprovada * (1 - margem))), aceleracao)
+    logger.info(f"Velocidade de {eixo}: {velocidade} passos/s, aceleração {acel} passos/s²")
+    return {"eixo": eixo, "velocidade": velocidade, "aceleracao": acel, "limite": limite,
+            "limiar_mm": limiar, "sondagem": sondagem}
+
+
 # ==================================================
 # CICLO DE VARREDURA
 # ==================================================
 
-def ciclo_varredura_camada(ser, camada, arquivo_csv, pontos_por_camada, passos_por_volta, camadas, passos_por_camada):
+def executar_varredura(ser, arquivo_csv, pts_por_camada, camadas, passos_por_volta, passos_por_camada,
+                       ao_medir=None, parar=None, amostragem=None, medicao=None):
+    """
+    Executa a varredura completa e grava as medições brutas em CSV.
+    Ao final (ou ao ser interrompida), a elevação volta à posição inicial.
+
+    Args:
+        ser (serial.Serial): Conexão já iniciada com o Arduino.
+        arquivo_csv (str): Caminho do CSV de saída.
+        pts_por_camada (int): Pontos medidos por volta da base.
+        camadas (int): Número de camadas (numeradas a partir de 1).
+        passos_por_volta (int): Passos do motor da base por volta.
+        passos_por_camada (int): Passos do motor de elevação entre camadas.
+        ao_medir (callable): Opcional, chamado como ao_medir(camada, ponto, angulo, distancia)
+            a cada leitura. Roda na thread da varredura: deve ser barato.
+        parar (threading.Event): Opcional; quando setado, a varredura para no próximo ponto.
+        amostragem (AmostragemAdaptativa): Opcional; mede só as posições da grade
+            escolhidas por ela (a base pula as demais num único comando).
+        medicao (MedicaoRobusta): Opcional; várias leituras por parada, agregadas.
+            O CSV ganha as colunas Desvio_mm (confiança) e Leituras.
+
+    Returns:
+        bool: True se concluída, False se interrompida.
+        A telemetria do link é salva em <arquivo>_link.json.
+    """
+    passos_por_ponto = passos_por_volta // pts_por_camada
+    subidas = 0
+    concluida = True
+    telemetria.limpar()
+
+    logger.info(f"Iniciando varredura: {arquivo_csv}")
     with open(arquivo_csv, mode='w', newline='') as file:
         writer = csv.writer(file)
-        writer.writerow(['Camada', 'Ponto', 'Angulo_rad', 'Distancia_mm'])
+        cabecalho = ['Camada', 'Ponto', 'Angulo_rad', 'Distancia_mm']
+        writer.writerow(cabecalho if medicao is None else cabecalho + ['Desvio_mm', 'Leituras'])
 
-        logger.info(f"Camada {camada} iniciada - ({pontos_por_camada} pts).")
-        passos_por_ponto = passos_por_volta // pontos_por_camada
+        for camada in range(1, camadas + 1):
+            if amostragem is not None:
+                amostragem.iniciar_camada(camada)
+            logger.info(f"Camada {camada} iniciada - ({pts_por_camada} pts).")
+            posicao = 0  # posição da base na grade da camada
+            for passo in range(pts_por_camada):
+                if parar is not None and parar.is_set():
+                    concluida = False
+                    break
+                if amostragem is not None and not amostragem.medir_aqui(passo):
+                    continue
+                if passo > posicao:
+                    girar_motor(ser, 'BASE', (passo - posicao) * passos_por_ponto)
+                    posicao = passo
+                angulo = 2 * math.pi * passo / pts_por_camada
+                if medicao is None:
+                    distancia = medir_distancia(ser)
+                    linha = [camada, passo, angulo, distancia]
+                else:
+                    distancia, desvio, n = medicao.medir(lambda k: medir_leituras(ser, k))
+                    linha = [camada, passo, angulo, distancia, desvio, n]
+                if amostragem is not None:
+                    amostragem.registrar(passo, distancia)
+                with medir("escrita_csv"):
+                    writer.writerow(linha)
+                if ao_medir is not None:
+                    ao_medir(camada, passo, angulo, distancia)
+            if not concluida: break
+            girar_motor(ser, 'BASE', (pts_por_camada - posicao) * passos_por_ponto)  # completa a volta
+            girar_motor(ser, 'ELEV', passos_por_camada)
+            subidas += 1
 
-        for camada in range(camadas):
-            for passo in range(pontos_por_camada):
-                girar_motor(ser, 'BASE', passos_por_ponto)
-                distancia = medir_distancia(ser)
+    if medicao is not None and medicao.leituras_por_ponto:
+        media = sum(medicao.leituras_por_ponto) / len(medicao.leituras_por_ponto)
+        logger.info(f"Sobreamostragem: {media:.2f} leituras por ponto em média")
+    if amostragem is not None:
+        paradas = amostragem.paradas_por_camada
+        logger.info(f"Amostragem adaptativa: {sum(paradas) / len(paradas):.1f} de {pts_por_camada} "
+                    f"pontos por camada em média")
+    girar_motor(ser, 'ELEV', -subidas * passos_por_camada)  # volta ao início
+    if concluida:
+        logger.info(f"Varredura concluída. CSV: {arquivo_csv}")
+    else:
+        logger.warning(f"Varredura interrompida na camada {camada}. CSV parcial: {arquivo_csv}")
 
-                angulo = 2 * np.pi * passo / pontos_por_camada
-                writer.writerow([camada, passo, angulo, distancia])
-            girar_motor(ser, 'ELEV', passos_por_camada)
+    # métricas do link serial ao lado do CSV
+    telemetria.salvar_json(arquivo_csv.replace(".csv", "_link.json"))
+    logger.info(f"Link serial: {telemetria.resumo_curto()}")
+    return concluida
+
+
+def passes_multirresolucao(salto_camada, salto_ponto):
+    """
+    Sequência de passes do grosso ao fino, dividindo os saltos por 2 até 1.
+
+    Returns:
+        list: [(salto_camada, salto_ponto), ..., (1, 1)]
+    """
+    passes = [(max(1, salto_camada), max(1, salto_ponto))]
+    while passes[-1] != (1, 1):
+        sc, sp = passes[-1]
+        passes.append((max(1, sc // 2), max(1, sp // 2)))
+    return passes
+
+
+def _pontos_medidos(arquivo_csv, cabecalho):
+    """Pares (camada, ponto) já gravados num CSV de varredura (para retomar)."""
+    with open(arquivo_csv, newline='') as file:
+        leitor = csv.DictReader(file)
+        if leitor.fieldnames is not None and leitor.fieldnames != cabecalho:
+            raise ValueError(f"{arquivo_csv} tem as colunas {leitor.fieldnames}; a varredura gravaria {cabecalho} "
+                             f"(a sobreamostragem deve ser a mesma da varredura interrompida)")
+        return {(int(linha['Camada']), int(linha['Ponto'])) for linha in leitor}
+
+
+def executar_varredura_multirresolucao(ser, arquivo_csv, pts_por_camada, camadas, passos_por_volta,
+                                       passos_por_camada, passes, ao_medir=None, parar=None,
+                                       ao_concluir_passe=None, medicao=None):
+    """
+    Varredura do grosso ao fino sobre a grade fina (camadas x pts_por_camada).
+
+    Cada passe (salto_camada, salto_ponto) mede as camadas 1, 1+salto_camada, ...
+    nos pontos múltiplos de salto_ponto que ainda não foram medidos. As
+    leituras são só acrescentadas ao CSV, com Camada e Ponto na numeração da
+    grade fina, então os passes seguintes completam os anteriores sem
+    repetir leituras nem reescrever o arquivo. Se o CSV já existir, a
+    varredura continua de onde parou.
+
+    Args:
+        passes (list): Saltos de cada passe, ex.: passes_multirresolucao(4, 4).
+        ao_concluir_passe (callable): Opcional, chamado como
+            ao_concluir_passe(indice, salto_camada, salto_ponto) ao fim de cada passe.
+        medicao (MedicaoRobusta): Opcional; como em executar_varredura. Para
+            retomar, deve ser usada (ou não) como na varredura interrompida.
+        Demais argumentos como em executar_varredura.
+
+    Returns:
+        bool: True se todos os passes foram concluídos, False se interrompida.
+    """
+    passos_por_ponto = passos_por_volta // pts_por_camada
+    cabecalho = ['Camada', 'Ponto', 'Angulo_rad', 'Distancia_mm']
+    if medicao is not None:
+        cabecalho += ['Desvio_mm', 'Leituras']
+    medidos = _pontos_medidos(arquivo_csv, cabecalho) if os.path.exists(arquivo_csv) else set()
+    elevacao = 1  # camada em que a elevação está
+    concluida = True
+    telemetria.limpar()
+
+    logger.info(f"Iniciando varredura multirresolução ({len(passes)} passes): {arquivo_csv}")
+    with open(arquivo_csv, mode='a', newline='') as file:
+        writer = csv.writer(file)
+        if not medidos and file.tell() == 0:
+            writer.writerow(cabecalho)
+
+        for indice, (salto_camada, salto_ponto) in enumerate(passes, start=1):
+            logger.info(f"Passe {indice}: camadas a cada {salto_camada}, pontos a cada {salto_ponto}")
+            for camada in range(1, camadas + 1, salto_camada):
+                faltam = [p for p in range(0, pts_por_camada, salto_ponto) if (camada, p) not in medidos]
+                if not faltam: continue
+                if camada != elevacao:
+                    girar_motor(ser, 'ELEV', (camada - elevacao) * passos_por_camada)
+                    elevacao = camada
+
+                posicao = 0
+                for passo in faltam:
+                    if parar is not None and parar.is_set():
+                        concluida = False
+                        break
+                    if passo > posicao:
+                        girar_motor(ser, 'BASE', (passo - posicao) * passos_por_ponto)
+                        posicao = passo
+                    angulo = 2 * math.pi * passo / pts_por_camada
+                    if medicao is None:
+                        distancia = medir_distancia(ser)
+                        linha = [camada, passo, angulo, distancia]
+                    else:
+                        distancia, desvio, n = medicao.medir(lambda k: medir_leituras(ser, k))
+                        linha = [camada, passo, angulo, distancia, desvio, n]
+                    with medir("escrita_csv"):
+                        writer.writerow(linha)
+                    medidos.add((camada, passo))
+                    if ao_medir is not None:
+                        ao_medir(camada, passo, angulo, distancia)
+                if not concluida: break
+                girar_motor(ser, 'BASE', (pts_por_camada - posicao) * passos_por_ponto)  # completa a volta
+            if not concluida: break
+            file.flush()
+            if ao_concluir_passe is not None:
+                ao_concluir_passe(indice, salto_camada, salto_ponto)
+
+    if medicao is not None and medicao.leituras_por_ponto:
+        media = sum(medicao.leituras_por_ponto) / len(medicao.leituras_por_ponto)
+        logger.info(f"Sobreamostragem: {media:.2f} leituras por ponto em média")
+    girar_motor(ser, 'ELEV', -(elevacao - 1) * passos_por_camada)  # volta ao início
+    if concluida:
+        logger.info(f"Varredura concluída. CSV: {arquivo_csv}")
+    else:
+        logger.warning(f"Varredura interrompida no passe {indice}. CSV parcial: {arquivo_csv}")
 
-    logger.info(f"Varredura concluída. CSV: {arquivo_csv}")
+    telemetria.salvar_json(arquivo_csv.replace(".csv", "_link.json"))
+    logger.info(f"Link serial: {telemetria.resumo_curto()}")
+    return concluida
 
 
 # ==================================================
@@ -0,0 +1,115 @@
+import json
+import time
+from collections import deque, Counter
+
+class TelemetriaSerial:
+    """
+    Latências e saúde do link serial, por tipo de comando (BASE, ELEV, SENS).
+
+    Para cada comando guarda, numa janela deslizante, o tempo até o eco
+    "Executando" (motores) e até a resposta final ("<MOTOR> DONE" ou "DIST:").
+    Conta timeouts, respostas ERRO, DIST:TIMEOUT, linhas inesperadas e
+    erros de decodificação. Escrita pela thread da varredura; os resumos
+    podem ser lidos de qualquer thread.
+    """
+    def __init__(self, janela=2000):
+        self.janela = janela
+        self.limpar()
+
+    def limpar(self):
+        self.latencias = {}   # tipo -> deque de latências até a resposta (s)
+        self.ecos = {}        # tipo -> deque de latências até o eco (s)
+        self.comandos = Counter()
+        self.timeouts = Counter()
+        self.erros = Counter()
+        self.dist_timeout = 0
+        self.linhas_lixo = 0
+        self.erros_decodificacao = 0
+        self.inicio = time.time()
+
+    # ----- registro (chamado pelo scanner) -----
+    def comando(self, tipo):
+        """Marca o envio de um comando. Returns: instante (perf_counter)."""
+        self.comandos[tipo] += 1
+        return time.perf_counter()
+
+    def eco(self, tipo, t0):
+        self.ecos.setdefault(tipo, deque(maxlen=self.janela)).append(time.perf_counter() - t0)
+
+    def resposta(self, tipo, t0):
+        self.latencias.setdefault(tipo, deque(maxlen=self.janela)).append(time.perf_counter() - t0)
+
+    def timeout(self, tipo):
+        self.timeouts[tipo] += 1
+
+    def erro(self, tipo):
+        self.erros[tipo] += 1
+
+    def leitura_timeout(self):
+        self.dist_timeout += 1
+
+    def lixo(self):
+        self.linhas_lixo += 1
+
+    def falha_decodificacao(self):
+        self.erros_decodificacao += 1
+
+    # ----- consulta -----
+    @staticmethod
+    def _percentis(valores):
+        import numpy as np
+
+        if not valores: return None
+        t = np.fromiter(valores, dtype=float) * 1000
+        p50, p95, p99 = np.percentile(t, [50, 95, 99])
+        return {"n": int(t.size), "p50_ms": float(p50), "p95_ms": float(p95),
+                "p99_ms": float(p99), "max_ms": float(t.max())}
+
+    def histograma(self, tipo, bins=20):
+        """
+        Histograma das latências de resposta recentes de `tipo`.
+
+        Returns:
+            tuple: (contagens, bordas_ms) como np.ndarray, ou None sem dados.
+        """
+        import numpy as np
+
+        valores = list(self.latencias.get(tipo, ()))
+        if not valores: return None
+        return np.histogram(np.asarray(valores) * 1000, bins=bins)
+
+    def resumo(self):
+        """
+        Returns:
+            dict: latências por tipo (resposta e eco) e contadores de falhas.
+        """
+        tipos = sorted(set(self.comandos) | set(self.latencias))
+        return {
+            "duracao_s": time.time() - self.inicio,
+            "comandos": dict(self.comandos),
+            "resposta": {t: self._percentis(list(self.latencias.get(t, ()))) for t in tipos},
+            "eco": {t: self._percentis(list(self.ecos.get(t, ()))) for t in tipos if t in self.ecos},
+            "timeouts": dict(self.timeouts),
+            "erros": dict(self.erros),
+            "dist_timeout": self.dist_timeout,
+            "linhas_lixo": self.linhas_lixo,
+            "erros_decodificacao": self.erros_decodificacao,
+        }
+
+    def resumo_curto(self):
+        """Uma linha para a interface/log."""
+        r = self.resumo()
+        partes = [f"{t} p95 {v['p95_ms']:.0f} ms" for t, v in r["resposta"].items() if v]
+        falhas = sum(r["timeouts"].values()) + sum(r["erros"].values())
+        partes.append(f"timeouts/erros {falhas}")
+        partes.append(f"DIST:TIMEOUT {r['dist_timeout']}")
+        partes.append(f"lixo {r['linhas_lixo'] + r['erros_decodificacao']}")
+        return " | ".join(partes)
+
+    def salvar_json(self, caminho):
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.resumo(), f, indent=2, ensure_ascii=False)
+
+
+# instância global, como o logger
+telemetria = TelemetriaSerial()
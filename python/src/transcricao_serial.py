@@ -0,0 +1,199 @@
+"""
+Gravação e reprodução de transcrições brutas da porta serial.
+
+Formato binário (.scnt):
+    cabeçalho: b"SCNT" | versão (uint8) | tamanho (uint32) | metadados JSON
+    registros: direção (uint8: 0 enviado, 1 recebido) | delta desde o
+               registro anterior em µs (uint32) | tamanho (uint16) | bytes
+
+Uma sessão gravada com SerialGravador pode ser reproduzida com SerialReplay,
+que imita a interface de serial.Serial usada por scanner.py (write, readline,
+in_waiting, close, is_open) em tempo real ou o mais rápido possível.
+"""
+import json
+import struct
+import time
+from datetime import datetime
+from logger_setup import logger
+
+MAGICO = b"SCNT"
+VERSAO = 1
+ENVIADO, RECEBIDO = 0, 1
+_CABECALHO = struct.Struct("<BI")
+_REGISTRO = struct.Struct("<BIH")
+
+
+class SerialGravador:
+    """Envolve uma serial aberta e grava tudo o que é enviado e recebido."""
+    def __init__(self, ser, caminho, metadados=None):
+        self.ser = ser
+        self.caminho = caminho
+        self.arquivo = open(caminho, "wb")
+        meta = dict(metadados or {}, inicio=datetime.now().isoformat())
+        meta_bytes = json.dumps(meta).encode()
+        self.arquivo.write(MAGICO + _CABECALHO.pack(VERSAO, len(meta_bytes)) + meta_bytes)
+        self._ultimo = time.perf_counter_ns()
+
+    def _gravar(self, direcao, dados):
+        agora = time.perf_counter_ns()
+        delta_us = min((agora - self._ultimo) // 1000, 0xFFFFFFFF)
+        self._ultimo = agora
+        for i in range(0, max(len(dados), 1), 0xFFFF):
+            pedaco = dados[i:i + 0xFFFF]
+            self.arquivo.write(_REGISTRO.pack(direcao, delta_us, len(pedaco)) + pedaco)
+            delta_us = 0
+
+    # ----- interface de serial.Serial -----
+    def write(self, dados):
+        self._gravar(ENVIADO, bytes(dados))
+        return self.ser.write(dados)
+
+    def readline(self):
+        linha = self.ser.readline()
+        if linha: self._gravar(RECEBIDO, linha)
+        return linha
+
+    def read(self, n=1):
+        dados = self.ser.read(n)
+        if dados: self._gravar(RECEBIDO, dados)
+        return dados
+
+    @property
+    def in_waiting(self):
+        return self.ser.in_waiting
+
+    @property
+    def is_open(self):
+        return self.ser.is_open
+
+    def close(self):
+        if not self.arquivo.closed:
+            self.arquivo.close()
+            logger.info(f"Transcrição serial salva em {self.caminho}")
+        self.ser.close()
+
+
+def ler_transcricao(caminho):
+    """
+    Lê uma transcrição .scnt.
+
+    Returns:
+        tuple: (metadados, registros) com registros = [(direção, t_s, bytes), ...],
+            t_s em segundos desde o início da gravação.
+    """
+    with open(caminho, "rb") as f:
+        dados = f.read()
+    if dados[:4] != MAGICO:
+        raise ValueError(f"{caminho} não é uma transcrição serial")
+    versao, tam = _CABECALHO.unpack_from(dados, 4)
+    if versao != VERSAO:
+        raise ValueError(f"Versão de transcrição não suportada: {versao}")
+    pos = 4 + _CABECALHO.size
+    metadados = json.loads(dados[pos:pos + tam])
+    pos += tam
+
+    registros, t_us = [], 0
+    while pos < len(dados):
+        direcao, delta_us, n = _REGISTRO.unpack_from(dados, pos)
+        pos += _REGISTRO.size
+        t_us += delta_us
+        registros.append((direcao, t_us / 1e6, dados[pos:pos + n]))
+        pos += n
+    return metadados, registros
+
+
+def escrever_transcricao(caminho, registros, metadados=None):
+    """
+    Grava uma transcrição .scnt a partir de registros no formato de
+    ler_transcricao (útil para simular sessões, ex.: bench_processos.py).
+
+    Args:
+        registros (list): [(direção, t_s, bytes), ...], t_s crescente desde o início.
+    """
+    meta_bytes = json.dumps(dict(metadados or {})).encode()
+    with open(caminho, "wb") as f:
+        f.write(MAGICO + _CABECALHO.pack(VERSAO, len(meta_bytes)) + meta_bytes)
+        t_anterior_us = 0
+        for direcao, t, dados in registros:
+            t_us = int(round(t * 1e6))
+            f.write(_REGISTRO.pack(direcao, max(0, t_us - t_anterior_us), len(dados)) + dados)
+            t_anterior_us = t_us
+
+
+class SerialReplay:
+    """
+    Porta serial falsa que reproduz uma transcrição gravada.
+
+    Cada write() consome o próximo bloco enviado da gravação e libera as
+    respostas que vieram depois dele. Com `tempo_real`, cada resposta só
+    fica disponível após o mesmo atraso observado na gravação; senão,
+    imediatamente. Escritas diferentes das gravadas são contadas em
+    `divergencias` (a reprodução segue a gravação mesmo assim).
+    """
+    def __init__(self, caminho, tempo_real=False):
+        self.metadados, self.registros = ler_transcricao(caminho)
+        self.tempo_real = tempo_real
+        self.pos = 0
+        self.divergencias = 0
+        self.is_open = True
+        self._prontas = []  # (instante de liberação, bytes)
+        self._buffer = bytearray()  # bytes já liberados e ainda não lidos
+        self._liberar_respostas(time.perf_counter(), 0.0)
+
+    def _liberar_respostas(self, agora, t_referencia):
+        while self.pos < len(self.registros) and self.registros[self.pos][0] == RECEBIDO:
+            _, t, dados = self.registros[self.pos]
+            atraso = (t - t_referencia) if self.tempo_real else 0.0
+            self._prontas.append((agora + atraso, dados))
+            self.pos += 1
+
+    def _disponiveis(self):
+        agora = time.perf_counter()
+        n = 0
+        for instante, _ in self._prontas:
+            if instante > agora: break
+            n += 1
+        return n
+
+    def _puxar(self):
+        """Passa o próximo bloco recebido para o buffer (esperando por ele em tempo real); False se não houver."""
+        if not self._prontas: return False
+        if self.tempo_real and not self._disponiveis():
+            time.sleep(max(0.0, self._prontas[0][0] - time.perf_counter()))
+        self._buffer += self._prontas.pop(0)[1]
+        return True
+
+    @property
+    def in_waiting(self):
+        return len(self._buffer) + sum(len(d) for _, d in self._prontas[:self._disponiveis()])
+
+    def readline(self):
+        while b"\n" not in self._buffer and self._puxar():
+            pass
+        fim = self._buffer.find(b"\n") + 1 or len(self._buffer)
+        linha = bytes(self._buffer[:fim])
+        del self._buffer[:fim]
+        return linha
+
+    def read(self, n=1):
+        # como a serial real: até n bytes, esperando só se ainda não houver nenhum
+        while len(self._buffer) < n and (not self._buffer or self._disponiveis()) and self._puxar():
+            pass
+        dados = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        return dados
+
+    def write(self, dados):
+        agora = time.perf_counter()
+        if self.pos >= len(self.registros):
+            raise EOFError("Fim da transcrição serial")
+        direcao, t, gravado = self.registros[self.pos]
+        if gravado != bytes(dados):
+            self.divergencias += 1
+            logger.debug("Replay: enviado %r, gravado %r", bytes(dados), gravado)
+        self.pos += 1
+        self._liberar_respostas(agora, t)
+        return len(dados)
+
+    def close(self):
+        self.is_open = False
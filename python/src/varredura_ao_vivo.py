@@ -0,0 +1,151 @@
+import threading
+import numpy as np
+
+class BufferLeituras:
+    """
+    Buffer de leituras brutas, só de acréscimo, com crescimento amortizado
+    (capacidade dobra quando enche). Escrito pela thread da varredura e lido
+    pela interface; a trava só protege a troca de arrays no crescimento.
+    """
+    def __init__(self, capacidade=1024):
+        self._trava = threading.Lock()
+        self.camadas = np.empty(capacidade, dtype=np.int32)
+        self.pontos = np.empty(capacidade, dtype=np.int32)
+        self.angulos = np.empty(capacidade, dtype=np.float64)
+        self.distancias = np.empty(capacidade, dtype=np.float64)
+        self.n = 0
+
+    def adicionar(self, camada, ponto, angulo, distancia):
+        """Acrescenta uma leitura (distancia None vira NaN)."""
+        with self._trava:
+            if self.n == len(self.camadas):
+                self._crescer()
+            i = self.n
+            self.camadas[i] = camada
+            self.pontos[i] = ponto
+            self.angulos[i] = angulo
+            self.distancias[i] = np.nan if distancia is None else distancia
+            self.n = i + 1
+
+    def _crescer(self):
+        capacidade = 2 * len(self.camadas)
+        for nome in ("camadas", "pontos", "angulos", "distancias"):
+            antigo = getattr(self, nome)
+            novo = np.empty(capacidade, dtype=antigo.dtype)
+            novo[:self.n] = antigo[:self.n]
+            setattr(self, nome, novo)
+
+    def fatia(self, inicio=0):
+        """
+        Cópia das leituras a partir de `inicio`.
+
+        Returns:
+            tuple: (camadas, pontos, angulos, distancias, fim)
+        """
+        with self._trava:
+            fim = self.n
+            return (self.camadas[inicio:fim].copy(), self.pontos[inicio:fim].copy(),
+                    self.angulos[inicio:fim].copy(), self.distancias[inicio:fim].copy(), fim)
+
+
+class NuvemCrescente:
+    """
+    Nuvem (camada, x, y, z) só de acréscimo, com crescimento amortizado como
+    o BufferLeituras. camadas, xs, ys e zs são vistas [:n] dos arrays
+    internos: valem até a próxima atualização, sem cópia da nuvem inteira.
+    """
+    def __init__(self, capacidade=1024):
+        self._camadas = np.empty(capacidade, dtype=np.int32)
+        self._xyz = np.empty((3, capacidade))
+        self.n = 0
+
+    def acrescentar(self, camadas, xs, ys, zs):
+        fim = self.n + len(camadas)
+        if fim > len(self._camadas):
+            capacidade = max(2 * len(self._camadas), fim)
+            camadas_antigas, xyz_antigo = self._camadas, self._xyz
+            self._camadas = np.empty(capacidade, dtype=np.int32)
+            self._xyz = np.empty((3, capacidade))
+            self._camadas[:self.n] = camadas_antigas[:self.n]
+            self._xyz[:, :self.n] = xyz_antigo[:, :self.n]
+        self._camadas[self.n:fim] = camadas
+        self._xyz[0, self.n:fim] = xs
+        self._xyz[1, self.n:fim] = ys
+        self._xyz[2, self.n:fim] = zs
+        self.n = fim
+
+    def limpar(self):
+        self.n = 0
+
+    @property
+    def camadas(self):
+        return self._camadas[:self.n]
+
+    @property
+    def xs(self):
+        return self._xyz[0, :self.n]
+
+    @property
+    def ys(self):
+        return self._xyz[1, :self.n]
+
+    @property
+    def zs(self):
+        return self._xyz[2, :self.n]
+
+
+class PreviaVarredura:
+    """
+    Nuvem reconstruída incrementalmente a partir do BufferLeituras.
+    Só as leituras novas são convertidas e acrescentadas (NuvemCrescente)
+    a cada atualização; se a calibração mudar, tudo é reconvertido de uma
+    vez (vetorizado).
+    """
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.parametros = None
+        self.lidos = 0
+        self.reinicios = 0  # vezes em que a nuvem foi refeita do zero (calibração nova)
+        self.nuvem = NuvemCrescente()
+
+    camadas = property(lambda self: self.nuvem.camadas)
+    xs = property(lambda self: self.nuvem.xs)
+    ys = property(lambda self: self.nuvem.ys)
+    zs = property(lambda self: self.nuvem.zs)
+
+    def atualizar(self, parametros):
+        """
+        Converte as leituras novas com a calibração `parametros`
+        (chaves de `reconstruir_e_suavizar`, sem suavização).
+
+        Returns:
+            bool: True se a nuvem mudou.
+        """
+        from reconstrucao import polar_para_cartesiano
+
+        if parametros != self.parametros:
+            self.parametros = dict(parametros)
+            self.lidos = 0
+            self.reinicios += 1
+            self.nuvem.limpar()
+
+        camadas, _, angulos, distancias, fim = self.buffer.fatia(self.lidos)
+        if fim == self.lidos: return False
+        self.lidos = fim
+
+        validos = ~np.isnan(distancias)
+        camadas, angulos, distancias = camadas[validos], angulos[validos], distancias[validos]
+        p = self.parametros
+        xs, ys, zs = polar_para_cartesiano(
+            camadas, angulos, distancias,
+            p["altura_inicial"], p["altura_camada"],
+            p["dist_sensor"], p["alin_horizontal"], p["escala"]
+        )
+        self.nuvem.acrescentar(camadas, xs, ys, zs)
+        return True
+
+    def progresso(self):
+        """(camada, ponto) da última leitura recebida, ou None."""
+        n = self.buffer.n
+        if n == 0: return None
+        return int(self.buffer.camadas[n - 1]), int(self.buffer.pontos[n - 1])
@@ -0,0 +1,346 @@
+"""
+Varredura em processos separados, para que a serial não dependa do GIL da interface.
+
+    aquisição (processo)     dona da porta serial; roda executar_varredura e
+                             grava cada leitura no AnelCompartilhado
+    processamento (processo) consome o anel, converte para XYZ com a calibração
+                             atual e monta a malha camada a camada; ao fim salva
+                             <csv>_previa.stl
+    interface                só recebe resultados (pontos novos, eventos) por filas
+
+O laço de espera ativa de scanner.py passa a ter um interpretador só para
+ele: desenho, reconstrução e NumPy na interface não atrasam mais as respostas
+do Arduino. O instante de cada leitura vai no anel, então a interface mede a
+vazão e o jitter reais da aquisição (ver bench_processos.py).
+
+Os processos são criados com "spawn" (fork com threads do Qt não é seguro).
+"""
+import multiprocessing as mp
+import queue
+import shutil
+import time
+
+import numpy as np
+
+from logger_setup import logger
+from anel_compartilhado import AnelCompartilhado, CONCLUIDA, INTERROMPIDA, ERRO
+from varredura_ao_vivo import NuvemCrescente
+
+_INTERVALO_S = 0.01  # pausa do processamento quando o anel está vazio
+
+
+# ==================================================
+# PROCESSOS
+# ==================================================
+
+def _aquisicao(porta, baudrate, nome_anel, trava_anel, arquivo_csv, pts_por_camada, camadas, passos_por_volta,
+               passos_por_camada, opcoes, parar, eventos):
+    """Processo de aquisição: abre a serial, varre e publica as leituras no anel."""
+    from scanner import (conectar_serial, iniciar_arduino, executar_varredura, executar_varredura_multirresolucao,
+                         preparar_movimento, preparar_sensor)
+
+    anel = AnelCompartilhado(nome_anel, trava_anel)
+    estado, ser = ERRO, None
+    try:
+        ser = conectar_serial(porta, baudrate, gravar=opcoes.get("gravar"))
+        if ser is None:
+            raise ConnectionError(f"Não foi possível abrir {porta}")
+        firmware = iniciar_arduino(ser)
+        preparar_movimento(ser, opcoes.get("movimento"), firmware)
+        sensor = preparar_sensor(ser, **(opcoes.get("sensor") or {}))
+        if sensor is not None:
+            eventos.put(("sensor", sensor))
+
+        passes = opcoes.get("passes")
+        if passes:
+            def passe_concluido(indice, *_):
+                if indice == len(passes): return
+                copia = arquivo_csv.replace(".csv", f"_passe{indice}.csv")
+                shutil.copyfile(arquivo_csv, copia)
+                eventos.put(("passe", copia))
+
+            concluida = executar_varredura_multirresolucao(
+                ser, arquivo_csv, pts_por_camada, camadas, passos_por_volta, passos_por_camada, passes,
+                ao_medir=anel.escrever, parar=parar, ao_concluir_passe=passe_concluido,
+                medicao=opcoes.get("medicao"))
+        else:
+            concluida = executar_varredura(
+                ser, arquivo_csv, pts_por_camada, camadas, passos_por_volta, passos_por_camada,
+                ao_medir=anel.escrever, parar=parar,
+                amostragem=opcoes.get("amostragem"), medicao=opcoes.get("medicao"))
+        estado = CONCLUIDA if concluida else INTERROMPIDA
+        eventos.put(("fim", concluida, ""))
+    except Exception as e:
+        eventos.put(("fim", False, str(e)))
+    finally:
+        anel.encerrar(estado)
+        if ser is not None: ser.close()
+        anel.fechar()
+
+
+class _MalhaIncremental:
+    """
+    Faixas de triângulos entre camadas consecutivas, montadas assim que a camada seguinte termina.
+    Guarda só os pontos da última camada já ligada e os das seguintes (a aberta): cada lote
+    custa o tamanho de uma camada, não o da nuvem.
+    """
+    def __init__(self, pts_por_camada):
+        self.pts_por_camada = pts_por_camada
+        self.triangulos = []   # (k, 3, 3) por faixa
+        self.ultima = None     # última camada já ligada à anterior
+        self._camadas = np.empty(0, dtype=np.int64)
+        self._angulos = np.empty(0)
+        self._xyz = np.empty((0, 3))
+
+    def atualizar(self, camadas, angulos, xyz, final=False):
+        """Acrescenta os pontos novos e liga as camadas que terminaram."""
+        import pandas as pd
+        from exportar_stl import malha_cilindrica
+
+        camadas = self._camadas = np.concatenate((self._camadas, camadas))
+        angulos = self._angulos = np.concatenate((self._angulos, angulos))
+        xyz = self._xyz = np.concatenate((self._xyz, xyz))
+        if len(camadas) == 0: return
+        # camadas chegam em ordem: só a última pode estar incompleta
+        inicio = np.r_[0, np.flatnonzero(np.diff(camadas)) + 1]
+        fim = np.r_[inicio[1:], len(camadas)]
+        ids = camadas[inicio]
+        anterior = None  # índice (em ids) da última camada ligada
+        for i in range(len(ids) if final else len(ids) - 1):
+            if ids[i] == self.ultima or self.ultima is None:
+                self.ultima, anterior = ids[i], i
+                continue
+            faixa = slice(inicio[anterior], fim[i])  # a camada anterior e esta, contíguas
+            df = pd.DataFrame({"Camada": camadas[faixa], "X_mm": xyz[faixa, 0], "Y_mm": xyz[faixa, 1],
+                               "Z_mm": xyz[faixa, 2], "Angulo_rad": angulos[faixa]})
+            vertices, faces = malha_cilindrica(df, pts_por_camada=self.pts_por_camada)
+            self.triangulos.append(vertices[faces])
+            self.ultima, anterior = ids[i], i
+        if anterior:
+            self._camadas, self._angulos, self._xyz = (camadas[inicio[anterior]:], angulos[inicio[anterior]:],
+                                                      xyz[inicio[anterior]:])
+
+    def salvar(self, caminho):
+        from stl import mesh
+
+        if not self.triangulos: return None
+        triangulos = np.concatenate(self.triangulos)
+        malha = mesh.Mesh(np.zeros(len(triangulos), dtype=mesh.Mesh.dtype))
+        malha.vectors[:] = triangulos
+        malha.save(caminho)
+        return caminho
+
+
+def _processamento(nome_anel, trava_anel, parametros, pts_por_camada, arquivo_stl, comandos, resultados):
+    """
+    Processo de processamento: converte as leituras do anel e monta a malha.
+
+    Envia em `resultados`:
+        ("pontos", registros, xs, ys, zs)   leituras novas já convertidas
+        ("reiniciar", registros, xs, ys, zs) tudo reconvertido (calibração mudou)
+        ("malha", caminho)                  STL da malha incremental, ao fim
+    e recebe em `comandos` novos parâmetros de calibração (dict) ou None para sair.
+    """
+    from reconstrucao import polar_para_cartesiano
+
+    anel = AnelCompartilhado(nome_anel, trava_anel)
+    brutos = []        # lotes lidos do anel, para reconverter se a calibração mudar
+    malha = _MalhaIncremental(pts_por_camada) if arquivo_stl else None
+
+    def converter(registros):
+        p = parametros
+        registros = registros[~np.isnan(registros["distancia"])]
+        xs, ys, zs = polar_para_cartesiano(registros["camada"], registros["angulo"], registros["distancia"],
+                                           p["altura_inicial"], p["altura_camada"], p["dist_sensor"],
+                                           p["alin_horizontal"], p["escala"])
+        return registros, xs, ys, zs
+
+    try:
+        while True:
+            reconverter = False
+            try:
+                while True:
+                    comando = comandos.get_nowait()
+                    if comando is None: return
+                    parametros, reconverter = comando, True
+            except queue.Empty:
+                pass
+
+            terminado = anel.terminado()  # antes de ler: nada escrito depois fica para trás
+            lote = anel.ler()
+            if len(lote): brutos.append(lote)
+
+            novos = None
+            if reconverter and brutos:
+                brutos = [np.concatenate(brutos)]
+                novos = converter(brutos[0])
+                resultados.put(("reiniciar",) + novos)
+                if malha is not None:
+                    malha = _MalhaIncremental(pts_por_camada)
+            elif len(lote):
+                novos = converter(lote)
+                resultados.put(("pontos",) + novos)
+
+            if malha is not None and (novos is not None or terminado):
+                registros, xs, ys, zs = novos if novos is not None else (lote[:0], (), (), ())
+                malha.atualizar(registros["camada"], registros["angulo"], np.column_stack((xs, ys, zs)).reshape(-1, 3),
+                                final=terminado)
+
+            if terminado:
+                if malha is not None and anel.estado == CONCLUIDA:
+                    resultados.put(("malha", malha.salvar(arquivo_stl)))
+                return
+            if not len(lote):
+                time.sleep(_INTERVALO_S)
+    except Exception as e:
+        logger.error(f"Erro no processamento da varredura: {e}")
+    finally:
+        resultados.put(("fim_processamento",))
+        anel.fechar()
+
+
+# ==================================================
+# LADO DA INTERFACE
+# ==================================================
+
+class VarreduraMultiprocesso:
+    """
+    Dispara os dois processos e acumula os resultados para a prévia.
+
+    Expõe a mesma interface de varredura_ao_vivo.PreviaVarredura
+    (atualizar(parametros), camadas, xs, ys, zs, progresso()), mais:
+        eventos()        ("sensor", config), ("passe", csv) e ("fim", concluida, erro) da aquisição
+        estatisticas()   vazão e jitter medidos com os instantes das leituras
+    """
+    def __init__(self, porta, baudrate, arquivo_csv, pts_por_camada, camadas, passos_por_volta,
+                 passos_por_camada, parametros, opcoes=None, capacidade=1 << 16):
+        opcoes = dict(opcoes or {})
+        contexto = mp.get_context("spawn")
+        self.anel = AnelCompartilhado.criar(capacidade, contexto)
+        self.evento_parar = contexto.Event()
+        self._eventos = contexto.Queue()
+        self._comandos = contexto.Queue()
+        self._resultados = contexto.Queue()
+        self.parametros = dict(parametros)
+        self.arquivo_stl = None if opcoes.get("passes") else arquivo_csv.replace(".csv", "_previa.stl")
+        self.arquivo_malha = None
+
+        self.nuvem = NuvemCrescente()
+        self._ultimo = None
+        self._instantes = []
+        self.reinicios = 0  # "reiniciar" recebidos (nuvem reconvertida com a calibração nova)
+
+        self.aquisicao = contexto.Process(
+            target=_aquisicao, name="aquisicao", daemon=True,
+            args=(porta, baudrate, self.anel.nome, self.anel.trava, arquivo_csv, pts_por_camada, camadas,
+                  passos_por_volta, passos_por_camada, opcoes, self.evento_parar, self._eventos))
+        self.processamento = contexto.Process(
+            target=_processamento, name="processamento", daemon=True,
+            args=(self.anel.nome, self.anel.trava, self.parametros, pts_por_camada, self.arquivo_stl,
+                  self._comandos, self._resultados))
+
+    camadas = property(lambda self: self.nuvem.camadas)
+    xs = property(lambda self: self.nuvem.xs)
+    ys = property(lambda self: self.nuvem.ys)
+    zs = property(lambda self: self.nuvem.zs)
+
+    def iniciar(self):
+        self.processamento.start()
+        self.aquisicao.start()
+        logger.info(f"Aquisição (pid {self.aquisicao.pid}) e processamento "
+                    f"(pid {self.processamento.pid}) em processos separados")
+
+    def parar(self):
+        self.evento_parar.set()
+
+    def atualizar(self, parametros):
+        """
+        Recebe os resultados prontos; se a calibração mudou, pede a reconversão.
+
+        Returns:
+            bool: True se a nuvem mudou.
+        """
+        if parametros != self.parametros:
+            self.parametros = dict(parametros)
+            self._comandos.put(self.parametros)
+        mudou = False
+        while True:
+            try:
+                mensagem = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            tipo = mensagem[0]
+            if tipo in ("pontos", "reiniciar"):
+                registros, xs, ys, zs = mensagem[1:]
+                if tipo == "reiniciar":
+                    self.reinicios += 1
+                    self.nuvem.limpar()
+                else:
+                    self._instantes.append((registros["instante"], registros["camada"]))
+                self.nuvem.acrescentar(registros["camada"], xs, ys, zs)
+                if len(registros):
+                    self._ultimo = (int(registros["camada"][-1]), int(registros["ponto"][-1]))
+                mudou = True
+            elif tipo == "malha":
+                self.arquivo_malha = mensagem[1]
+        return mudou
+
+    def progresso(self):
+        """(camada, ponto) da última leitura recebida, ou None."""
+        return self._ultimo
+
+    def eventos(self):
+        saida = []
+        while True:
+            try:
+                saida.append(self._eventos.get_nowait())
+            except queue.Empty:
+                return saida
+
+    def estatisticas(self):
+        """
+        Vazão (leituras/s) e jitter (desvio padrão e p99 - mediana dos
+        intervalos entre leituras, ms) da aquisição até agora.
+        """
+        if not self._instantes: return None
+        return estatisticas_intervalos(np.concatenate([i for i, _ in self._instantes]),
+                                       np.concatenate([c for _, c in self._instantes]))
+
+    def encerrar(self, timeout=5.0):
+        """Espera os processos terminarem (ou os encerra) e libera a memória compartilhada."""
+        self.aquisicao.join(timeout)
+        fim = time.perf_counter() + timeout
+        while self.processamento.is_alive() and time.perf_counter() < fim:
+            self.atualizar(self.parametros)  # esvazia a fila, senão o processo não termina
+            time.sleep(_INTERVALO_S)
+        self.atualizar(self.parametros)
+        for processo in (self.aquisicao, self.processamento):
+            if processo.is_alive():
+                logger.warning(f"Processo {processo.name} não terminou; encerrando")
+                processo.terminate()
+        self.anel.fechar()
+
+
+def estatisticas_intervalos(instantes, camadas=None):
+    """
+    Args:
+        instantes (np.ndarray): time.perf_counter() de cada leitura, em ordem.
+        camadas (np.ndarray): Opcional; intervalos que passam de uma camada à
+            outra (subida da elevação) ficam de fora.
+
+    Returns:
+        dict: leituras, leituras_por_s, intervalo_medio_ms, jitter_ms (desvio padrão),
+            p99_menos_mediana_ms
+    """
+    intervalos = np.diff(np.asarray(instantes, dtype=float)) * 1000
+    if camadas is not None:
+        intervalos = intervalos[np.diff(camadas) == 0]
+    if len(intervalos) == 0:
+        return {"leituras": len(instantes)}
+    return {
+        "leituras": len(instantes),
+        "leituras_por_s": 1000 / intervalos.mean(),
+        "intervalo_medio_ms": float(intervalos.mean()),
+        "jitter_ms": float(intervalos.std()),
+        "p99_menos_mediana_ms": float(np.percentile(intervalos, 99) - np.median(intervalos)),
+    }